@@ -54,6 +54,8 @@ INSTALLED_APPS = [
     "scheduling",
     "complaints",
     "expenses",
+    "dashboard",
+    "reports",
 ]
 
 # ============================
@@ -72,6 +74,13 @@ MIDDLEWARE = [
     "common.logging.APILoggingMiddleware",
 ]
 
+# APILoggingMiddleware profiling: Server-Timing header, per-route stats (/api/common/perf/)
+API_PROFILING_ENABLED = os.getenv("API_PROFILING_ENABLED", "True") == "True"
+# Requests at or above this wall time are logged as warnings with their slowest query
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", 1000))
+# Latency samples kept per route (in memory, per process)
+API_PERF_SAMPLE_SIZE = int(os.getenv("API_PERF_SAMPLE_SIZE", 500))
+
 CORS_ALLOW_HEADERS = [
     "authorization",
     "content-type",
@@ -158,6 +167,26 @@ MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 DEFAULT_FILE_STORAGE = os.getenv("DEFAULT_FILE_STORAGE", "django.core.files.storage.FileSystemStorage")
 
+# ============================
+# CACHE
+# ============================
+# Shared cache for counters and cached snapshots. Falls back to per-process
+# memory when CACHE_URL is not set (e.g. local dev without Redis).
+CACHE_URL = os.getenv("CACHE_URL")
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # ============================
 # DRF / JWT
 # ============================
@@ -256,12 +285,56 @@ CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:63
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Asia/Dhaka'
+# Run tasks inline (no worker/broker), handy for local dev
+CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "False") == "True"
+# Run work inline when the broker is unreachable (common.utils.dispatch). Off in
+# production, where that would put PDF rendering back on the request.
+CELERY_INLINE_FALLBACK = os.getenv("CELERY_INLINE_FALLBACK", "False") == "True"
+
+# Invoice PDF rendering runs on its own queue(s); with INVOICE_RENDER_SHARDS > 1
+# work is spread over invoice_render.0 .. invoice_render.N-1 by invoice id.
+INVOICE_RENDER_QUEUE = os.getenv("INVOICE_RENDER_QUEUE", "invoice_render")
+INVOICE_RENDER_SHARDS = int(os.getenv("INVOICE_RENDER_SHARDS", 1))
+CELERY_TASK_ROUTES = {
+    "render_invoice_pdf": {"queue": INVOICE_RENDER_QUEUE},
+}
+
+# Notification outbox: NotificationService.send() only stores a pending row;
+# dispatch_notifications delivers them after commit. False = send inline.
+NOTIFICATION_OUTBOX = os.getenv("NOTIFICATION_OUTBOX", "True") == "True"
+NOTIFICATION_DISPATCH_BATCH_SIZE = int(os.getenv("NOTIFICATION_DISPATCH_BATCH_SIZE", 100))
+NOTIFICATION_DISPATCH_CONCURRENCY = int(os.getenv("NOTIFICATION_DISPATCH_CONCURRENCY", 8))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", 5))
+# Retry n waits NOTIFICATION_RETRY_BACKOFF * 2**(n-1) seconds (capped at 1h)
+NOTIFICATION_RETRY_BACKOFF = int(os.getenv("NOTIFICATION_RETRY_BACKOFF", 60))
+
+# Cached per-user AppPermission matrix (RoleBasedPermission); invalidated on permission changes
+PERMISSION_CACHE_TTL = int(os.getenv("PERMISSION_CACHE_TTL", 3600))
+# Cached renter access scope (RenterAccessMixin); invalidated when the renter's leases change
+RENTER_SCOPE_CACHE_TTL = int(os.getenv("RENTER_SCOPE_CACHE_TTL", 900))
+
+# Dashboard snapshot: served from the cache; model signals flag the parts a
+# write affects and refresh_dashboard_snapshot recomputes them after a short delay.
+DASHBOARD_SNAPSHOT_TTL = int(os.getenv("DASHBOARD_SNAPSHOT_TTL", 600))
+DASHBOARD_REFRESH_DELAY = int(os.getenv("DASHBOARD_REFRESH_DELAY", 5))
+# MonthlyFinancialRollup: seconds to wait before rebuilding months flagged dirty by writes
+FINANCIAL_ROLLUP_REFRESH_DELAY = int(os.getenv("FINANCIAL_ROLLUP_REFRESH_DELAY", 30))
+# Occupancy time series: per-month lease intervals; a lease/unit write invalidates all months
+OCCUPANCY_CACHE_TTL = int(os.getenv("OCCUPANCY_CACHE_TTL", 86400))
 
 # This enables the database-backed scheduler
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 BILLING_DAY = int(os.getenv("BILLING_DAY_OF_MONTH", 1))
 BILLING_HR = int(os.getenv("BILLING_HOUR", 0))
 BILLING_MIN = int(os.getenv("BILLING_MINUTE", 5))
+# Chunk size for bulk invoice inserts and the PDF/notification stage
+BILLING_BATCH_SIZE = int(os.getenv("BILLING_BATCH_SIZE", 500))
+# Largest bank / mobile-money statement accepted by POST /api/payments/import/
+PAYMENT_IMPORT_MAX_ROWS = int(os.getenv("PAYMENT_IMPORT_MAX_ROWS", 10000))
+# Overdue notices: invoices due this many days ago; a renter gets at most one notice per interval
+OVERDUE_THRESHOLD_DAYS = int(os.getenv("OVERDUE_THRESHOLD_DAYS", 30))
+OVERDUE_NOTICE_INTERVAL_DAYS = int(os.getenv("OVERDUE_NOTICE_INTERVAL_DAYS", 7))
+OVERDUE_HR = int(os.getenv("OVERDUE_HOUR", 10))
 
 CELERY_BEAT_SCHEDULE = {
     'auto-generate-invoices-first-of-month': {
@@ -272,6 +345,20 @@ CELERY_BEAT_SCHEDULE = {
             minute=BILLING_MIN
         ),
     },
+    'detect-overdue-invoices-daily': {
+        'task': 'detect_overdue_invoices_task',
+        'schedule': crontab(hour=OVERDUE_HR, minute=0),
+    },
+    # Builds the month that just closed and anything a lost refresh missed
+    'refresh-financial-rollups-nightly': {
+        'task': 'refresh_financial_rollups',
+        'schedule': crontab(hour=1, minute=15),
+    },
+    # Safety net for the outbox: picks up retries and anything a lost kick missed
+    'dispatch-notification-outbox': {
+        'task': 'dispatch_notifications',
+        'schedule': 60.0,
+    },
 }
 
 # ============================
@@ -282,4 +369,14 @@ SITE_URL = os.getenv("SITE_URL", "http://127.0.0.1:8000")
 BREVO_API_KEY = os.environ.get("BREVO_API_KEY")
 FROM_EMAIL = os.environ.get("FROM_EMAIL")  # e.g., rfnshare@gmail.com
 FROM_NAME = os.environ.get("FROM_NAME", "Building Manager")
-BREVO_USE_ATTACHMENT_URL = True
+# Send invoice PDFs as a URL Brevo downloads itself instead of inline base64
+# (needs a publicly reachable SITE_URL)
+BREVO_USE_ATTACHMENT_URL = os.environ.get("BREVO_USE_ATTACHMENT_URL", "False") == "True"
+# Memory cap for the encoded-attachment LRU used by inline sends
+BREVO_ATTACHMENT_CACHE_BYTES = int(os.environ.get("BREVO_ATTACHMENT_CACHE_BYTES", 32 * 1024 * 1024))
+# Override to point the Brevo client at a local stub (manage.py brevo_stub), e.g. http://127.0.0.1:8025/v3
+BREVO_API_URL = os.environ.get("BREVO_API_URL")
+# Keep-alive connections held by the shared Brevo client
+BREVO_POOL_MAXSIZE = int(os.environ.get("BREVO_POOL_MAXSIZE", NOTIFICATION_DISPATCH_CONCURRENCY))
+# Recipients per Brevo call (messageVersions) for templated reminder/overdue emails
+BREVO_BATCH_SIZE = int(os.environ.get("BREVO_BATCH_SIZE", 100))
@@ -1,4 +1,12 @@
 import logging
+import re
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.db import connection
+
 
 def setup_logging():
     logging.basicConfig(
@@ -8,9 +16,102 @@ def setup_logging():
     return logging.getLogger("BM")
 
 
+# -----------------------------
+# Request profiling
+# -----------------------------
+class QueryProfiler:
+    """connection.execute_wrapper that counts queries and keeps total / slowest DB time."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = (0.0, "")
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.total += elapsed
+            if elapsed > self.slowest[0]:
+                self.slowest = (elapsed, sql)
+
+
+class RouteStats:
+    """
+    In-memory per-route latency samples (this process only), reset on restart.
+    Keeps the last API_PERF_SAMPLE_SIZE requests per route.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=settings.API_PERF_SAMPLE_SIZE))
+        self._totals = defaultdict(int)
+
+    def record(self, route, wall_ms, db_ms, queries):
+        with self._lock:
+            self._samples[route].append((wall_ms, db_ms, queries))
+            self._totals[route] += 1
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    @staticmethod
+    def _percentile(values, pct):
+        # Nearest-rank percentile over sorted values
+        index = max(int(round(pct / 100 * len(values))) - 1, 0)
+        return values[min(index, len(values) - 1)]
+
+    def snapshot(self):
+        """One row per route, slowest p95 first."""
+        with self._lock:
+            samples = {route: list(rows) for route, rows in self._samples.items()}
+            totals = dict(self._totals)
+
+        rows = []
+        for route, entries in samples.items():
+            walls = sorted(wall for wall, _, _ in entries)
+            queries = [q for _, _, q in entries]
+            rows.append({
+                "route": route,
+                "requests": totals[route],
+                "samples": len(entries),
+                "p50_ms": round(self._percentile(walls, 50), 1),
+                "p95_ms": round(self._percentile(walls, 95), 1),
+                "max_ms": round(walls[-1], 1),
+                "avg_db_ms": round(sum(db for _, db, _ in entries) / len(entries), 1),
+                "avg_queries": round(sum(queries) / len(queries), 1),
+                "max_queries": max(queries),
+            })
+        rows.sort(key=lambda row: row["p95_ms"], reverse=True)
+        return rows
+
+
+route_stats = RouteStats()
+
+
+def request_route(request):
+    """Stable label for aggregation: method plus the matched URL pattern (not the concrete path)."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return f"{request.method} <unresolved>"
+    # Drop regex anchors left by router patterns ("^leases/(?P<pk>[^/.]+)/$")
+    route = re.sub(r"(?<!\[)\^|\$", "", match.route)
+    return f"{request.method} /{route}"
+
+
 class APILoggingMiddleware:
     """
-    Middleware to log every request/response
+    Middleware to log every request/response.
+    Also profiles each request (wall time, DB queries, DB time, slowest SQL):
+    adds a Server-Timing header, feeds route_stats (see /api/common/perf/)
+    and logs requests slower than SLOW_REQUEST_MS as warnings. Streaming
+    responses are measured until their body has been sent (no Server-Timing
+    header, since headers go out before the work is done).
     """
     def __init__(self, get_response):
         self.get_response = get_response
@@ -18,6 +119,64 @@ class APILoggingMiddleware:
 
     def __call__(self, request):
         self.logger.info(f"REQUEST: {request.method} {request.path}")
-        response = self.get_response(request)
-        self.logger.info(f"RESPONSE: {response.status_code} for {request.path}")
+        if not settings.API_PROFILING_ENABLED:
+            response = self.get_response(request)
+            self.logger.info(f"RESPONSE: {response.status_code} for {request.path}")
+            return response
+
+        profiler = QueryProfiler()
+        started = time.perf_counter()
+        with connection.execute_wrapper(profiler):
+            response = self.get_response(request)
+
+        route = request_route(request)
+        if response.streaming:
+            if getattr(response, "is_async", False):
+                # An async body cannot be wrapped with the sync profiler; record the view only
+                self._finish(request, route, response.status_code, profiler, started)
+                return response
+            # The body (and its queries) is produced while the server iterates it
+            response.streaming_content = self._profile_stream(
+                response.streaming_content, request, route, response.status_code, profiler, started,
+            )
+            return response
+
+        wall_ms, db_ms = self._finish(request, route, response.status_code, profiler, started)
+        response["Server-Timing"] = (
+            f'app;dur={wall_ms:.1f}, db;dur={db_ms:.1f};desc="{profiler.count} queries"'
+        )
         return response
+
+    def _profile_stream(self, content, request, route, status_code, profiler, started):
+        """Re-enter the query profiler while each chunk is produced; record once the body is done."""
+        try:
+            iterator = iter(content)
+            while True:
+                with connection.execute_wrapper(profiler):
+                    try:
+                        chunk = next(iterator)
+                    except StopIteration:
+                        return
+                yield chunk
+        finally:
+            # Runs on exhaustion and when the server closes the response early
+            self._finish(request, route, status_code, profiler, started)
+
+    def _finish(self, request, route, status_code, profiler, started):
+        """Record route stats, log the response and warn when slow. Returns (wall_ms, db_ms)."""
+        wall_ms = (time.perf_counter() - started) * 1000
+        db_ms = profiler.total * 1000
+        route_stats.record(route, wall_ms, db_ms, profiler.count)
+
+        self.logger.info(
+            f"RESPONSE: {status_code} for {request.path} "
+            f"in {wall_ms:.1f}ms ({profiler.count} queries, {db_ms:.1f}ms db)"
+        )
+        if wall_ms >= settings.SLOW_REQUEST_MS:
+            slowest_ms, slowest_sql = profiler.slowest
+            self.logger.warning(
+                f"SLOW REQUEST: {route} ({request.path}) took {wall_ms:.1f}ms, "
+                f"{profiler.count} queries / {db_ms:.1f}ms db; "
+                f"slowest query {slowest_ms * 1000:.1f}ms: {slowest_sql[:500]}"
+            )
+        return wall_ms, db_ms
@@ -0,0 +1,193 @@
+# common/management/commands/check_query_plans.py
+import re
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from accounts.models import User
+from buildings.models import Floor, Unit
+from expenses.models import Expense
+from invoices.models import OPEN_STATUSES, Invoice
+from leases.models import Lease
+from notifications.models import Notification
+from payments.models import Payment
+from payments.services import ALLOCATABLE_STATUSES, LEASE_PAYMENT_EXCLUDED_TYPES
+from renters.models import Renter
+from scheduling.models import TaskLog
+from scheduling.overdue import OVERDUE_STATUSES
+from scheduling.reminders import REMINDER_STATUSES
+
+# A full read of the table in EXPLAIN output, per backend
+FULL_SCAN_PATTERNS = {
+    "postgresql": r"Seq Scan on {table}\b",
+    "sqlite": r"\bSCAN {table}\b(?! USING)",
+}
+SEED_MONTHS = 36
+
+
+def _hot_queries():
+    """(label, model, queryset) for the filter paths the Meta indexes are meant to serve."""
+    today = date.today()
+    month = today.replace(day=1)
+    lease_id = Lease.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    unit_id = Unit.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    return [
+        ("overdue notices", Invoice,
+         Invoice.objects.filter(due_date__lte=today - timedelta(days=7), status__in=OVERDUE_STATUSES)
+         .values("lease__renter_id").annotate(invoices=Count("id"))),
+        ("rent reminders", Invoice,
+         Invoice.objects.filter(due_date__lte=today + timedelta(days=3), status__in=REMINDER_STATUSES)
+         .order_by("lease__renter_id", "due_date", "id")),
+        ("open invoices by due date", Invoice,
+         Invoice.objects.filter(status__in=OPEN_STATUSES, due_date__lt=today).order_by("due_date")[:50]),
+        ("payment allocation", Invoice,
+         Invoice.objects.filter(lease_id__in=[lease_id], status__in=ALLOCATABLE_STATUSES)
+         .exclude(invoice_type__in=LEASE_PAYMENT_EXCLUDED_TYPES).order_by("id")),
+        ("monthly invoice export", Invoice, Invoice.objects.filter(invoice_month=month)),
+        ("invoices in period", Invoice,
+         Invoice.objects.filter(invoice_date__range=(month, today))),
+        ("payments in period", Payment,
+         Payment.objects.filter(payment_date__range=(month, today))),
+        ("active lease of unit", Lease, Lease.objects.filter(status="active", unit_id=unit_id)),
+        ("latest notifications", Notification, Notification.objects.order_by("-sent_at")[:10]),
+        ("recent task runs", TaskLog,
+         TaskLog.objects.filter(executed_at__gte=timezone.now() - timedelta(days=7), status="FAILURE")),
+        ("vacant units", Unit, Unit.objects.filter(status="vacant")),
+        ("expenses in month", Expense, Expense.objects.filter(date__range=(month, today))),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the hot filter paths (open/overdue invoices, allocation, monthly export, "
+        "payments by date, active lease per unit, notifications, task logs, vacant units) and "
+        "fail if any of them reads its table with a sequential scan. With --seed N a large "
+        "synthetic dataset (N invoices, proportional payments, notifications, ...) is inserted "
+        "and analyzed first, inside a transaction that is rolled back. Supports PostgreSQL and SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0, help="Insert N synthetic invoices (plus related rows) first.")
+        parser.add_argument("--verbose-plans", action="store_true", help="Print every plan, not only failures.")
+
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"Plan checks support PostgreSQL and SQLite, not {connection.vendor}.")
+
+        failures = []
+        with transaction.atomic():
+            if options["seed"]:
+                started = time.perf_counter()
+                self._seed(options["seed"])
+                self.stdout.write(f"Seeded {options['seed']} invoices in {time.perf_counter() - started:.1f}s.")
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+            for label, model, queryset in _hot_queries():
+                plan = queryset.explain()
+                full_scan = re.search(pattern.format(table=re.escape(model._meta.db_table)), plan)
+                if full_scan:
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f"SEQ SCAN  {label}\n{plan}"))
+                else:
+                    self.stdout.write(f"ok        {label}")
+                    if options["verbose_plans"]:
+                        self.stdout.write(plan)
+            # Never keep the synthetic rows
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"{len(failures)} hot path(s) scan their whole table: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("Query plan check OK: every hot path uses an index."))
+
+    # -----------------------------
+    # Synthetic dataset
+    # -----------------------------
+    def _seed(self, invoices):
+        """
+        Production-shaped rows without model signals: most invoices settled, a small open
+        slice, dates spread over SEED_MONTHS months, few vacant units.
+        """
+        units = max(invoices // 100, 20)
+        today = date.today()
+        months = [today.replace(day=1)]
+        while len(months) < SEED_MONTHS:
+            months.append((months[-1] - timedelta(days=1)).replace(day=1))
+        months.reverse()
+
+        floor = Floor.objects.create(name=f"plan-check-{timezone.now():%Y%m%d%H%M%S%f}", number=-1)
+        unit_rows = Unit.objects.bulk_create([
+            Unit(floor=floor, name=f"PC{i}", unit_type="residential",
+                 status="vacant" if i % 20 == 0 else "maintenance" if i % 50 == 1 else "occupied",
+                 monthly_rent=Decimal("1000.00"))
+            for i in range(units)
+        ])
+        users = User.objects.bulk_create([
+            User(username=f"plan-check-{floor.pk}-{i}", email=f"plan-check-{floor.pk}-{i}@example.invalid")
+            for i in range(units)
+        ])
+        renters = Renter.objects.bulk_create([
+            Renter(user=user, full_name=f"Plan Check {i}", phone_number=f"pc{floor.pk}-{i}",
+                   present_address="-", permanent_address="-", notification_preference="none")
+            for i, user in enumerate(users)
+        ])
+        leases = Lease.objects.bulk_create([
+            Lease(renter=renter, unit=unit, start_date=months[0], rent_amount=Decimal("1000.00"),
+                  status="active" if i % 10 else "completed")
+            for i, (renter, unit) in enumerate(zip(renters, unit_rows))
+        ])
+
+        invoice_rows = []
+        for i in range(invoices):
+            lease, slot = leases[i % units], i // units
+            # Rent for (lease, month) while months last, then one-off charges
+            is_rent = slot < SEED_MONTHS
+            month = months[slot % SEED_MONTHS]
+            bucket = i % 100
+            status = "paid" if bucket < 85 else "unpaid" if bucket < 92 else "partially_paid" if bucket < 95 else "cancelled"
+            invoice_rows.append(Invoice(
+                lease=lease, invoice_type="rent" if is_rent else "other", amount=Decimal("1000.00"),
+                paid_amount=Decimal("1000.00") if status == "paid" else Decimal("0.00"),
+                due_date=month + timedelta(days=9), invoice_month=month if is_rent else None, status=status,
+            ))
+        invoice_ids = [row.pk for row in Invoice.objects.bulk_create(invoice_rows, batch_size=2000)]
+        self._spread(Invoice, "invoice_date", invoice_ids, months)
+
+        payment_ids = [row.pk for row in Payment.objects.bulk_create([
+            Payment(lease=leases[i % units], amount=Decimal("1000.00")) for i in range(invoices)
+        ], batch_size=2000)]
+        self._spread(Payment, "payment_date", payment_ids, months)
+
+        started = timezone.now() - timedelta(days=30 * SEED_MONTHS)
+        Notification.objects.bulk_create([
+            Notification(notification_type="invoice_created", channel="email", recipient="plan-check@example.invalid",
+                         message="-", status="sent", sent_at=started + timedelta(minutes=i * 30))
+            for i in range(invoices)
+        ], batch_size=2000)
+        task_ids = [row.pk for row in TaskLog.objects.bulk_create([
+            TaskLog(task_name="GENERATE_INVOICES", status="FAILURE" if i % 25 == 0 else "SUCCESS")
+            for i in range(max(invoices // 10, 1))
+        ], batch_size=2000)]
+        self._spread(TaskLog, "executed_at", task_ids, [
+            timezone.now() - timedelta(days=SEED_MONTHS * 30 - day) for day in range(0, SEED_MONTHS * 30, 10)
+        ])
+        Expense.objects.bulk_create([
+            Expense(title=f"Plan check {i}", amount=Decimal("50.00"), date=months[i % SEED_MONTHS] + timedelta(days=i % 28))
+            for i in range(max(invoices // 10, 1))
+        ], batch_size=2000)
+
+    @staticmethod
+    def _spread(model, field, ids, values):
+        """Overwrite an auto_now_add column: contiguous id blocks get successive ``values``."""
+        ids = sorted(ids)
+        size = -(-len(ids) // len(values))
+        for n, value in enumerate(values):
+            block = ids[n * size:(n + 1) * size]
+            if block:
+                model.objects.filter(pk__range=(block[0], block[-1])).update(**{field: value})
@@ -0,0 +1,33 @@
+from django.core.cache import cache
+
+METRICS_PREFIX = "metrics"
+
+
+def _key(name):
+    return f"{METRICS_PREFIX}:{name}"
+
+
+def incr_counter(name, delta=1):
+    """
+    Increment a named counter in the shared cache, so hits from every
+    web/worker process add up when a shared (Redis) cache is configured.
+    """
+    key = _key(name)
+    if cache.add(key, delta, timeout=None):
+        return delta
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, delta, timeout=None)
+        return delta
+
+
+def get_counters(*names):
+    """Return {name: value} for the given counters (missing ones read as 0)."""
+    values = cache.get_many([_key(n) for n in names])
+    return {n: values.get(_key(n), 0) for n in names}
+
+
+def reset_counters(*names):
+    cache.delete_many([_key(n) for n in names])
@@ -1,5 +1,9 @@
 import logging
+
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response
 
 logger = logging.getLogger(__name__)
@@ -29,3 +33,103 @@ class SaveUserMixin:
             instance.delete()
             logger.warning(f"[DELETE] {self.request.user} deleted {instance}")
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class FieldSelectionMixin:
+    """
+    Sparse responses for read endpoints:
+    - ?fields=id,status,... returns only those serializer fields (list/retrieve)
+    - ?compact=1 serves lists with ``list_serializer_class`` (table columns)
+
+    The queryset follows the selection. ``field_plan`` maps a response field
+    to what it needs: {"related": [...], "prefetch": [...], "only": [...]};
+    plain model columns need no entry. Relations and prefetches of fields that
+    are not returned are skipped and sparse reads load only the needed columns.
+    """
+    list_serializer_class = None
+    field_plan = {}
+    fields_query_param = "fields"
+    compact_query_param = "compact"
+
+    def is_compact(self):
+        request = getattr(self, "request", None)
+        return (
+            request is not None
+            and getattr(self, "action", None) == "list"
+            and self.list_serializer_class is not None
+            and request.query_params.get(self.compact_query_param) in ("1", "true", "yes")
+        )
+
+    def get_serializer_class(self):
+        if self.is_compact():
+            return self.list_serializer_class
+        return super().get_serializer_class()
+
+    def _serializer_field_names(self):
+        if not hasattr(self, "_field_names"):
+            self._field_names = list(self.get_serializer_class()().fields)
+        return self._field_names
+
+    def selected_fields(self):
+        """Field names requested with ?fields= (None = every field)."""
+        if not hasattr(self, "_selected_fields"):
+            self._selected_fields = None
+            raw = self.request.query_params.get(self.fields_query_param)
+            if raw and self.request.method in SAFE_METHODS:
+                names = [name.strip() for name in raw.split(",") if name.strip()]
+                unknown = sorted(set(names) - set(self._serializer_field_names()))
+                if unknown:
+                    raise ValidationError({self.fields_query_param: f"Unknown field(s): {', '.join(unknown)}"})
+                self._selected_fields = set(names)
+        return self._selected_fields
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.selected_fields()
+        if fields:
+            target = getattr(serializer, "child", serializer)
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        return self.plan_queryset(super().filter_queryset(queryset))
+
+    def plan_queryset(self, queryset):
+        opts = queryset.model._meta
+        selected = self.selected_fields()
+        sparse = self.request.method in SAFE_METHODS and (selected is not None or self.is_compact())
+
+        # Foreign keys are cheap and used by access checks; ordering columns by keyset cursors
+        columns = {f.attname for f in opts.concrete_fields if f.primary_key or f.is_relation}
+        for item in queryset.query.order_by or opts.ordering:
+            if isinstance(item, str) and "__" not in item.lstrip("-"):
+                columns.add(item.lstrip("-"))
+        related, prefetches = set(), {}
+
+        for name in selected or self._serializer_field_names():
+            plan = self.field_plan.get(name)
+            if plan is not None:
+                related.update(plan.get("related", ()))
+                columns.update(plan.get("only", ()))
+                for lookup in plan.get("prefetch", ()):
+                    prefetches[getattr(lookup, "prefetch_to", lookup)] = lookup
+                continue
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                sparse = False  # computed field without a plan: load whole rows
+                continue
+            if field.concrete:
+                columns.add(field.attname)
+            else:
+                sparse = False
+
+        if sparse:
+            queryset = queryset.select_related(None).only(*columns)
+        if related:
+            queryset = queryset.select_related(*related)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches.values())
+        return queryset
@@ -1,5 +1,13 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
@@ -17,3 +25,135 @@ class CustomPagination(PageNumberPagination):
             "previous": self.get_previous_link(),
             "results": data,
         })
+
+
+class KeysetPagination(CustomPagination):
+    """
+    CustomPagination plus an opt-in keyset (cursor) mode for tables that grow
+    without bound.
+
+    Without ``?cursor`` nothing changes (page numbers, exact count). Passing
+    ``?cursor=`` (empty for the first page) switches to keyset mode: rows are
+    read with ``WHERE (ordering, id) > (last row)`` instead of an OFFSET, the
+    ordering is made stable by appending the primary key, ``next``/``previous``
+    carry opaque cursors and no COUNT(*) is run unless ``?with_count=1``
+    (``count``, ``total_pages`` and ``current_page`` are null otherwise).
+
+    Keyset mode needs the ordering to be plain non-nullable columns of the
+    model; any other ordering is served page-number style.
+    """
+    cursor_query_param = "cursor"
+    count_query_param = "with_count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = False
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+
+        ordering = self._keyset_ordering(queryset)
+        if ordering is None:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.cursor_mode = True
+        self.request = request
+        self.ordering = ordering
+        self.page_size = self.get_page_size(request)
+        self.base_queryset = queryset
+        position, reverse = self._decode_cursor(request.query_params.get(self.cursor_query_param))
+
+        # Reading backwards (a "previous" cursor) flips every direction
+        page_qs = queryset.order_by(*[f"-{field}" if desc != reverse else field for field, desc in ordering])
+        if position is not None:
+            page_qs = page_qs.filter(self._after(position, reverse))
+
+        # One extra row tells whether there is another page in the reading direction
+        rows = list(page_qs[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.rows = rows
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = (position is not None) if not reverse else has_more
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+
+        count = total_pages = None
+        if self.request.query_params.get(self.count_query_param) in ("1", "true", "yes"):
+            count = self.base_queryset.order_by().count()
+            total_pages = -(-count // self.page_size) if count else 1
+        return Response({
+            "status": "success",
+            "count": count,
+            "total_pages": total_pages,
+            "current_page": None,
+            "next": self._cursor_link(self.rows[-1], reverse=False) if self.has_next and self.rows else None,
+            "previous": self._cursor_link(self.rows[0], reverse=True) if self.has_previous and self.rows else None,
+            "results": data,
+        })
+
+    # -----------------------------
+    # Keyset helpers
+    # -----------------------------
+    def _keyset_ordering(self, queryset):
+        """[(column, descending), ...] ending with the primary key, or None if keysets cannot be used."""
+        opts = queryset.model._meta
+        order_by = list(queryset.query.order_by) or list(opts.ordering)
+        ordering = []
+        for item in order_by:
+            if not isinstance(item, str):
+                return None
+            desc = item.startswith("-")
+            name = item.lstrip("-")
+            if name == "pk":
+                name = opts.pk.name
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not getattr(field, "concrete", False) or field.null:
+                return None
+            ordering.append((field.attname, desc))
+            if field.primary_key:
+                # Rows are unique from here on; later columns never break ties
+                return ordering
+        ordering.append((opts.pk.attname, ordering[0][1] if ordering else False))
+        return ordering
+
+    def _after(self, position, reverse):
+        """Q for rows strictly after ``position`` in the (possibly reversed) ordering."""
+        condition, equal = Q(), Q()
+        for (field, desc), value in zip(self.ordering, position):
+            lookup = "lt" if desc != reverse else "gt"
+            condition |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def _decode_cursor(self, raw):
+        if not raw:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(raw.encode("ascii")).decode("utf-8"))
+            values, reverse = payload["v"], bool(payload.get("r"))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            opts = self.base_queryset.model._meta
+            position = [
+                opts.get_field(field).to_python(value)
+                for (field, _), value in zip(self.ordering, values)
+            ]
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def _cursor_link(self, row, reverse):
+        values = [str(getattr(row, field)) for field, _ in self.ordering]
+        payload = {"v": values, "r": 1} if reverse else {"v": values}
+        cursor = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii")
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
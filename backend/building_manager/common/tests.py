@@ -1,3 +1,19 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+# Large enough for the planner to prefer the indexes over reading small tables
+QUERY_PLAN_SEED = 50000
+
+
+@skipUnless(connection.vendor == "postgresql", "plans are only representative on PostgreSQL")
+class QueryPlanTests(TestCase):
+    def test_hot_paths_use_indexes(self):
+        out = StringIO()
+        try:
+            call_command("check_query_plans", seed=QUERY_PLAN_SEED, stdout=out)
+        except CommandError as e:
+            self.fail(f"{e}\n{out.getvalue()}")
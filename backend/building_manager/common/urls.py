@@ -5,6 +5,8 @@ from drf_spectacular.views import (
     SpectacularRedocView,
 )
 
+from .views import PerfStatsView
+
 urlpatterns = [
     # OpenAPI schema
     path('schema/', SpectacularAPIView.as_view(), name='schema'),
@@ -12,4 +14,6 @@ urlpatterns = [
     path('docs/swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     # ReDoc UI
     path('docs/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc-ui'),
+    # Per-route latency / query counts (staff only)
+    path('perf/', PerfStatsView.as_view(), name='perf-stats'),
 ]
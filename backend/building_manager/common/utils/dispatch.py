@@ -0,0 +1,21 @@
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def dispatch(signature):
+    """
+    Send a signature to the broker. If the broker is unreachable the error is
+    logged and re-raised; only with DEBUG or CELERY_INLINE_FALLBACK (local dev
+    without Redis) does the work run inline instead.
+    """
+    try:
+        return signature.apply_async()
+    except Exception as exc:
+        if not (settings.DEBUG or settings.CELERY_INLINE_FALLBACK):
+            logger.exception(f"Broker unavailable; could not queue {signature!r}.")
+            raise
+        logger.warning(f"Broker unavailable ({exc}); running {signature!r} inline.")
+        return signature.apply()
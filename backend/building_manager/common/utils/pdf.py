@@ -0,0 +1,157 @@
+"""
+Incremental PDF concatenation for documents written by ReportLab (classic
+xref table, no object streams, no incremental updates).
+
+Each input document is parsed on its own, its objects are renumbered and
+written out straight away; its page tree is hung under one shared root
+Pages node. Only the byte offset of every written object (for the final
+xref table) and one page-tree reference per document are kept until the
+end, so memory does not grow with the size of the output.
+"""
+import re
+from array import array
+
+_STARTXREF = re.compile(rb"startxref\s+(\d+)\s+%%EOF\s*$")
+_SUBSECTION = re.compile(rb"(\d+)\s+(\d+)\s*\r?\n")
+_XREF_ENTRY = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+_OBJ_HEADER = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj\b")
+_STREAM_START = re.compile(rb">>\s*stream(?:\r\n|\n)")
+_REFERENCE = re.compile(rb"(\d+)\s+(\d+)\s+R\b")
+_LENGTH = re.compile(rb"/Length\s+(\d+)(?:\s+(\d+)\s+R)?")
+_ROOT_REF = re.compile(rb"/Root\s+(\d+)\s+\d+\s+R")
+_PAGES_REF = re.compile(rb"/Pages\s+(\d+)\s+\d+\s+R")
+_COUNT = re.compile(rb"/Count\s+(\d+)")
+
+# Root catalog and page tree of the merged document; inputs are numbered after them
+CATALOG_NUM, PAGES_NUM = 1, 2
+XREF_BATCH = 1000
+
+
+class PDFMergeError(ValueError):
+    """The input is not a PDF this module can merge."""
+
+
+def _xref_offsets(data):
+    """{object number: byte offset} from the document's xref table."""
+    match = _STARTXREF.search(data[-1024:])
+    if not match:
+        raise PDFMergeError("startxref not found")
+    position = int(match.group(1))
+    if data[position:position + 4] != b"xref":
+        raise PDFMergeError("cross-reference streams are not supported")
+    position += 4
+    while data[position:position + 1] in (b"\r", b"\n", b" "):
+        position += 1
+
+    offsets = {}
+    while True:
+        section = _SUBSECTION.match(data, position)
+        if not section:
+            break
+        first, count = int(section.group(1)), int(section.group(2))
+        position = section.end()
+        for number in range(first, first + count):
+            entry = _XREF_ENTRY.match(data, position)
+            if not entry:
+                raise PDFMergeError("malformed xref entry")
+            if entry.group(3) == b"n":
+                offsets[number] = int(entry.group(1))
+            position += 20
+
+    trailer = data[position:data.find(b"startxref", position)]
+    if b"/Prev" in trailer:
+        raise PDFMergeError("incrementally updated documents are not supported")
+    root = _ROOT_REF.search(trailer)
+    if not root:
+        raise PDFMergeError("trailer has no /Root")
+    return offsets, int(root.group(1))
+
+
+def _read_object(data, offset, offsets):
+    """(dictionary or value bytes, raw stream bytes or None) of the object at ``offset``."""
+    header = _OBJ_HEADER.match(data, offset)
+    if not header:
+        raise PDFMergeError(f"no object at offset {offset}")
+    start = header.end()
+    end = data.find(b"endobj", start)
+    if end < 0:
+        raise PDFMergeError("unterminated object")
+
+    stream = _STREAM_START.search(data, start, end)
+    if not stream:
+        return data[start:end].strip(), None
+
+    head = data[start:stream.start() + 2].strip()
+    length = _LENGTH.search(head)
+    if not length:
+        raise PDFMergeError("stream without /Length")
+    size = int(length.group(1))
+    if length.group(2) is not None:
+        # Indirect /Length: the length is the value of another object
+        size = int(_read_object(data, offsets[size], offsets)[0])
+    return head, data[stream.end():stream.end() + size]
+
+
+def _renumber(body, shift):
+    return _REFERENCE.sub(lambda m: b"%d %s R" % (int(m.group(1)) + shift, m.group(2)), body)
+
+
+def stream_pdf_concat(documents):
+    """
+    Yield one PDF containing every page of ``documents`` (an iterable of PDF
+    bytes) in order. Each document is written as soon as it is read, so
+    only one input is held in memory at a time.
+    """
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    yield header
+    position = len(header)
+    # offsets[n] = byte offset of object n; 0 is the free head, 1/2 are written last
+    offsets = array("Q", [0, 0, 0])
+    kids, pages = [], 0
+
+    for data in documents:
+        source, root_num = _xref_offsets(data)
+        catalog, _ = _read_object(data, source[root_num], source)
+        pages_ref = _PAGES_REF.search(catalog)
+        if not pages_ref:
+            raise PDFMergeError("catalog has no /Pages")
+        tree_num = int(pages_ref.group(1))
+
+        shift = len(offsets) - 1
+        chunks = []
+        for number in range(1, max(source) + 1):
+            offsets.append(position)
+            if number not in source or number == root_num:
+                # Keep numbering dense; the input's own catalog is replaced by ours
+                body, stream = b"null", None
+            else:
+                body, stream = _read_object(data, source[number], source)
+                body = _renumber(body, shift)
+                if number == tree_num:
+                    body = body.replace(b"<<", b"<< /Parent %d 0 R" % PAGES_NUM, 1)
+                    pages += int(_COUNT.search(body).group(1))
+            chunk = b"%d 0 obj\n%s\n" % (number + shift, body)
+            if stream is not None:
+                chunk += b"stream\n" + stream + b"\nendstream\n"
+            chunk += b"endobj\n"
+            chunks.append(chunk)
+            position += len(chunk)
+        kids.append(b"%d 0 R" % (tree_num + shift))
+        yield b"".join(chunks)
+
+    tail = []
+    for number, body in (
+        (PAGES_NUM, b"<< /Type /Pages /Kids [ %s ] /Count %d >>" % (b" ".join(kids), pages)),
+        (CATALOG_NUM, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES_NUM),
+    ):
+        offsets[number] = position
+        chunk = b"%d 0 obj\n%s\nendobj\n" % (number, body)
+        tail.append(chunk)
+        position += len(chunk)
+    yield b"".join(tail)
+
+    xref_at = position
+    yield b"xref\n0 %d\n0000000000 65535 f \n" % len(offsets)
+    for first in range(1, len(offsets), XREF_BATCH):
+        yield b"".join(b"%010d 00000 n \n" % offset for offset in offsets[first:first + XREF_BATCH])
+    yield b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets), CATALOG_NUM, xref_at)
@@ -0,0 +1,65 @@
+import zipfile
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class _StreamBuffer:
+    """
+    Write-only, non-seekable sink for zipfile. zipfile falls back to data
+    descriptors when it cannot seek, so entries can be flushed to the client
+    as soon as they are written.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def file_chunks(path, chunk_size=STREAM_CHUNK_SIZE):
+    """Read a file lazily in ``chunk_size`` blocks."""
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def stream_zip(entries, compression=zipfile.ZIP_DEFLATED):
+    """
+    Build a ZIP archive on the fly.
+
+    ``entries`` is an iterable of ``(arcname, chunks)`` where ``chunks`` is an
+    iterable of bytes. Yields the archive piece by piece, so only the chunk
+    being compressed is held in memory (use with StreamingHttpResponse).
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=compression) as archive:
+        for arcname, chunks in entries:
+            with archive.open(arcname, mode="w", force_zip64=True) as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    # Central directory
+    yield buffer.drain()
@@ -1,3 +1,23 @@
-from django.shortcuts import render
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from .logging import route_stats
+
+
+@extend_schema(tags=["Common"])
+class PerfStatsView(APIView):
+    """
+    Per-route latency and query counts collected by APILoggingMiddleware
+    (this worker process only). DELETE clears the samples.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response({"status": "success", "results": route_stats.snapshot()}, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        route_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
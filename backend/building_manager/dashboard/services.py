@@ -1,14 +1,24 @@
 # dashboard/services.py
+from collections import defaultdict
 from datetime import date
 from decimal import Decimal
 
-from django.db.models import F, Sum, Value, Case, When, DecimalField, ExpressionWrapper, DurationField
-from django.db.models.functions import Coalesce, Now
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum, Value, DecimalField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from invoices.models import Invoice
 from payments.models import Payment
 from leases.models import Lease
 from buildings.models import Unit
+from reports.services.aging_service import aging_buckets
+
+SNAPSHOT_KEY = "dashboard:snapshot"
+DIRTY_KEY = "dashboard:dirty:{}"
+REFRESH_SCHEDULED_KEY = "dashboard:refresh-scheduled"
 
 
 def _to_decimal_str(x):
@@ -17,26 +27,37 @@ def _to_decimal_str(x):
     return f"{Decimal(x):.2f}"
 
 
-def get_dashboard_data():
-    today = date.today()
-    first_day_of_month = today.replace(day=1)
+# -----------------------------
+# Snapshot parts
+# -----------------------------
+# The dashboard is stored as independent parts so a write only recomputes the
+# parts it can affect (see PARTS_BY_MODEL / dashboard.signals).
 
-    # SUMMARY KPIS
+def _income_part(today):
     total_income_q = Payment.objects.aggregate(total=Coalesce(Sum("amount"), Value(Decimal("0.00"))))
-    total_income = total_income_q["total"]
+    return {"total_income": _to_decimal_str(total_income_q["total"])}
+
 
+def _dues_part(today):
     # total due = sum(amount - paid_amount) for all invoices where amount > paid_amount
     invoices_with_balance = Invoice.objects.annotate(
         balance=F("amount") - F("paid_amount")
     ).filter(balance__gt=0)
 
     total_due_agg = invoices_with_balance.aggregate(total=Coalesce(Sum("balance", output_field=DecimalField()), Value(Decimal("0.00"))))
-    total_due = total_due_agg["total"]
+    return {
+        "total_due": _to_decimal_str(total_due_agg["total"]),
+        "total_invoices": Invoice.objects.count(),
+    }
+
+
+def _renters_part(today):
+    return {"active_renters": Lease.objects.filter(status="active").values("renter").distinct().count()}
 
-    active_renters = Lease.objects.filter(status="active").values("renter").distinct().count()
-    total_invoices = Invoice.objects.count()
 
+def _collection_part(today):
     # RENT COLLECTION PROGRESS FOR CURRENT MONTH
+    first_day_of_month = today.replace(day=1)
     monthly_billed = Invoice.objects.filter(invoice_date__gte=first_day_of_month).aggregate(
         total=Coalesce(Sum("amount"), Value(Decimal("0.00")))
     )["total"]
@@ -51,6 +72,14 @@ def get_dashboard_data():
     except Exception:
         progress_percent = 0
 
+    return {
+        "billed": _to_decimal_str(monthly_billed),
+        "collected": _to_decimal_str(monthly_collected),
+        "progress_percent": float(round(progress_percent, 2)),
+    }
+
+
+def _recent_payments_part(today):
     # RECENT PAYMENTS (last 10)
     recent_payments_qs = Payment.objects.select_related("invoice", "lease__renter", "lease__unit") \
         .order_by("-payment_date", "-id")[:10]
@@ -68,9 +97,12 @@ def get_dashboard_data():
             "invoice_id": p.invoice_id,
             "method": p.method,
         })
+    return recent_payments
+
 
+def _top_due_part(today):
     # TOP DUE RENTERS (by total outstanding)
-    top_due = (
+    top_due = list(
         Invoice.objects
         .values("lease__renter__id", "lease__renter__full_name")
         .annotate(total_due=Coalesce(Sum(F("amount") - F("paid_amount"), output_field=DecimalField()), Value(Decimal("0.00"))))
@@ -78,79 +110,137 @@ def get_dashboard_data():
         .order_by("-total_due")[:10]
     )
 
-    top_due_list = []
-    for row in top_due:
-        renter_id = row["lease__renter__id"]
-        renter_name = row["lease__renter__full_name"]
-        total_due_val = row["total_due"] or Decimal("0.00")
-        # gather units for this renter (distinct)
-        units = list(
-            Lease.objects.filter(renter_id=renter_id).select_related("unit")
-            .values_list("unit__name", flat=True).distinct()
-        )
-        top_due_list.append({
-            "renter_id": renter_id,
-            "renter_name": renter_name,
-            "units": units,
-            "total_due": _to_decimal_str(total_due_val),
-        })
-
-    # AGING BUCKETS for unpaid/partially_paid invoices
-    # compute balance per invoice and bucket by days overdue
-    # aging_qs = Invoice.objects.filter(status__in=["unpaid", "partially_paid"]).annotate(
-    #     age_days=ExpressionWrapper(Now() - F("invoice_date"), output_field=DurationField())
-    # )
-
-    # def _sum_case(condition):
-    #     return Sum(
-    #         Case(
-    #             When(condition, then=F("amount") - F("paid_amount")),
-    #             default=Value(Decimal("0.00")),
-    #             output_field=DecimalField(),
-    #         )
-    #     )
-
-    # aggregate using timedelta in days
-    # aging = aging_qs.aggregate(
-    #     days_0_30=_sum_case(When(age_days__lte=30 * 86400)),
-    #     days_31_60=_sum_case(When(age_days__gt=30 * 86400, age_days__lte=60 * 86400)),
-    #     days_61_90=_sum_case(When(age_days__gt=60 * 86400, age_days__lte=90 * 86400)),
-    #     days_90_plus=_sum_case(When(age_days__gt=90 * 86400)),
-    # )
-
-    # OCCUPANCY
+    # units of all listed renters in one query (distinct per renter)
+    units_by_renter = defaultdict(list)
+    for renter_id, unit_name in (
+            Lease.objects.filter(renter_id__in=[row["lease__renter__id"] for row in top_due])
+            .order_by("renter_id", "unit__name")
+            .values_list("renter_id", "unit__name")
+            .distinct()
+    ):
+        units_by_renter[renter_id].append(unit_name)
+
+    return [
+        {
+            "renter_id": row["lease__renter__id"],
+            "renter_name": row["lease__renter__full_name"],
+            "units": units_by_renter[row["lease__renter__id"]],
+            "total_due": _to_decimal_str(row["total_due"] or Decimal("0.00")),
+        }
+        for row in top_due
+    ]
+
+
+def _aging_part(today):
+    # AGING BUCKETS for unpaid/partially_paid invoices (days past due, one query)
+    return {key: _to_decimal_str(value) for key, value in aging_buckets(today).items() if key != "total"}
+
+
+def _occupancy_part(today):
     total_units = Unit.objects.count()
     occupied_units = Lease.objects.filter(status="active").values("unit").distinct().count()
     vacant_units = max(total_units - occupied_units, 0)
     occupancy_percent = round((occupied_units / total_units * 100) if total_units else 0, 2)
+    return {
+        "total_units": total_units,
+        "occupied_units": occupied_units,
+        "vacant_units": vacant_units,
+        "occupancy_percent": occupancy_percent,
+    }
+
 
-    # build final payload (convert decimals to strings)
-    data = {
+PARTS = {
+    "income": _income_part,
+    "dues": _dues_part,
+    "renters": _renters_part,
+    "collection": _collection_part,
+    "recent_payments": _recent_payments_part,
+    "top_due": _top_due_part,
+    "aging": _aging_part,
+    "occupancy": _occupancy_part,
+}
+
+# Which parts a write to each model can change
+PARTS_BY_MODEL = {
+    "payment": ("income", "collection", "recent_payments"),
+    "invoice": ("dues", "collection", "top_due", "aging"),
+    "lease": ("renters", "top_due", "occupancy"),
+    "unit": ("occupancy",),
+}
+
+
+def _assemble(snapshot):
+    parts = snapshot["parts"]
+    return {
         "summary": {
-            "total_income": _to_decimal_str(total_income),
-            "total_due": _to_decimal_str(total_due),
-            "active_renters": active_renters,
-            "total_invoices": total_invoices,
-        },
-        "rent_collection": {
-            "billed": _to_decimal_str(monthly_billed),
-            "collected": _to_decimal_str(monthly_collected),
-            "progress_percent": round(progress_percent, 2),
-        },
-        "recent_payments": recent_payments,
-        "top_due_renters": top_due_list,
-        # "aging": {
-        #     "days_0_30": _to_decimal_str(aging.get("days_0_30")),
-        #     "days_31_60": _to_decimal_str(aging.get("days_31_60")),
-        #     "days_61_90": _to_decimal_str(aging.get("days_61_90")),
-        #     "days_90_plus": _to_decimal_str(aging.get("days_90_plus")),
-        # },
-        "occupancy": {
-            "total_units": total_units,
-            "occupied_units": occupied_units,
-            "vacant_units": vacant_units,
-            "occupancy_percent": occupancy_percent,
+            **parts["income"],
+            "total_due": parts["dues"]["total_due"],
+            **parts["renters"],
+            "total_invoices": parts["dues"]["total_invoices"],
         },
+        "rent_collection": parts["collection"],
+        "recent_payments": parts["recent_payments"],
+        "top_due_renters": parts["top_due"],
+        "aging": parts["aging"],
+        "occupancy": parts["occupancy"],
+        "generated_at": snapshot["generated_at"],
+    }
+
+
+def _build_snapshot(today):
+    return {
+        "date": today.isoformat(),
+        "generated_at": timezone.now().isoformat(),
+        "parts": {name: build(today) for name, build in PARTS.items()},
     }
 
-    return data
\ No newline at end of file
+
+# -----------------------------
+# Public API
+# -----------------------------
+def get_dashboard_data(fresh=False):
+    """
+    Dashboard payload from the cached snapshot (one cache read). The snapshot is
+    rebuilt when missing, from a previous day (month-to-date figures), or when
+    ``fresh`` is set; writes keep it current via refresh_dashboard_parts().
+    """
+    today = date.today()
+    snapshot = None if fresh else cache.get(SNAPSHOT_KEY)
+    if snapshot is None or snapshot["date"] != today.isoformat():
+        snapshot = _build_snapshot(today)
+        cache.set(SNAPSHOT_KEY, snapshot, settings.DASHBOARD_SNAPSHOT_TTL)
+    return _assemble(snapshot)
+
+
+def mark_dashboard_dirty(*parts):
+    """
+    Flag snapshot parts as stale once the current transaction commits and
+    schedule one (debounced) background refresh for all of them.
+    """
+    def _schedule():
+        cache.set_many({DIRTY_KEY.format(p): 1 for p in parts}, settings.DASHBOARD_SNAPSHOT_TTL)
+        if cache.add(REFRESH_SCHEDULED_KEY, 1, settings.DASHBOARD_REFRESH_DELAY + 30):
+            from common.utils.dispatch import dispatch
+            from dashboard.tasks import refresh_dashboard_snapshot
+            dispatch(refresh_dashboard_snapshot.si().set(countdown=settings.DASHBOARD_REFRESH_DELAY))
+
+    transaction.on_commit(_schedule)
+
+
+def refresh_dashboard_parts():
+    """Recompute only the parts flagged dirty and write them back into the snapshot."""
+    cache.delete(REFRESH_SCHEDULED_KEY)
+    dirty = [name for name in PARTS if cache.delete(DIRTY_KEY.format(name))]
+    if not dirty:
+        return []
+
+    today = date.today()
+    snapshot = cache.get(SNAPSHOT_KEY)
+    if snapshot is None or snapshot["date"] != today.isoformat():
+        # Nothing to patch; the next read builds a complete snapshot
+        return dirty
+
+    snapshot["parts"].update({name: PARTS[name](today) for name in dirty})
+    snapshot["generated_at"] = timezone.now().isoformat()
+    cache.set(SNAPSHOT_KEY, snapshot, settings.DASHBOARD_SNAPSHOT_TTL)
+    return dirty
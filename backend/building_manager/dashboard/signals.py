@@ -0,0 +1,30 @@
+# dashboard/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from buildings.models import Unit
+from dashboard.services import PARTS_BY_MODEL, mark_dashboard_dirty
+from invoices.models import Invoice
+from leases.models import Lease
+from payments.models import Payment
+
+# Saves that only touch these fields never change a dashboard figure
+IGNORED_UPDATE_FIELDS = {"invoice_number", "invoice_pdf", "pdf_fingerprint", "updated_at"}
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=Lease)
+@receiver(post_save, sender=Unit)
+def dashboard_model_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= IGNORED_UPDATE_FIELDS:
+        return
+    mark_dashboard_dirty(*PARTS_BY_MODEL[sender._meta.model_name])
+
+
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=Lease)
+@receiver(post_delete, sender=Unit)
+def dashboard_model_deleted(sender, instance, **kwargs):
+    mark_dashboard_dirty(*PARTS_BY_MODEL[sender._meta.model_name])
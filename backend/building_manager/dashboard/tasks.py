@@ -0,0 +1,17 @@
+# dashboard/tasks.py
+import logging
+
+from celery import shared_task
+
+from dashboard.services import refresh_dashboard_parts
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="refresh_dashboard_snapshot")
+def refresh_dashboard_snapshot():
+    """Recompute the dashboard snapshot parts that writes have flagged dirty."""
+    refreshed = refresh_dashboard_parts()
+    if refreshed:
+        logger.info(f"Dashboard snapshot refreshed: {', '.join(refreshed)}")
+    return refreshed
@@ -16,8 +16,10 @@ class DashboardSummaryView(APIView):
     def get(self, request):
         """
         Returns dashboard summary data (KPIs, recent payments, top dues, aging, occupancy).
+        Served from the cached snapshot; pass ?fresh=1 to recompute it now.
         """
-        data = get_dashboard_data()
+        fresh = request.query_params.get("fresh") in ("1", "true", "True")
+        data = get_dashboard_data(fresh=fresh)
         return Response({
             "status": "success",
             "data": data
@@ -47,6 +47,12 @@ class Expense(BaseAuditModel):
         related_name="created_expenses"
     )
 
+    class Meta:
+        indexes = [
+            # Month filter and summary ranges (date BETWEEN ...)
+            models.Index(fields=["date"], name="expense_date_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         self.is_renter_related = bool(self.lease)
         super().save(*args, **kwargs)
@@ -50,4 +50,32 @@ class ExpenseSerializer(serializers.ModelSerializer):
         if "lease" in validated_data:
             validated_data["is_renter_related"] = bool(validated_data.get("lease"))
 
-        return super().update(instance, validated_data)
\ No newline at end of file
+        return super().update(instance, validated_data)
+
+
+class ExpenseMonthTotalSerializer(serializers.Serializer):
+    month = serializers.DateField()
+    total_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    expense_count = serializers.IntegerField()
+
+
+class ExpenseCategoryTotalSerializer(serializers.Serializer):
+    category = serializers.CharField()
+    total_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    expense_count = serializers.IntegerField()
+
+
+class ExpenseLeaseTotalSerializer(serializers.Serializer):
+    lease_id = serializers.IntegerField(allow_null=True)
+    renter_name = serializers.CharField(allow_null=True)
+    unit_name = serializers.CharField(allow_null=True)
+    total_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    expense_count = serializers.IntegerField()
+
+
+class ExpenseSummarySerializer(serializers.Serializer):
+    total_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    expense_count = serializers.IntegerField()
+    by_month = ExpenseMonthTotalSerializer(many=True)
+    by_category = ExpenseCategoryTotalSerializer(many=True)
+    by_lease = ExpenseLeaseTotalSerializer(many=True)
@@ -0,0 +1,92 @@
+# expenses/services.py
+"""
+Expense aggregates. Totals per month, per category and per lease all come
+from a single GROUP BY (month, category, lease) query and are folded into
+the three views in memory.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from expenses.models import Expense
+
+
+def month_range(value):
+    """
+    ``YYYY-MM`` (or ``YYYY``) as an inclusive (first, last) date range, or None
+    if malformed, so month filters become ``date BETWEEN`` and can use an index.
+    """
+    try:
+        parts = [int(part) for part in value.split("-")]
+        if len(parts) == 1 and len(value) == 4:
+            return date(parts[0], 1, 1), date(parts[0], 12, 31)
+        if len(parts) == 2 and len(value) == 7:
+            first = date(parts[0], parts[1], 1)
+            return first, first.replace(day=calendar.monthrange(first.year, first.month)[1])
+    except ValueError:
+        pass
+    return None
+
+
+def grouped_expense_totals(queryset):
+    """(month, category, lease_id, renter name, unit name, total, count) rows for ``queryset``."""
+    return (
+        queryset.annotate(month=TruncMonth("date"))
+        .values(
+            "month", "category", "lease_id",
+            renter_name=F("lease__renter__full_name"), unit_name=F("lease__unit__name"),
+        )
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+
+
+def monthly_expense_totals(start, end):
+    """{month start: total expense amount} for expenses dated in [start, end]."""
+    rows = (
+        Expense.objects.filter(date__range=(start, end))
+        .annotate(month=TruncMonth("date"))
+        .values("month")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    return {row["month"]: row["total"] or Decimal("0.00") for row in rows}
+
+
+def summarize_expenses(queryset):
+    """Totals by month, category and lease (shared-building expenses under lease None)."""
+    totals = {"total_amount": Decimal("0.00"), "expense_count": 0}
+    by_month = defaultdict(lambda: {"total_amount": Decimal("0.00"), "expense_count": 0})
+    by_category = defaultdict(lambda: {"total_amount": Decimal("0.00"), "expense_count": 0})
+    by_lease = {}
+
+    for row in grouped_expense_totals(queryset):
+        amount, count = row["total"] or Decimal("0.00"), row["count"]
+        totals["total_amount"] += amount
+        totals["expense_count"] += count
+        for bucket in (by_month[row["month"]], by_category[row["category"]]):
+            bucket["total_amount"] += amount
+            bucket["expense_count"] += count
+        lease = by_lease.setdefault(row["lease_id"], {
+            "lease_id": row["lease_id"],
+            "renter_name": row["renter_name"],
+            "unit_name": row["unit_name"],
+            "total_amount": Decimal("0.00"),
+            "expense_count": 0,
+        })
+        lease["total_amount"] += amount
+        lease["expense_count"] += count
+
+    return {
+        **totals,
+        "by_month": [{"month": month, **values} for month, values in sorted(by_month.items())],
+        "by_category": [
+            {"category": category, **values}
+            for category, values in sorted(by_category.items(), key=lambda item: item[1]["total_amount"], reverse=True)
+        ],
+        "by_lease": sorted(by_lease.values(), key=lambda row: row["total_amount"], reverse=True),
+    }
@@ -1,10 +1,13 @@
 from rest_framework import viewsets, permissions, filters
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django_filters import rest_framework as django_filters
 from drf_spectacular.utils import extend_schema
 
 from permissions.drf import RoleBasedPermission
 from .models import Expense
-from .serializers import ExpenseSerializer
+from .serializers import ExpenseSerializer, ExpenseSummarySerializer
+from .services import month_range, summarize_expenses
 from common.pagination import CustomPagination
 
 
@@ -22,7 +25,11 @@ class ExpenseFilter(django_filters.FilterSet):
         fields = ["category", "is_renter_related", "lease", "date"]
 
     def filter_by_month(self, queryset, name, value):
-        return queryset.filter(date__startswith=value)
+        # A date range instead of date__startswith, so the lookup can use an index on date
+        bounds = month_range(value)
+        if bounds is None:
+            return queryset.none()
+        return queryset.filter(date__range=bounds)
 
 
 @extend_schema(tags=["Expenses"])
@@ -53,4 +60,14 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         elif getattr(user, "is_renter", False):
             return super().get_queryset().filter(lease__renter__user=user)
 
-        return Expense.objects.none()
\ No newline at end of file
+        return Expense.objects.none()
+
+    @extend_schema(responses=ExpenseSummarySerializer)
+    @action(detail=False, methods=["get"], url_path="summary")
+    def summary(self, request):
+        """
+        Totals per month, per category and per lease in one grouped query.
+        The list filters apply (e.g. ?date_from=&date_to=, ?date_month=YYYY-MM, ?category=).
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(ExpenseSummarySerializer(summarize_expenses(queryset)).data)
@@ -0,0 +1,149 @@
+# invoices/billing.py
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import CharField, Exists, OuterRef, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+
+from dashboard.services import PARTS_BY_MODEL, mark_dashboard_dirty
+from invoices.models import Invoice
+from invoices.tasks import dispatch_invoice_pipelines, notify_invoice_created
+from leases.models import Lease
+from leases.services import adjust_outstanding_balances
+
+logger = logging.getLogger(__name__)
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _assign_invoice_numbers(invoice_ids):
+    """
+    Number freshly inserted invoices in one UPDATE.
+    Same format as Invoice.save(): INV-YYYYMMDD-<pk>.
+    """
+    prefix = f"INV-{timezone.now().strftime('%Y%m%d')}-"
+    Invoice.objects.filter(pk__in=invoice_ids, invoice_number__isnull=True).update(
+        invoice_number=Concat(Value(prefix), Cast("id", output_field=CharField()), output_field=CharField())
+    )
+
+
+def _insert_rent_invoices(rows, month_start, due_date, description):
+    invoices = Invoice.objects.bulk_create([
+        Invoice(
+            lease_id=lease_id,
+            invoice_type="rent",
+            amount=rent_amount,
+            due_date=due_date,
+            invoice_month=month_start,
+            status="unpaid",
+            description=description,
+        )
+        for lease_id, rent_amount in rows
+    ])
+    ids = [inv.pk for inv in invoices]
+    _assign_invoice_numbers(ids)
+    # bulk_create skips the ledger signal; each lease gets exactly one new unpaid invoice
+    adjust_outstanding_balances({lease_id: rent_amount for lease_id, rent_amount in rows})
+    return ids
+
+
+def create_missing_rent_invoices(month_start, due_date=None, description=None, batch_size=None):
+    """
+    Create the rent invoices that are still missing for ``month_start``.
+
+    Missing (lease, invoice_month) pairs are found with a single anti-join over
+    active leases, inserted with bulk_create in chunks of ``batch_size`` and
+    numbered in bulk. No per-invoice save() or post_save signal is involved.
+
+    Returns (created_ids, skipped_count).
+    """
+    batch_size = batch_size or settings.BILLING_BATCH_SIZE
+    due_date = due_date or month_start + timedelta(days=7)
+    description = description or f"Monthly rent for {month_start.strftime('%B %Y')}"
+
+    already_billed = Invoice.objects.filter(
+        lease=OuterRef("pk"),
+        invoice_type="rent",
+        invoice_month=month_start,
+    )
+    rows = list(
+        Lease.objects.filter(status="active")
+        .annotate(billed=Exists(already_billed))
+        .values_list("id", "rent_amount", "billed")
+    )
+    missing = [(lease_id, rent) for lease_id, rent, billed in rows if not billed]
+    skipped_count = len(rows) - len(missing)
+
+    created_ids = []
+    for chunk in _chunks(missing, batch_size):
+        try:
+            with transaction.atomic():
+                created_ids.extend(_insert_rent_invoices(chunk, month_start, due_date, description))
+        except IntegrityError:
+            # A concurrent run billed part of this chunk; retry with the leases that are still missing.
+            billed_now = set(
+                Invoice.objects.filter(
+                    lease_id__in=[lease_id for lease_id, _ in chunk],
+                    invoice_type="rent",
+                    invoice_month=month_start,
+                ).values_list("lease_id", flat=True)
+            )
+            leftovers = [row for row in chunk if row[0] not in billed_now]
+            skipped_count += len(chunk) - len(leftovers)
+            if leftovers:
+                with transaction.atomic():
+                    created_ids.extend(_insert_rent_invoices(leftovers, month_start, due_date, description))
+
+    logger.info(f"Billing {month_start:%Y-%m}: created {len(created_ids)}, skipped {skipped_count}.")
+    return created_ids, skipped_count
+
+
+def notify_created_invoices(invoice_ids, sent_by=None, task_log=None):
+    """
+    Hand new invoices to the render pipeline. Each invoice is rendered on the
+    render queue and its "invoice created" notification is sent right after
+    (see invoices.tasks). Dispatch happens once the inserts are committed.
+    Returns a list of per-invoice result messages.
+    """
+    invoice_ids = list(invoice_ids)
+    if not invoice_ids:
+        return []
+
+    transaction.on_commit(lambda: dispatch_invoice_pipelines(
+        invoice_ids,
+        notify_invoice_created,
+        sent_by_id=sent_by.pk if sent_by else None,
+        task_log_id=task_log.pk if task_log else None,
+    ))
+
+    rows = Invoice.objects.filter(pk__in=invoice_ids).order_by("id").values_list("lease_id", "invoice_number")
+    return [f"QUEUED: LS-{lease_id} (Inv: {invoice_number})" for lease_id, invoice_number in rows]
+
+
+def run_monthly_billing(month_start=None, executed_by=None, task_log=None):
+    """
+    Shared entry point for generate_monthly_invoices_task and ManualInvoiceGenerationView.
+    Invoices are inserted first; the new IDs are handed to the render / notification
+    pipeline only after they have been committed.
+    """
+    month_start = month_start or timezone.now().date().replace(day=1)
+
+    created_ids, skipped_count = create_missing_rent_invoices(month_start)
+    if created_ids:
+        # bulk_create skips the model signals that keep the dashboard snapshot current
+        mark_dashboard_dirty(*PARTS_BY_MODEL["invoice"])
+    messages = notify_created_invoices(created_ids, sent_by=executed_by, task_log=task_log)
+
+    return {
+        "month": month_start,
+        "invoice_ids": created_ids,
+        "created": len(created_ids),
+        "skipped": skipped_count,
+        "messages": messages,
+    }
@@ -0,0 +1,44 @@
+# invoices/management/commands/bench_invoice_pdf.py
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+
+from invoices.models import Invoice
+from invoices.services import render_invoice_pdf_to
+
+
+class Command(BaseCommand):
+    help = "Render invoice PDFs in memory (nothing is saved) and report renders/second."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--invoice-id", type=int, help="Invoice to render (default: latest invoice).")
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=5)
+
+    def handle(self, *args, **options):
+        qs = (
+            Invoice.objects.select_related("lease__renter", "lease__unit")
+            .prefetch_related("lease__lease_rents__rent_type")
+        )
+        invoice_id = options["invoice_id"]
+        invoice = qs.filter(pk=invoice_id).first() if invoice_id else qs.order_by("-id").first()
+        if not invoice:
+            raise CommandError("No invoice to render.")
+
+        iterations = max(options["iterations"], 1)
+        for _ in range(options["warmup"]):
+            render_invoice_pdf_to(invoice, BytesIO())
+
+        size = 0
+        started = time.perf_counter()
+        for _ in range(iterations):
+            buffer = BytesIO()
+            render_invoice_pdf_to(invoice, buffer)
+            size = buffer.tell()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Invoice {invoice.invoice_number or invoice.id}: {iterations} renders in {elapsed:.2f}s "
+            f"({iterations / elapsed:.1f} renders/s, {elapsed / iterations * 1000:.2f} ms/render, {size} bytes)"
+        )
@@ -6,6 +6,11 @@ from common.models import BaseAuditModel
 from common.utils.storage import invoice_pdf_upload_path
 from leases.models import Lease
 
+# Fields that decide what an invoice contributes to Lease.outstanding_balance
+LEDGER_FIELDS = ("lease_id", "amount", "paid_amount", "status", "invoice_type")
+# Invoices still awaiting money; the partial indexes below cover only these rows
+OPEN_STATUSES = ("unpaid", "partially_paid")
+
 
 class Invoice(BaseAuditModel):
     STATUS_CHOICES = [
@@ -31,6 +36,8 @@ class Invoice(BaseAuditModel):
     invoice_month = models.DateField(blank=True, null=True,
                                      help_text="Use first day of month: YYYY-MM-01 for rent invoices")
     invoice_pdf = models.FileField(upload_to=invoice_pdf_upload_path, blank=True, null=True)
+    pdf_fingerprint = models.CharField(max_length=64, blank=True, null=True,
+                                       help_text="Hash of the rendered fields; render is skipped when unchanged")
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     paid_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
@@ -51,6 +58,33 @@ class Invoice(BaseAuditModel):
                 name="unique_rent_invoice_per_lease_month",
             )
         ]
+        indexes = [
+            # Overdue notices, reminders, aging: status IN (...) AND due_date <= ...
+            models.Index(fields=["status", "due_date"], name="invoice_status_due_idx"),
+            # Payment allocation and ledger recompute: a lease's open invoices by type
+            models.Index(fields=["lease", "status", "invoice_type"], name="invoice_lease_status_type_idx"),
+            # Monthly export / PDF rendering
+            models.Index(fields=["invoice_month"], name="invoice_month_idx"),
+            # Default list ordering and date-range reports
+            models.Index(fields=["invoice_date", "id"], name="invoice_date_idx"),
+            # Open invoices are a small, hot slice of the table (PostgreSQL and SQLite build this as a partial index)
+            models.Index(fields=["due_date"], name="invoice_open_due_idx", condition=Q(status__in=OPEN_STATUSES)),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Loaded ledger inputs, so a later save can move Lease.outstanding_balance
+        # by the difference (None when some of them were deferred)
+        loaded = dict(zip(field_names, values))
+        instance._loaded_ledger = (
+            tuple(loaded[name] for name in LEDGER_FIELDS) if all(name in loaded for name in LEDGER_FIELDS) else None
+        )
+        return instance
+
+    @property
+    def ledger_state(self):
+        return tuple(getattr(self, name) for name in LEDGER_FIELDS)
 
     @property
     def balance_due(self):
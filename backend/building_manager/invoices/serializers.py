@@ -3,6 +3,17 @@ from rest_framework import serializers
 from .models import Invoice
 from django.db.models import Q
 
+class InvoiceListSerializer(serializers.ModelSerializer):
+    """Table columns for invoice lists (?compact=1)."""
+    class Meta:
+        model = Invoice
+        fields = [
+            "id", "invoice_number", "lease", "invoice_type", "due_date",
+            "amount", "paid_amount", "status",
+        ]
+        read_only_fields = fields
+
+
 class InvoiceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Invoice
@@ -1,14 +1,23 @@
+import hashlib
+import json
 import os
+import threading
+from collections import defaultdict
 from decimal import Decimal
+from itertools import islice
 
 from django.conf import settings
 from django.db import transaction
+from django.db.models import F
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 
+from common.metrics import get_counters, incr_counter
+from common.utils.streaming import STREAM_CHUNK_SIZE
 from invoices.models import Invoice
+from leases.models import LeaseRent
 from payments.models import Payment
 
 # -----------------------------
@@ -56,8 +65,163 @@ def _header_footer(canvas_obj, doc, unit_name=None):
     canvas_obj.restoreState()
 
 
-def generate_invoice_pdf(invoice: Invoice):
-    """Generate a PDF invoice with your building/unit/renter info and header/footer."""
+# -----------------------------
+# Invoice template
+# -----------------------------
+class InvoicePdfTemplate:
+    """
+    Everything about the invoice layout that does not depend on the invoice:
+    paragraph styles, table styles and static texts. Built once per process
+    (see INVOICE_TEMPLATE) instead of on every render.
+
+    Static label flowables are cached per thread: ReportLab stores layout
+    state on a flowable while wrapping it, so one instance must not be drawn
+    by two threads at once.
+    """
+
+    margins = {"rightMargin": 50, "leftMargin": 50, "topMargin": 80, "bottomMargin": 60}
+
+    bullet_notes = (
+        "Please pay the rent within 10th of the current month.",
+        "Electricity and gas are prepaid; utilities are not included in the rent and will be borne by the renter.",
+        "Subletting is not allowed.",
+        "No modifications to the unit are allowed without owner's permission.",
+        "Any damage caused by the renter must be repaired by the renter.",
+        "Security deposit is refundable if rent has been continuously paid until leaving.",
+        "Ensure your own safety in the unit; the building owner is not responsible for any event."
+    )
+
+    def __init__(self):
+        self.normal_small = ParagraphStyle(name='NormalSmall', fontSize=9, leading=12)
+        self.heading_small = ParagraphStyle(name='HeadingSmall', fontSize=11, leading=14, spaceAfter=6,
+                                            fontName='Helvetica-Bold')
+        self.notes_style = ParagraphStyle(name="Notes", fontSize=9, leading=12)
+
+        self.header_table_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        ])
+        self.items_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0f0f0')),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ])
+        self.notes_table_style = TableStyle([
+            ("BOX", (0, 0), (-1, -1), 0.3, colors.grey),
+            ("BACKGROUND", (0, 0), (-1, -1), colors.HexColor("#f9f9f9")),
+            ("LEFTPADDING", (0, 0), (-1, -1), 8),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 8),
+            ("TOPPADDING", (0, 0), (-1, -1), 6),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+        ])
+        self.signature_table_style = TableStyle([
+            ("LINEABOVE", (0, 1), (0, 1), 0.5, colors.black),
+            ("TOPPADDING", (0, 1), (0, 1), 10),
+        ])
+
+        self.bullet_notes_html = "<br/>".join(f"• {n}" for n in self.bullet_notes)
+        self._local = threading.local()
+
+    def static_flowables(self):
+        """Label paragraphs that are identical on every invoice (per thread)."""
+        flowables = getattr(self._local, "flowables", None)
+        if flowables is None:
+            heading, normal = self.heading_small, self.normal_small
+            flowables = {
+                "invoice_no": Paragraph("<b>Invoice #</b>", heading),
+                "invoice_date": Paragraph("<b>Invoice Date</b>", heading),
+                "due_date": Paragraph("<b>Due Date</b>", heading),
+                "bill_to": Paragraph("<b>Bill To:</b>", heading),
+                "description": Paragraph('<b>Description</b>', heading),
+                "amount": Paragraph('<b>Amount (BDT)</b>', heading),
+                "monthly_rent": Paragraph('Monthly Rent', normal),
+                "paid": Paragraph('<b>Paid</b>', normal),
+                "remaining": Paragraph('<b>Remaining</b>', normal),
+                "breakdown": Paragraph('<b>Breakdown:</b>', heading),
+                "signature": Paragraph("<b>Authorized Signature</b>", normal),
+            }
+            self._local.flowables = flowables
+        return flowables
+
+
+INVOICE_TEMPLATE = InvoicePdfTemplate()
+
+
+# -----------------------------
+# Render cache
+# -----------------------------
+# Bump when the PDF layout changes so every stored fingerprint becomes stale.
+PDF_TEMPLATE_VERSION = 1
+PDF_CACHE_HIT = "invoice_pdf_cache.hit"
+PDF_CACHE_MISS = "invoice_pdf_cache.miss"
+
+
+PRINTED_INVOICE_FIELDS = ("invoice_number", "invoice_date", "due_date", "amount", "paid_amount", "status")
+
+
+def _render_fingerprint(printed, lease_rents, renter, unit_name):
+    """
+    SHA-256 of the PDF contents: ``printed`` maps PRINTED_INVOICE_FIELDS to
+    values, ``lease_rents`` is [(rent type name, amount)], ``renter`` is
+    (full name, phone). Values are formatted the way the PDF prints them, so
+    Decimal('1000') and Decimal('1000.00') hash the same.
+    """
+    payload = {
+        "v": PDF_TEMPLATE_VERSION,
+        "invoice_number": printed["invoice_number"],
+        "invoice_date": str(printed["invoice_date"]),
+        "due_date": str(printed["due_date"]),
+        "amount": currency(printed["amount"]),
+        "paid_amount": currency(printed["paid_amount"]),
+        "status": printed["status"],
+        "lease_rents": [[name, currency(amount)] for name, amount in lease_rents],
+        "renter": list(renter),
+        "unit": unit_name,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def invoice_render_fingerprint(invoice: Invoice):
+    """Fingerprint of everything that ends up on the PDF: amounts, status, the lease_rents breakdown, renter and unit."""
+    lease = invoice.lease
+    return _render_fingerprint(
+        {name: getattr(invoice, name) for name in PRINTED_INVOICE_FIELDS},
+        [(lr.rent_type.name, lr.amount) for lr in lease.lease_rents.all()],
+        (lease.renter.full_name, lease.renter.phone_number),
+        lease.unit.name,
+    )
+
+
+def pdf_cache_stats():
+    counters = get_counters(PDF_CACHE_HIT, PDF_CACHE_MISS)
+    hits, misses = counters[PDF_CACHE_HIT], counters[PDF_CACHE_MISS]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total * 100, 2) if total else 0,
+    }
+
+
+def generate_invoice_pdf(invoice: Invoice, force=False):
+    """
+    Generate a PDF invoice with your building/unit/renter info and header/footer.
+    Skips the render when the stored fingerprint matches and the file is still
+    on disk, unless ``force`` is set.
+    """
+    fingerprint = invoice_render_fingerprint(invoice)
+    if (
+            not force
+            and invoice.invoice_pdf
+            and invoice.pdf_fingerprint == fingerprint
+            and invoice.invoice_pdf.storage.exists(invoice.invoice_pdf.name)
+    ):
+        incr_counter(PDF_CACHE_HIT)
+        return invoice.invoice_pdf.url
+    incr_counter(PDF_CACHE_MISS)
+
     media_root = getattr(settings, "MEDIA_ROOT", None)
     if not media_root:
         raise ValueError("MEDIA_ROOT not configured in settings.")
@@ -69,11 +233,24 @@ def generate_invoice_pdf(invoice: Invoice):
     filename = f"Invoice-{invoice.invoice_number or invoice.id}.pdf"
     pdf_path = os.path.join(folder_path, filename)
 
-    doc = SimpleDocTemplate(pdf_path, pagesize=A4, rightMargin=50, leftMargin=50, topMargin=80, bottomMargin=60)
+    render_invoice_pdf_to(invoice, pdf_path)
+
+    # Save path to model
+    invoice.invoice_pdf.name = os.path.relpath(pdf_path, settings.MEDIA_ROOT)
+    invoice.pdf_fingerprint = fingerprint
+    invoice.save(update_fields=['invoice_pdf', 'pdf_fingerprint'])
+
+    return invoice.invoice_pdf.url
+
 
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='NormalSmall', fontSize=9, leading=12))
-    styles.add(ParagraphStyle(name='HeadingSmall', fontSize=11, leading=14, spaceAfter=6, fontName='Helvetica-Bold'))
+def build_invoice_story(invoice: Invoice):
+    """
+    Flowables for one invoice. Styles, table styles and static texts come from
+    the shared INVOICE_TEMPLATE; only the per-invoice cells are built here.
+    """
+    tpl = INVOICE_TEMPLATE
+    static = tpl.static_flowables()
+    normal, heading = tpl.normal_small, tpl.heading_small
 
     story = []
 
@@ -86,27 +263,20 @@ def generate_invoice_pdf(invoice: Invoice):
 
     # Invoice meta
     meta_data = [
-        [Paragraph(f"<b>Invoice #</b>", styles['HeadingSmall']),
-         Paragraph(str(invoice.invoice_number), styles['NormalSmall'])],
-        [Paragraph(f"<b>Invoice Date</b>", styles['HeadingSmall']),
-         Paragraph(str(invoice.invoice_date), styles['NormalSmall'])],
-        [Paragraph(f"<b>Due Date</b>", styles['HeadingSmall']),
-         Paragraph(str(invoice.due_date), styles['NormalSmall'])],
+        [static["invoice_no"], Paragraph(str(invoice.invoice_number), normal)],
+        [static["invoice_date"], Paragraph(str(invoice.invoice_date), normal)],
+        [static["due_date"], Paragraph(str(invoice.due_date), normal)],
     ]
 
     renter_data = [
-        [Paragraph(f"<b>Bill To:</b>", styles['HeadingSmall'])],
-        [Paragraph(renter.full_name, styles['NormalSmall'])],
-        [Paragraph(f"Unit: {unit.name}", styles['NormalSmall'])],
-        [Paragraph(f"Phone: {renter.phone_number}", styles['NormalSmall'])],
+        [static["bill_to"]],
+        [Paragraph(renter.full_name, normal)],
+        [Paragraph(f"Unit: {unit.name}", normal)],
+        [Paragraph(f"Phone: {renter.phone_number}", normal)],
     ]
 
     header_tbl = Table([[renter_data, meta_data]], colWidths=[300, 170])
-    header_tbl.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-    ]))
+    header_tbl.setStyle(tpl.header_table_style)
     story.append(header_tbl)
     story.append(Spacer(1, 12))
 
@@ -119,33 +289,26 @@ def generate_invoice_pdf(invoice: Invoice):
 
     # Main items (total)
     items = [
-        [Paragraph('<b>Description</b>', styles['HeadingSmall']),
-         Paragraph('<b>Amount (BDT)</b>', styles['HeadingSmall'])],
-        [Paragraph('Monthly Rent', styles['NormalSmall']), Paragraph(currency(total_amount), styles['NormalSmall'])],
-        [Paragraph('<b>Paid</b>', styles['NormalSmall']), Paragraph(currency(paid_amount), styles['NormalSmall'])],
-        [Paragraph('<b>Remaining</b>', styles['NormalSmall']),
-         Paragraph(currency(remaining_amount), styles['NormalSmall'])],
+        [static["description"], static["amount"]],
+        [static["monthly_rent"], Paragraph(currency(total_amount), normal)],
+        [static["paid"], Paragraph(currency(paid_amount), normal)],
+        [static["remaining"], Paragraph(currency(remaining_amount), normal)],
     ]
 
     # ---------------------------
     # Lease rent breakdown
     # ---------------------------
-    lease_rents = invoice.lease.lease_rents.all()
-    if lease_rents.exists():
-        items.append([Paragraph('<b>Breakdown:</b>', styles['HeadingSmall']), ''])
+    lease_rents = lease.lease_rents.all()
+    if lease_rents:
+        items.append([static["breakdown"], ''])
         for lr in lease_rents:
             items.append([
-                Paragraph(f"- {lr.rent_type.name}", styles['NormalSmall']),
-                Paragraph(currency(lr.amount), styles['NormalSmall'])
+                Paragraph(f"- {lr.rent_type.name}", normal),
+                Paragraph(currency(lr.amount), normal)
             ])
 
     tbl = Table(items, colWidths=[360, 110])
-    tbl.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0f0f0')),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-    ]))
+    tbl.setStyle(tpl.items_table_style)
     story.append(tbl)
     story.append(Spacer(1, 18))
 
@@ -158,29 +321,10 @@ def generate_invoice_pdf(invoice: Invoice):
         "unpaid": f"This invoice is unpaid. Total due: {currency(remaining_amount)} BDT.",
     }.get(invoice.status, "Invoice generated.")
 
-    bullet_notes = [
-        "Please pay the rent within 10th of the current month.",
-        "Electricity and gas are prepaid; utilities are not included in the rent and will be borne by the renter.",
-        "Subletting is not allowed.",
-        "No modifications to the unit are allowed without owner's permission.",
-        "Any damage caused by the renter must be repaired by the renter.",
-        "Security deposit is refundable if rent has been continuously paid until leaving.",
-        "Ensure your own safety in the unit; the building owner is not responsible for any event."
-    ]
-
-    all_notes = [status_note] + [f"• {n}" for n in bullet_notes]
-    note_text = "<br/>".join(all_notes)
     notes_table = Table(
-        [[Paragraph(note_text, ParagraphStyle(name="Notes", fontSize=9, leading=12))]],
+        [[Paragraph(f"{status_note}<br/>{tpl.bullet_notes_html}", tpl.notes_style)]],
         colWidths=[500],
-        style=[
-            ("BOX", (0, 0), (-1, -1), 0.3, colors.grey),
-            ("BACKGROUND", (0, 0), (-1, -1), colors.HexColor("#f9f9f9")),
-            ("LEFTPADDING", (0, 0), (-1, -1), 8),
-            ("RIGHTPADDING", (0, 0), (-1, -1), 8),
-            ("TOPPADDING", (0, 0), (-1, -1), 6),
-            ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-        ]
+        style=tpl.notes_table_style,
     )
     story.append(notes_table)
     story.append(Spacer(1, 20))
@@ -188,33 +332,76 @@ def generate_invoice_pdf(invoice: Invoice):
     # -------------------------------
     # SIGNATURE
     # -------------------------------
-    signature_tbl = Table(
-        [[Paragraph("<b>Authorized Signature</b>", styles["NormalSmall"])], [""]],
-        colWidths=[200],
-    )
-    signature_tbl.setStyle(TableStyle([
-        ("LINEABOVE", (0, 1), (0, 1), 0.5, colors.black),
-        ("TOPPADDING", (0, 1), (0, 1), 10),
-    ]))
+    signature_tbl = Table([[static["signature"]], [""]], colWidths=[200])
+    signature_tbl.setStyle(tpl.signature_table_style)
     story.append(signature_tbl)
 
+    return story
+
+
+def render_invoice_pdf_to(invoice: Invoice, target):
+    """Build the invoice PDF into ``target`` (a file path or a binary file-like object)."""
+    unit_name = invoice.lease.unit.name
+    doc = SimpleDocTemplate(target, pagesize=A4, **INVOICE_TEMPLATE.margins)
+
     # Build PDF with header/footer
     doc.build(
-        story,
-        onFirstPage=lambda c, d: _header_footer(c, d, unit.name),
-        onLaterPages=lambda c, d: _header_footer(c, d, unit.name)
+        build_invoice_story(invoice),
+        onFirstPage=lambda c, d: _header_footer(c, d, unit_name),
+        onLaterPages=lambda c, d: _header_footer(c, d, unit_name)
     )
 
-    # Save path to model
-    invoice.invoice_pdf.name = os.path.relpath(pdf_path, settings.MEDIA_ROOT)
-    invoice.save(update_fields=['invoice_pdf'])
 
-    return invoice.invoice_pdf.url
+# -----------------------------
+# Batch export
+# -----------------------------
+def stale_invoice_pdf_ids(invoices, batch_size=500):
+    """
+    Ids of the invoices in ``invoices`` whose stored PDF is missing or no longer
+    matches the invoice (the test generate_invoice_pdf applies). Reads value
+    rows batch by batch, with one lease_rents query per batch, so no model
+    instances are built however large the month is.
+    """
+    storage = Invoice._meta.get_field("invoice_pdf").storage
+    rows = (
+        invoices.order_by("id")
+        .values(
+            "id", "lease_id", "invoice_pdf", "pdf_fingerprint", *PRINTED_INVOICE_FIELDS,
+            renter_name=F("lease__renter__full_name"), renter_phone=F("lease__renter__phone_number"),
+            unit_name=F("lease__unit__name"),
+        )
+        .iterator(chunk_size=batch_size)
+    )
+    stale = []
+    while batch := list(islice(rows, batch_size)):
+        lease_rents = defaultdict(list)
+        for lease_id, name, amount in (
+                LeaseRent.objects.filter(lease_id__in={row["lease_id"] for row in batch})
+                .order_by("id")
+                .values_list("lease_id", "rent_type__name", "amount")
+        ):
+            lease_rents[lease_id].append((name, amount))
+
+        for row in batch:
+            fingerprint = _render_fingerprint(
+                row, lease_rents[row["lease_id"]], (row["renter_name"], row["renter_phone"]), row["unit_name"]
+            )
+            if not (row["invoice_pdf"] and row["pdf_fingerprint"] == fingerprint and storage.exists(row["invoice_pdf"])):
+                stale.append(row["id"])
+    return stale
+
+
+def stored_pdf_chunks(name, chunk_size=STREAM_CHUNK_SIZE):
+    """Bytes of a stored invoice PDF (its invoice_pdf name), read lazily; nothing is rendered."""
+    with Invoice._meta.get_field("invoice_pdf").storage.open(name, "rb") as fh:
+        yield from fh.chunks(chunk_size)
 
 
 def apply_bulk_payment(lease, amount, method="cash", transaction_reference=None, notes=None):
     """
     Allocate a payment amount to all unpaid/partially paid invoices of a lease (oldest first).
+    The allocation is done once by payments.services.allocate_payment (row-locked, one
+    bulk_update); one Payment is then recorded per invoice it touched.
     Returns:
         - List of Payment objects created
         - List of allocation details per invoice: {invoice_id, amount_applied, new_status}
@@ -222,31 +409,15 @@ def apply_bulk_payment(lease, amount, method="cash", transaction_reference=None,
     if amount <= 0:
         raise ValueError("Payment amount must be positive.")
 
-    from django.db.models import Q
-
-    invoices = Invoice.objects.filter(
-        lease=lease
-    ).exclude(
-        Q(status="paid") | Q(invoice_type__in=["security_deposit", "adjustment"])
-    ).order_by("invoice_date", "id")
-    # chronological order
+    from payments.services import allocate_payment
 
     payments_created = []
     allocation = []
-    remaining_amount = Decimal(amount)
 
     with transaction.atomic():
-        for invoice in invoices:
-            if remaining_amount <= 0:
-                break
-
-            invoice_balance = invoice.amount - invoice.paid_amount
-            if invoice_balance <= 0:
-                continue
-
-            pay_amount = min(invoice_balance, remaining_amount)
-
-            payment = Payment.objects.create(
+        allocations, _ = allocate_payment(lease.pk, amount)
+        for invoice, pay_amount in allocations:
+            payment = Payment(
                 invoice=invoice,
                 lease=lease,
                 amount=pay_amount,
@@ -254,27 +425,15 @@ def apply_bulk_payment(lease, amount, method="cash", transaction_reference=None,
                 transaction_reference=transaction_reference,
                 notes=notes or "",
             )
+            # Already applied above; the post_save signal only logs and notifies
+            payment._allocation_applied = True
+            payment.save()
             payments_created.append(payment)
 
-            # Update invoice paid_amount and status
-            invoice.paid_amount += pay_amount
-            if invoice.paid_amount >= invoice.amount:
-                invoice.status = "paid"
-            else:
-                invoice.status = "partially_paid"
-            invoice.save(update_fields=["paid_amount", "status"])
-
-            # Update lease deposit status if security deposit invoice fully paid
-            if invoice.invoice_type == "security_deposit" and lease.deposit_status != "paid":
-                lease.deposit_status = "paid"
-                lease.save(update_fields=["deposit_status"])
-
             allocation.append({
                 "invoice_id": invoice.id,
                 "amount_applied": str(pay_amount),
                 "status": invoice.status
             })
 
-            remaining_amount -= pay_amount
-
     return payments_created, allocation
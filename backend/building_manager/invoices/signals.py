@@ -1,13 +1,12 @@
 import logging
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.conf import settings
 from django.utils import timezone
 
+from leases.services import adjust_outstanding_balances, ledger_balance, sync_lease_balance
 from .models import Invoice
-from .services import generate_invoice_pdf
-from notifications.utils import NotificationService
-from scheduling.api.views import get_email_message, get_whatsapp_message
+from .tasks import dispatch, invoice_pipeline, notify_invoice_created
 # Import TaskLog locally inside the function to avoid potential circular imports
 # from scheduling.models import TaskLog  <-- Moved inside receiver
 
@@ -19,7 +18,7 @@ def invoice_post_save(sender, instance: Invoice, created, **kwargs):
     Handle individual invoice creation:
     1. Automatically generate Invoice Number if missing.
     2. Create a TaskLog for audit and traceability.
-    3. Generate PDF and send notifications synchronously.
+    3. Queue PDF rendering and notifications on the render pipeline.
     """
     # 1. Generate unique invoice number for new records
     if not instance.invoice_number:
@@ -50,57 +49,46 @@ def invoice_post_save(sender, instance: Invoice, created, **kwargs):
         message=f"Processing auto-notifications for Invoice {instance.invoice_number}"
     )
 
-    try:
-        # 4. SYNCHRONOUS PDF GENERATION
-        logger.info(f"Invoice {instance.id}: generating PDF.")
-        generate_invoice_pdf(instance)
-        instance.refresh_from_db()
-
-        # 5. CONSTRUCT ATTACHMENT URL
-        attachment_url = None
-        if instance.invoice_pdf and instance.invoice_pdf.url:
-            site_url = getattr(settings, "SITE_URL", "").rstrip("/")
-            attachment_url = f"{site_url}{instance.invoice_pdf.url}" if site_url else instance.invoice_pdf.url
-        else:
-            logger.warning(f"Invoice {instance.id}: No PDF found for attachment.")
-
-        # 6. EMAIL NOTIFICATION
-        if getattr(renter, "prefers_email", False) and renter.user.email:
-            subject, body = get_email_message(instance, renter, message_type="invoice_created")
-            NotificationService.send(
-                notification_type="invoice_created",
-                renter=renter,
-                channel="email",
-                subject=subject,
-                message=body,
-                invoice=instance,
-                sent_by=user,
-                attachment_url=attachment_url,
-                task_log=task_log  # <--- LINKED FOR TRACEABILITY
-            )
-
-        # 7. WHATSAPP NOTIFICATION
-        if getattr(renter, "prefers_whatsapp", False) and renter.phone_number:
-            message = get_whatsapp_message(instance, renter, message_type="invoice_created")
-            NotificationService.send(
-                notification_type="invoice_created",
-                renter=renter,
-                channel="whatsapp",
-                message=message,
-                invoice=instance,
-                sent_by=user,
-                attachment_url=attachment_url,
-                task_log=task_log  # <--- LINKED FOR TRACEABILITY
-            )
-
-        # 8. FINALIZE TASK LOG
-        task_log.status = "SUCCESS"
-        task_log.save()
-        logger.info(f"Invoice {instance.id}: Auto-notify workflow completed successfully.")
-
-    except Exception as exc:
-        # 9. LOG FAILURE FOR AUDIT
-        task_log.status = "FAILURE"
-        task_log.message = f"Error: {str(exc)}"
-        task_log.save()
-        logger.exception(f"Invoice {instance.id} post_save auto-notify failed: {exc}")
\ No newline at end of file
+    # 4. PDF RENDER + NOTIFICATIONS
+    # Rendered on the render queue once the invoice is committed; the notify task
+    # runs after the render in the same chain and finalizes the TaskLog.
+    invoice_id, user_id, task_log_id = instance.pk, user.pk, task_log.pk
+    transaction.on_commit(lambda: dispatch(invoice_pipeline(
+        invoice_id,
+        notify_invoice_created,
+        sent_by_id=user_id,
+        task_log_id=task_log_id,
+        finalize_task_log=True,
+    )))
+    logger.info(f"Invoice {instance.id}: render + auto-notify queued.")
+
+
+# -------------------------
+# Lease ledger
+# -------------------------
+LEDGER_UPDATE_FIELDS = {"lease", "lease_id", "amount", "paid_amount", "status", "invoice_type"}
+
+
+@receiver(post_save, sender=Invoice)
+def invoice_ledger_saved(sender, instance: Invoice, created, update_fields=None, **kwargs):
+    """Move Lease.outstanding_balance by what this save changed (one F() UPDATE)."""
+    if update_fields and not LEDGER_UPDATE_FIELDS.intersection(update_fields):
+        return
+
+    after = instance.ledger_state
+    before = None if created else getattr(instance, "_loaded_ledger", None)
+    if not created and before is None:
+        # Loaded with deferred fields or built by hand: no baseline to diff against
+        sync_lease_balance(instance.lease_id)
+    else:
+        deltas = {after[0]: ledger_balance(*after[1:])}
+        if before is not None:
+            deltas[before[0]] = deltas.get(before[0], 0) - ledger_balance(*before[1:])
+        adjust_outstanding_balances(deltas)
+    instance._loaded_ledger = after
+
+
+@receiver(post_delete, sender=Invoice)
+def invoice_ledger_deleted(sender, instance: Invoice, **kwargs):
+    state = getattr(instance, "_loaded_ledger", None) or instance.ledger_state
+    adjust_outstanding_balances({state[0]: -ledger_balance(*state[1:])})
@@ -0,0 +1,238 @@
+# invoices/tasks.py
+import logging
+
+from celery import chain, chord, group, shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from common.utils.dispatch import dispatch
+from invoices.models import Invoice
+from invoices.services import generate_invoice_pdf
+from notifications.utils import NotificationService
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+# -----------------------------
+# Queue helpers
+# -----------------------------
+def render_queue_for(invoice_id):
+    """
+    Render work is sharded by invoice id across INVOICE_RENDER_SHARDS queues
+    (invoice_render.0, invoice_render.1, ...) so each shard can get its own
+    worker process, e.g. `celery -A building_manager worker -Q invoice_render.0 -c 4`.
+    """
+    shards = settings.INVOICE_RENDER_SHARDS
+    if shards <= 1:
+        return settings.INVOICE_RENDER_QUEUE
+    return f"{settings.INVOICE_RENDER_QUEUE}.{invoice_id % shards}"
+
+
+def render_signature(invoice_id):
+    return render_invoice_pdf.si(invoice_id).set(queue=render_queue_for(invoice_id))
+
+
+def _attachment_url(invoice):
+    if not invoice.invoice_pdf:
+        return None
+    pdf_url = invoice.invoice_pdf.url
+    if pdf_url.startswith("http"):
+        return pdf_url
+    site_url = getattr(settings, "SITE_URL", "").rstrip("/")
+    return f"{site_url}{pdf_url}" if site_url else pdf_url
+
+
+def _load_invoice(invoice_id):
+    return (
+        Invoice.objects.select_related("lease__renter__user", "lease__unit")
+        .prefetch_related("lease__lease_rents__rent_type")
+        .filter(pk=invoice_id)
+        .first()
+    )
+
+
+# -----------------------------
+# Tasks
+# -----------------------------
+@shared_task(name="render_invoice_pdf", bind=True, max_retries=3, default_retry_delay=10)
+def render_invoice_pdf(self, invoice_id):
+    """Render one invoice PDF. Routed to the render queue(s)."""
+    invoice = _load_invoice(invoice_id)
+    if not invoice:
+        logger.warning(f"render_invoice_pdf: invoice {invoice_id} not found.")
+        return None
+    try:
+        return generate_invoice_pdf(invoice)
+    except OSError as exc:
+        raise self.retry(exc=exc)
+
+
+@shared_task(name="notify_invoice_created")
+def notify_invoice_created(invoice_id, sent_by_id=None, task_log_id=None, finalize_task_log=False):
+    """
+    Send the "invoice created" email/WhatsApp. Runs after render_invoice_pdf
+    in the same chain, so the PDF is already on disk.
+    """
+    from scheduling.api.views import get_email_message, get_whatsapp_message
+    from scheduling.models import TaskLog
+
+    invoice = _load_invoice(invoice_id)
+    if not invoice:
+        return None
+
+    renter = invoice.lease.renter
+    sent_by = User.objects.filter(pk=sent_by_id).first() if sent_by_id else None
+    task_log = TaskLog.objects.filter(pk=task_log_id).first() if task_log_id else None
+    attachment_url = _attachment_url(invoice)
+
+    try:
+        if not attachment_url:
+            logger.warning(f"Invoice {invoice.id}: No PDF found for attachment.")
+
+        if renter.prefers_email and renter.user.email:
+            subject, body = get_email_message(invoice, renter, message_type="invoice_created")
+            NotificationService.send(
+                notification_type="invoice_created",
+                renter=renter,
+                channel="email",
+                subject=subject,
+                message=body,
+                invoice=invoice,
+                sent_by=sent_by,
+                attachment_url=attachment_url,
+                task_log=task_log,
+            )
+
+        if renter.prefers_whatsapp and renter.phone_number:
+            message = get_whatsapp_message(invoice, renter, message_type="invoice_created")
+            NotificationService.send(
+                notification_type="invoice_created",
+                renter=renter,
+                channel="whatsapp",
+                message=message,
+                invoice=invoice,
+                sent_by=sent_by,
+                attachment_url=attachment_url,
+                task_log=task_log,
+            )
+
+        if task_log and finalize_task_log:
+            task_log.status = "SUCCESS"
+            task_log.save()
+        logger.info(f"Invoice {invoice.id}: Auto-notify workflow completed successfully.")
+
+    except Exception as exc:
+        if task_log and finalize_task_log:
+            task_log.status = "FAILURE"
+            task_log.message = f"Error: {str(exc)}"
+            task_log.save()
+        logger.exception(f"Invoice {invoice.id} auto-notify failed: {exc}")
+
+
+@shared_task(name="fail_invoice_task_log")
+def fail_invoice_task_log(request, exc, traceback, task_log_id):
+    """
+    Errback for a pipeline whose render step failed for good: the notify step
+    that would have finalized the TaskLog never runs, so mark it FAILURE here.
+    """
+    from scheduling.models import TaskLog
+
+    TaskLog.objects.filter(pk=task_log_id, status="IN_PROGRESS").update(
+        status="FAILURE", message=f"Error: PDF render failed: {exc}"
+    )
+    logger.error(f"Invoice pipeline render {request.id} failed: {exc}")
+
+
+@shared_task(name="notify_invoice_payment")
+def notify_invoice_payment(invoice_id, task_log_id=None):
+    """Send the "payment update" email/WhatsApp once the refreshed PDF is rendered."""
+    from scheduling.api.views import get_email_message, get_whatsapp_message
+    from scheduling.models import TaskLog
+
+    invoice = _load_invoice(invoice_id)
+    if not invoice:
+        return None
+
+    renter = invoice.lease.renter
+    user = getattr(renter, "user", None)
+    task_log = TaskLog.objects.filter(pk=task_log_id).first() if task_log_id else None
+    attachment_url = _attachment_url(invoice)
+
+    try:
+        if renter.prefers_email and renter.user.email:
+            subject, body = get_email_message(invoice, renter, "invoice_payment_update")
+            NotificationService.send(
+                notification_type="invoice_payment_update",
+                renter=renter,
+                channel="email",
+                subject=subject,
+                message=body,
+                invoice=invoice,
+                sent_by=user,
+                attachment_url=attachment_url,
+                task_log=task_log,
+            )
+
+        if renter.prefers_whatsapp and renter.phone_number:
+            message = get_whatsapp_message(invoice, renter, "invoice_payment_update")
+            NotificationService.send(
+                notification_type="invoice_payment_update",
+                renter=renter,
+                channel="whatsapp",
+                message=message,
+                invoice=invoice,
+                sent_by=user,
+                attachment_url=attachment_url,
+                task_log=task_log,
+            )
+    except Exception as e:
+        logger.exception(f"Failed to notify: {e}")
+
+
+# -----------------------------
+# Pipeline API
+# -----------------------------
+def invoice_pipeline(invoice_id, notify_task, **notify_kwargs):
+    """
+    render_invoice_pdf -> notify_task for one invoice. When the notify step is
+    the one that finalizes a TaskLog, a failed render marks that TaskLog FAILURE.
+    """
+    render = render_signature(invoice_id)
+    if notify_kwargs.get("finalize_task_log") and notify_kwargs.get("task_log_id"):
+        render = render.on_error(fail_invoice_task_log.s(task_log_id=notify_kwargs["task_log_id"]))
+    return chain(render, notify_task.si(invoice_id, **notify_kwargs))
+
+
+def dispatch_invoice_pipelines(invoice_ids, notify_task, **notify_kwargs):
+    """
+    Render + notify many invoices in parallel. Each invoice gets its own chain,
+    so a notification goes out as soon as that invoice's PDF is ready.
+    """
+    invoice_ids = list(invoice_ids)
+    if not invoice_ids:
+        return None
+    return dispatch(group([invoice_pipeline(i, notify_task, **notify_kwargs) for i in invoice_ids]))
+
+
+def render_invoices(invoice_ids, callback=None):
+    """
+    Render a set of invoices in parallel across the render queue(s).
+    With ``callback`` (a signature) the renders run as a chord and the callback
+    receives the list of PDF URLs once every render has finished.
+    """
+    renders = group([render_signature(i) for i in invoice_ids])
+    if callback is not None:
+        return dispatch(chord(renders, callback))
+    return dispatch(renders)
+
+
+def render_month(invoice_month, callback=None):
+    """Render every invoice of ``invoice_month`` (first day of month) in parallel."""
+    invoice_ids = list(
+        Invoice.objects.filter(invoice_month=invoice_month).values_list("id", flat=True)
+    )
+    if not invoice_ids:
+        return None
+    return render_invoices(invoice_ids, callback=callback)
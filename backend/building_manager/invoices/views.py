@@ -1,3 +1,6 @@
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
 from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
@@ -5,24 +8,29 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
-from common.pagination import CustomPagination
+from common.mixins import FieldSelectionMixin
+from common.pagination import KeysetPagination
 from notifications.utils import NotificationService
 from permissions.custom_permissions import IsStaffOrReadOnlyForRenter
 from permissions.drf import RoleBasedPermission
 from permissions.mixins import RenterAccessMixin
 from scheduling.models import TaskLog
 from .models import Invoice
-from .serializers import InvoiceSerializer
-from .services import generate_invoice_pdf
+from .serializers import InvoiceListSerializer, InvoiceSerializer
+from common.utils.pdf import stream_pdf_concat
+from common.utils.streaming import stream_zip
+from .services import generate_invoice_pdf, pdf_cache_stats, stale_invoice_pdf_ids, stored_pdf_chunks
+from .tasks import dispatch, render_invoices, render_signature
 from django.conf import settings
 from scheduling.api.views import get_email_message, get_whatsapp_message
 
 @extend_schema(tags=["Invoices"])
-class InvoiceViewSet(RenterAccessMixin, viewsets.ModelViewSet):
+class InvoiceViewSet(FieldSelectionMixin, RenterAccessMixin, viewsets.ModelViewSet):
     queryset = Invoice.objects.all().select_related("lease", "lease__renter", "lease__unit")
     serializer_class = InvoiceSerializer
+    list_serializer_class = InvoiceListSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
 
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ["status", "lease", "lease__id", "lease__renter__id"]
@@ -41,14 +49,81 @@ class InvoiceViewSet(RenterAccessMixin, viewsets.ModelViewSet):
     @action(detail=True, methods=["post"], url_path="generate_pdf")
     def generate_pdf(self, request, pk=None):
         invoice = self.get_object()
+
+        # ?async=true hands the render to the render queue instead of blocking on ReportLab
+        if request.query_params.get("async") in ("1", "true", "True"):
+            result = dispatch(render_signature(invoice.id))
+            return Response({"detail": "PDF render queued.", "task_id": result.id},
+                            status=status.HTTP_202_ACCEPTED)
+
         try:
-            path = generate_invoice_pdf(invoice)
+            # Re-renders only when the invoice changed since the last render (or ?force=true)
+            force = request.query_params.get("force") in ("1", "true", "True")
+            path = generate_invoice_pdf(invoice, force=force)
         except Exception as e:
             return Response({"detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         # optionally send invoice via email/whatsapp here
         return Response({"pdf": invoice.invoice_pdf.url}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["get"], url_path="pdf_cache_stats")
+    def pdf_cache_stats(self, request):
+        """Hit/miss counters of the fingerprint-based PDF render cache."""
+        if not request.user.is_staff:
+            return Response({"detail": "Staff only."}, status=status.HTTP_403_FORBIDDEN)
+        return Response(pdf_cache_stats(), status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Download a month's invoices in one response:
+        ?invoice_month=YYYY-MM[&output=zip|pdf] (list filters such as ?status= apply).
+        zip  - the stored per-invoice PDFs, streamed entry by entry
+        pdf  - one merged document built from the same stored PDFs, streamed invoice by invoice
+        Only stored PDFs are streamed. If some are missing or stale they are queued
+        on the render queue and the response is 202; retry once they are rendered.
+        """
+        raw_month = request.query_params.get("invoice_month", "")
+        try:
+            invoice_month = datetime.strptime(raw_month, "%Y-%m").date()
+        except ValueError:
+            return Response({"detail": "invoice_month must be in YYYY-MM format."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        output = request.query_params.get("output", "zip").lower()
+        if output not in ("zip", "pdf"):
+            return Response({"detail": "output must be 'zip' or 'pdf'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        invoices = self.filter_queryset(self.get_queryset()).filter(invoice_month=invoice_month)
+        if not invoices.exists():
+            return Response({"detail": f"No invoices for {raw_month}."}, status=status.HTTP_404_NOT_FOUND)
+
+        stale = stale_invoice_pdf_ids(invoices)
+        if stale:
+            result = render_invoices(stale)
+            return Response(
+                {"detail": f"{len(stale)} invoice PDF(s) queued for rendering; retry the export shortly.",
+                 "pending": len(stale), "task_id": result.id},
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        # Plain value rows: the stream never builds model instances or writes
+        stored = invoices.order_by("id").values_list("id", "invoice_number", "invoice_pdf").iterator(chunk_size=500)
+        filename = f"invoices-{raw_month}.{output}"
+        if output == "pdf":
+            documents = (b"".join(stored_pdf_chunks(name)) for _, _, name in stored)
+            response = StreamingHttpResponse(stream_pdf_concat(documents), content_type="application/pdf")
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+            return response
+
+        entries = (
+            (f"Invoice-{number or invoice_id}.pdf", stored_pdf_chunks(name))
+            for invoice_id, number, name in stored
+        )
+        response = StreamingHttpResponse(stream_zip(entries), content_type="application/zip")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
     @action(detail=True, methods=["post"], url_path="resend_notification")
     def resend_notification(self, request, pk=None):
         invoice = self.get_object()
@@ -63,10 +138,8 @@ class InvoiceViewSet(RenterAccessMixin, viewsets.ModelViewSet):
         )
 
         try:
-            # 2. Ensure PDF exists
-            if not invoice.invoice_pdf:
-                generate_invoice_pdf(invoice)
-                invoice.refresh_from_db()
+            # 2. Ensure PDF exists and is current (no-op when the fingerprint matches)
+            generate_invoice_pdf(invoice)
 
             renter = invoice.lease.renter
             attachment_url = None
@@ -0,0 +1,34 @@
+# leases/management/commands/recompute_lease_balances.py
+from django.core.management.base import BaseCommand
+
+from leases.services import find_ledger_drift
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Lease.outstanding_balance / last_payment_at from invoices and payments "
+        "and report leases whose stored values drifted. Use --fix to repair them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lease-id", type=int, action="append", dest="lease_ids",
+                            help="Only check this lease (repeatable).")
+        parser.add_argument("--fix", action="store_true", help="Write the recomputed values.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        drift = find_ledger_drift(
+            lease_ids=options["lease_ids"], fix=options["fix"], batch_size=options["batch_size"]
+        )
+        for row in drift:
+            self.stdout.write(
+                f"Lease {row['lease_id']}: balance {row['stored_balance']} -> {row['expected_balance']}, "
+                f"last payment {row['stored_last_payment_at']} -> {row['expected_last_payment_at']}"
+            )
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("All lease balances are consistent."))
+        elif options["fix"]:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drift)} lease(s)."))
+        else:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} lease(s) drifted; rerun with --fix to repair."))
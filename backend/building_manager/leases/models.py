@@ -2,7 +2,6 @@ from decimal import Decimal
 
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Sum
 from django.utils.timezone import now
 
 from buildings.models import Unit
@@ -42,6 +41,10 @@ class Lease(BaseAuditModel):
     deposit_status = models.CharField(max_length=20, choices=DEPOSIT_STATUS_CHOICES, default="pending")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="draft")
 
+    # Ledger (denormalized; maintained by leases.services, repaired by recompute_lease_balances)
+    outstanding_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_payment_at = models.DateTimeField(blank=True, null=True)
+
     # Move-in Checklist
     electricity_card_given = models.BooleanField(default=False)
     gas_card_given = models.BooleanField(default=False)
@@ -59,6 +62,10 @@ class Lease(BaseAuditModel):
 
     class Meta:
         ordering = ["-start_date", "-id"]  # Optional: latest lease first
+        indexes = [
+            # Active lease per unit (validation, billing, dashboard occupancy)
+            models.Index(fields=["status", "unit"], name="lease_status_unit_idx"),
+        ]
 
     def clean(self):
         """Custom validation for dates and unique active lease per unit."""
@@ -78,21 +85,21 @@ class Lease(BaseAuditModel):
     @property
     def current_balance(self):
         """
-        Calculate current balance:
-        - Active lease: sum all invoices except security deposit
+        Current balance:
+        - Active lease: outstanding_balance (all invoices except security deposit)
         - Terminated lease: use final settlement invoice only
         """
         if self.status == "terminated":
-            final_invoice = self.invoices.filter(is_final=True).first()
-            if final_invoice:
+            # LeaseViewSet prefetches these; fall back to a query elsewhere
+            final_invoices = getattr(self, "final_invoices", None)
+            if final_invoices is None:
+                final_invoices = list(self.invoices.filter(is_final=True)[:1])
+            if final_invoices:
+                final_invoice = final_invoices[0]
                 return max(final_invoice.amount - final_invoice.paid_amount, Decimal("0.00"))
             return Decimal("0.00")  # fallback if no final invoice
 
-        # Active lease: sum unpaid/partial invoices excluding security deposit
-        invoices_qs = self.invoices.filter(status__in=["unpaid", "partially_paid", "paid"]) \
-            .exclude(invoice_type="security_deposit")
-        total_balance = sum(max(inv.amount - inv.paid_amount, Decimal("0.00")) for inv in invoices_qs)
-        return total_balance
+        return self.outstanding_balance
 
 
 class LeaseRentHistory(BaseAuditModel):
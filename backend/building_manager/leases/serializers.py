@@ -25,6 +25,21 @@ class RentTypeSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class LeaseListSerializer(serializers.ModelSerializer):
+    """Table columns for lease lists (?compact=1); no nested rows."""
+    renter_name = serializers.CharField(source="renter.full_name", read_only=True)
+    unit_name = serializers.CharField(source="unit.name", read_only=True)
+    current_balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = Lease
+        fields = [
+            "id", "renter", "renter_name", "unit", "unit_name", "start_date", "end_date",
+            "rent_amount", "current_balance", "status",
+        ]
+        read_only_fields = fields
+
+
 class LeaseSerializer(serializers.ModelSerializer):
     documents = LeaseDocumentSerializer(many=True, read_only=True)
     rent_history = LeaseRentHistorySerializer(many=True, read_only=True)
@@ -36,7 +51,8 @@ class LeaseSerializer(serializers.ModelSerializer):
         model = Lease
         fields = [
             "id", "renter", "unit", "start_date", "end_date", "termination_date",
-            "rent_amount", "security_deposit", "deposit_status", "current_balance", "status",
+            "rent_amount", "security_deposit", "deposit_status", "current_balance",
+            "outstanding_balance", "last_payment_at", "status",
             "lease_rents",
             "electricity_card_given", "gas_card_given", "main_gate_key_given",
             "pocket_gate_key_given", "agreement_paper_given", "police_verification_done",
@@ -44,7 +60,10 @@ class LeaseSerializer(serializers.ModelSerializer):
             "agreement_file", "police_verification_file",
             "created_at", "updated_at"
         ]
-        read_only_fields = ["id", "created_at", "updated_at", "deposit_status", "rent_amount"]
+        read_only_fields = [
+            "id", "created_at", "updated_at", "deposit_status", "rent_amount",
+            "outstanding_balance", "last_payment_at",
+        ]
 
     def create(self, validated_data):
         lease_rents_data = validated_data.pop("lease_rents", None)
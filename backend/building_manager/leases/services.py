@@ -0,0 +1,125 @@
+# leases/services.py
+"""
+Lease ledger: Lease.outstanding_balance and Lease.last_payment_at.
+
+The balance is the sum of max(amount - paid_amount, 0) over the lease's
+invoices that count towards it (see LEDGER_STATUSES / LEDGER_EXCLUDED_TYPES).
+Invoice saves and deletes apply their change as a single
+UPDATE ... SET outstanding_balance = outstanding_balance + delta in the same
+transaction as the invoice write (see invoices.signals); bulk inserts call
+adjust_outstanding_balances() directly. find_ledger_drift() recomputes the
+columns from invoices/payments so drift can be reported and repaired.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from invoices.models import Invoice
+from leases.models import Lease
+from payments.models import Payment
+
+LEDGER_STATUSES = ("unpaid", "partially_paid", "paid")
+LEDGER_EXCLUDED_TYPES = ("security_deposit",)
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def ledger_balance(amount, paid_amount, status, invoice_type):
+    """What one invoice contributes to its lease's outstanding_balance."""
+    if status not in LEDGER_STATUSES or invoice_type in LEDGER_EXCLUDED_TYPES:
+        return Decimal("0.00")
+    return max(Decimal(amount or 0) - Decimal(paid_amount or 0), Decimal("0.00"))
+
+
+def adjust_outstanding_balances(deltas):
+    """Apply {lease_id: delta} in one UPDATE using F() so concurrent writers never overwrite each other."""
+    deltas = {lease_id: delta for lease_id, delta in deltas.items() if lease_id and delta}
+    if not deltas:
+        return 0
+    return Lease.objects.filter(pk__in=deltas).update(
+        outstanding_balance=F("outstanding_balance") + Case(
+            *[When(pk=lease_id, then=Value(delta)) for lease_id, delta in deltas.items()],
+            default=Value(Decimal("0.00")), output_field=MONEY,
+        )
+    )
+
+
+def record_lease_payment(lease_id, paid_at):
+    """Move last_payment_at forward (never back) for a new payment."""
+    return Lease.objects.filter(pk=lease_id).filter(
+        Q(last_payment_at__isnull=True) | Q(last_payment_at__lt=paid_at)
+    ).update(last_payment_at=paid_at)
+
+
+def _expected_balance():
+    """Correlated subquery: the lease's balance recomputed from its invoices."""
+    balances = (
+        Invoice.objects.filter(lease=OuterRef("pk"), status__in=LEDGER_STATUSES, amount__gt=F("paid_amount"))
+        .exclude(invoice_type__in=LEDGER_EXCLUDED_TYPES)
+        .order_by().values("lease")
+        .annotate(total=Sum(F("amount") - F("paid_amount"), output_field=MONEY))
+        .values("total")
+    )
+    return Coalesce(Subquery(balances, output_field=MONEY), Value(Decimal("0.00")), output_field=MONEY)
+
+
+def sync_lease_balance(lease_id):
+    """Recompute one lease's balance in a single UPDATE (used when a delta cannot be derived)."""
+    return Lease.objects.filter(pk=lease_id).update(outstanding_balance=_expected_balance())
+
+
+def with_expected_ledger(leases):
+    """
+    Annotate ``expected_balance`` / ``expected_last_payment_at`` recomputed
+    from invoices and payments (one correlated subquery each).
+    """
+    last_payment = (
+        Payment.objects.filter(Q(lease=OuterRef("pk")) | Q(lease__isnull=True, invoice__lease=OuterRef("pk")))
+        .order_by("-created_at").values("created_at")[:1]
+    )
+    return leases.annotate(
+        expected_balance=_expected_balance(),
+        expected_last_payment_at=Subquery(last_payment),
+    )
+
+
+def find_ledger_drift(lease_ids=None, fix=False, batch_size=500):
+    """
+    Compare the stored ledger columns with the recomputed values.
+    Returns a list of {"lease_id", "stored_balance", "expected_balance",
+    "stored_last_payment_at", "expected_last_payment_at"}; with ``fix`` the
+    differing leases are corrected (bulk_update per batch).
+    """
+    leases = Lease.objects.order_by("pk")
+    if lease_ids:
+        leases = leases.filter(pk__in=lease_ids)
+    leases = with_expected_ledger(leases.only("id", "outstanding_balance", "last_payment_at"))
+
+    drift, batch = [], []
+
+    def flush():
+        if fix and batch:
+            with transaction.atomic():
+                Lease.objects.bulk_update(batch, ["outstanding_balance", "last_payment_at"])
+        batch.clear()
+
+    for lease in leases.iterator(chunk_size=batch_size):
+        if (lease.outstanding_balance == lease.expected_balance
+                and lease.last_payment_at == lease.expected_last_payment_at):
+            continue
+        drift.append({
+            "lease_id": lease.pk,
+            "stored_balance": lease.outstanding_balance,
+            "expected_balance": lease.expected_balance,
+            "stored_last_payment_at": lease.last_payment_at,
+            "expected_last_payment_at": lease.expected_last_payment_at,
+        })
+        lease.outstanding_balance = lease.expected_balance
+        lease.last_payment_at = lease.expected_last_payment_at
+        batch.append(lease)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return drift
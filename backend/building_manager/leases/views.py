@@ -2,6 +2,7 @@ from decimal import Decimal
 from datetime import date
 
 from django.db import transaction, models
+from django.db.models import Prefetch
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
@@ -11,18 +12,32 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from common.mixins import FieldSelectionMixin
 from common.pagination import CustomPagination
 from permissions.drf import RoleBasedPermission
 from permissions.mixins import RenterAccessMixin
 from invoices.models import Invoice
 from .models import Lease, LeaseRentHistory, RentType
-from .serializers import LeaseSerializer, LeaseRentHistorySerializer, RentTypeSerializer
+from .serializers import LeaseListSerializer, LeaseSerializer, LeaseRentHistorySerializer, RentTypeSerializer
 
 
 @extend_schema(tags=["Leases"])
-class LeaseViewSet(RenterAccessMixin, viewsets.ModelViewSet):
+class LeaseViewSet(FieldSelectionMixin, RenterAccessMixin, viewsets.ModelViewSet):
     queryset = Lease.objects.all().select_related("renter", "unit")
     serializer_class = LeaseSerializer
+    list_serializer_class = LeaseListSerializer
+    # current_balance reads the persisted ledger; nested rows and final invoices are prefetched when returned
+    field_plan = {
+        "documents": {"prefetch": ["documents"]},
+        "rent_history": {"prefetch": ["rent_history"]},
+        "lease_rents": {"prefetch": ["lease_rents__rent_type"]},
+        "current_balance": {
+            "only": ["status", "outstanding_balance"],
+            "prefetch": [Prefetch("invoices", queryset=Invoice.objects.filter(is_final=True), to_attr="final_invoices")],
+        },
+        "renter_name": {"related": ["renter"], "only": ["renter__full_name"]},
+        "unit_name": {"related": ["unit"], "only": ["unit__name"]},
+    }
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     pagination_class = CustomPagination
     parser_classes = [JSONParser, MultiPartParser, FormParser]
@@ -3,7 +3,7 @@ from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from drf_spectacular.utils import extend_schema
 
-from common.pagination import CustomPagination
+from common.pagination import KeysetPagination
 from notifications.models import Notification
 from notifications.api.serializers import NotificationSerializer
 from permissions.drf import RoleBasedPermission
@@ -16,7 +16,7 @@ class NotificationListView(generics.ListAPIView):
     """
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
     filterset_fields = ["notification_type", "channel", "status", "sent_by"]
     search_fields = ["recipient", "subject", "message"]
     ordering_fields = ["sent_at", "status"]
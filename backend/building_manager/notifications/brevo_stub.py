@@ -0,0 +1,115 @@
+# notifications/brevo_stub.py
+"""
+Local stand-in for Brevo's transactional email endpoint, for offline
+throughput runs (manage.py bench_brevo) and manual testing
+(manage.py brevo_stub + BREVO_API_URL=http://127.0.0.1:8025/v3).
+Accepts POST /v3/smtp/email, records every call and answers like Brevo.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class BrevoStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=8025, latency=0.0, keep_calls=False):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.keep_calls = keep_calls
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reset()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v3"
+
+    def reset(self):
+        with self._lock:
+            self.calls = []
+            self.call_count = 0
+            self.recipient_count = 0
+            self.connections = 0
+
+    def record(self, payload):
+        recipients = len(payload.get("messageVersions") or payload.get("to") or [])
+        with self._lock:
+            self.call_count += 1
+            self.recipient_count += recipients
+            if self.keep_calls:
+                self.calls.append(payload)
+            return self.call_count, recipients
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.call_count,
+                "recipients": self.recipient_count,
+                "connections": self.connections,
+            }
+
+    def start(self):
+        """Serve from a background thread (in-process benchmarks)."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without TCP_NODELAY keep-alive calls stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, code, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            return self._reply(200, self.server.stats())
+        self._reply(404, {"code": "not_found"})
+
+    def do_DELETE(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            self.server.reset()
+            return self._reply(200, self.server.stats())
+        self._reply(404, {"code": "not_found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        if not self.path.rstrip("/").endswith("/smtp/email"):
+            return self._reply(404, {"code": "not_found"})
+        if not self.headers.get("api-key"):
+            return self._reply(401, {"code": "unauthorized", "message": "Key not found"})
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            return self._reply(400, {"code": "bad_request", "message": "Invalid JSON"})
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        call_no, recipients = self.server.record(payload)
+        if payload.get("messageVersions"):
+            return self._reply(201, {"messageIds": [f"<stub-{call_no}-{i}@local>" for i in range(recipients)]})
+        self._reply(201, {"messageId": f"<stub-{call_no}@local>"})
@@ -0,0 +1,129 @@
+# notifications/email_templates.py
+"""
+Email bodies written once with Brevo placeholders ({{ params.x }}).
+
+Notifications built from these carry their params (Notification.template_params),
+so the dispatcher can send many of them in one Brevo call via messageVersions.
+render_template() fills the placeholders locally for single sends and for the
+message stored on the Notification row - both produce the same HTML.
+"""
+import re
+from decimal import Decimal
+
+from django.utils import timezone
+
+PLACEHOLDER_RE = re.compile(r"{{\s*params\.(\w+)\s*}}")
+
+EMAIL_TEMPLATES = {
+    "rent_reminder": (
+        "Reminder: Rent Due for Invoice {{ params.invoice_numbers }}",
+        """
+        <html>
+            <body style="font-family: Arial, sans-serif; color: #333;">
+                <h2 style="color: #2e6c80;">Dear {{ params.renter_name }},</h2>
+                <p style="font-size: 16px;">We hope you are doing well.</p>
+                <p style="font-size: 16px;">This is a friendly reminder that your rent payment for the following invoice is due soon:</p>
+                <table style="font-size: 16px; width: 100%; border-collapse: collapse; margin-top: 20px;">
+                    <tr style="background-color: #f2f2f2;">
+                        <th style="padding: 8px; text-align: left;">Invoice Number</th>
+                        <td style="padding: 8px; text-align: left;">{{ params.invoice_numbers }}</td>
+                    </tr>
+                    <tr>
+                        <th style="padding: 8px; text-align: left;">Amount Due</th>
+                        <td style="padding: 8px; text-align: left;">{{ params.amount }} BDT</td>
+                    </tr>
+                    <tr>
+                        <th style="padding: 8px; text-align: left;">Due Date</th>
+                        <td style="padding: 8px; text-align: left;">{{ params.due_date }}</td>
+                    </tr>
+                </table>
+                <p style="font-size: 16px; margin-top: 20px;">To avoid any late fees, kindly ensure the payment is made on or before the due date.</p>
+                <p style="font-size: 16px;">If you need assistance or have any questions, please feel free to reach out to us.</p>
+                <p style="font-size: 16px;">Best regards,<br> Building Manager - Saptaneer<br>Contact us at: [8801521259370]</p>
+            </body>
+        </html>
+        """,
+    ),
+    "overdue_notice": (
+        "Urgent: Overdue Invoice {{ params.invoice_numbers }}",
+        """
+        <html>
+            <body style="font-family: Arial, sans-serif; color: #333;">
+                <h2 style="color: #b84e32;">Dear {{ params.renter_name }},</h2>
+                <p style="font-size: 16px;">We hope you are doing well.</p>
+                <p style="font-size: 16px;">This is a gentle reminder that your {{ params.invoice_noun }} <strong>{{ params.invoice_numbers }}</strong> {{ params.invoice_verb }} now overdue. Below are the details:</p>
+                <table style="font-size: 16px; width: 100%; border-collapse: collapse; margin-top: 20px;">
+                    <tr style="background-color: #f2f2f2;">
+                        <th style="padding: 8px; text-align: left;">Amount Due</th>
+                        <td style="padding: 8px; text-align: left;">{{ params.amount }} BDT</td>
+                    </tr>
+                    <tr>
+                        <th style="padding: 8px; text-align: left;">Due Date</th>
+                        <td style="padding: 8px; text-align: left;">{{ params.due_date }}</td>
+                    </tr>
+                    <tr>
+                        <th style="padding: 8px; text-align: left;">Days Overdue</th>
+                        <td style="padding: 8px; text-align: left;">{{ params.days_overdue }} days</td>
+                    </tr>
+                </table>
+                <p style="font-size: 16px; margin-top: 20px;">To avoid further complications or penalties, we kindly request that you settle the payment at your earliest convenience.</p>
+                <p style="font-size: 16px;">If you require any assistance or need additional information, please don't hesitate to contact us.</p>
+                <p style="font-size: 16px;">Best regards,<br> Building Manager - Saptaneer<br>Contact us at: [8801521259370]</p>
+            </body>
+        </html>
+        """,
+    ),
+}
+
+
+def render_template(template, params):
+    return PLACEHOLDER_RE.sub(lambda m: str(params.get(m.group(1), "")), template)
+
+
+def invoice_template_params(invoice, renter):
+    """JSON-safe params shared by the invoice email templates."""
+    return {
+        "renter_name": renter.full_name,
+        "invoice_number": invoice.invoice_number,
+        "invoice_numbers": f"#{invoice.invoice_number}",
+        "invoice_count": 1,
+        "invoice_noun": "invoice",
+        "invoice_verb": "is",
+        "amount": str(invoice.amount),
+        "due_date": invoice.due_date.strftime('%B %d, %Y'),
+        "days_overdue": (timezone.now().date() - invoice.due_date).days,
+    }
+
+
+def renter_invoices_template_params(renter, invoices):
+    """
+    Params for one consolidated message covering several invoices of a renter:
+    all invoice numbers, the total still outstanding and the earliest due date.
+    """
+    earliest_due = min(inv.due_date for inv in invoices)
+    outstanding = sum((inv.amount - (inv.paid_amount or 0) for inv in invoices), Decimal("0.00"))
+    return renter_summary_template_params(
+        renter, [inv.invoice_number for inv in invoices], outstanding, earliest_due
+    )
+
+
+def renter_summary_template_params(renter, invoice_numbers, outstanding, earliest_due):
+    """Same params from pre-aggregated values (e.g. a GROUP BY per renter)."""
+    count = len(invoice_numbers)
+    return {
+        "renter_name": renter.full_name,
+        "invoice_number": invoice_numbers[0],
+        "invoice_numbers": ", ".join(f"#{number}" for number in invoice_numbers),
+        "invoice_count": count,
+        "invoice_noun": "invoice" if count == 1 else "invoices",
+        "invoice_verb": "is" if count == 1 else "are",
+        "amount": f"{Decimal(outstanding or 0):.2f}",
+        "due_date": earliest_due.strftime('%B %d, %Y'),
+        "days_overdue": (timezone.now().date() - earliest_due).days,
+    }
+
+
+def render_email(message_type, params):
+    """(subject, body) for a templated message type, rendered locally."""
+    subject, body = EMAIL_TEMPLATES[message_type]
+    return render_template(subject, params), render_template(body, params)
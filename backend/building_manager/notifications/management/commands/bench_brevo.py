@@ -0,0 +1,101 @@
+# notifications/management/commands/bench_brevo.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from sib_api_v3_sdk import ApiClient, SendSmtpEmail, TransactionalEmailsApi
+
+from notifications.brevo_stub import BrevoStubServer
+from notifications.email_templates import EMAIL_TEMPLATES, render_email
+from notifications.utils import NotificationService, reset_brevo_api
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure email throughput (emails/s) against the local Brevo stub: "
+        "client per email vs pooled client vs pooled + threads vs messageVersions batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--emails", type=int, default=300)
+        parser.add_argument("--concurrency", type=int, default=settings.NOTIFICATION_DISPATCH_CONCURRENCY)
+        parser.add_argument("--batch-size", type=int, default=settings.BREVO_BATCH_SIZE)
+        parser.add_argument("--latency-ms", type=float, default=5, help="Simulated API latency per call.")
+        parser.add_argument("--url", help="Use an already running stub instead of an in-process one.")
+
+    def handle(self, *args, **options):
+        server = None
+        url = options["url"]
+        if not url:
+            server = BrevoStubServer(port=0, latency=options["latency_ms"] / 1000).start()
+            url = server.url
+
+        n = options["emails"]
+        recipients = [
+            {
+                "email": f"renter{i}@example.com",
+                "params": {"renter_name": f"Renter {i}", "invoice_number": f"INV-{i}",
+                           "amount": "15000.00", "due_date": "January 10, 2026", "days_overdue": 0},
+            }
+            for i in range(n)
+        ]
+        messages = [render_email("rent_reminder", r["params"]) for r in recipients]
+
+        try:
+            with override_settings(BREVO_API_URL=url, BREVO_API_KEY=settings.BREVO_API_KEY or "stub",
+                                   BREVO_POOL_MAXSIZE=max(options["concurrency"], 1)):
+                reset_brevo_api()
+                self._run("client per email", n, server, lambda: self._per_email_fresh_client(url, recipients, messages))
+                self._run("pooled client", n, server, lambda: [
+                    NotificationService._send_email(r["email"], s, b) for r, (s, b) in zip(recipients, messages)
+                ])
+                self._run(f"pooled + {options['concurrency']} threads", n, server, lambda: self._threaded(
+                    options["concurrency"], recipients, messages
+                ))
+                self._run(f"messageVersions x{options['batch_size']}", n, server, lambda: self._batched(
+                    options["batch_size"], recipients
+                ))
+        finally:
+            reset_brevo_api()
+            if server:
+                server.stop()
+
+    def _run(self, label, n, server, fn):
+        if server:
+            server.reset()
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        extra = ""
+        if server:
+            stats = server.stats()
+            extra = f", {stats['calls']} calls, {stats['connections']} connections"
+        self.stdout.write(f"{label:<28} {n / elapsed:8.1f} emails/s ({elapsed:.2f}s{extra})")
+
+    @staticmethod
+    def _per_email_fresh_client(url, recipients, messages):
+        # What _send_email used to do: a new ApiClient (and connection) per message
+        for r, (subject, body) in zip(recipients, messages):
+            client = ApiClient()
+            client.configuration.host = url
+            client.configuration.api_key["api-key"] = settings.BREVO_API_KEY
+            TransactionalEmailsApi(client).send_transac_email(SendSmtpEmail(
+                sender={"name": settings.FROM_NAME, "email": settings.FROM_EMAIL or "noreply@localhost"},
+                to=[{"email": r["email"]}], subject=subject, html_content=body,
+            ))
+
+    @staticmethod
+    def _threaded(concurrency, recipients, messages):
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+            list(pool.map(
+                lambda pair: NotificationService._send_email(pair[0]["email"], *pair[1]),
+                zip(recipients, messages),
+            ))
+
+    @staticmethod
+    def _batched(batch_size, recipients):
+        subject, body = EMAIL_TEMPLATES["rent_reminder"]
+        for i in range(0, len(recipients), batch_size):
+            NotificationService._send_email_batch(subject, body, recipients[i:i + batch_size])
@@ -0,0 +1,24 @@
+# notifications/management/commands/brevo_stub.py
+from django.core.management.base import BaseCommand
+
+from notifications.brevo_stub import BrevoStubServer
+
+
+class Command(BaseCommand):
+    help = "Run a local Brevo stub (POST /v3/smtp/email, GET/DELETE /v3/stats). Point BREVO_API_URL at it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8025)
+        parser.add_argument("--latency-ms", type=float, default=0, help="Simulated API latency per call.")
+
+    def handle(self, *args, **options):
+        server = BrevoStubServer(options["host"], options["port"], latency=options["latency_ms"] / 1000)
+        self.stdout.write(f"Brevo stub listening on {server.url} (stats: {server.url}/stats)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Stats: {server.stats()}")
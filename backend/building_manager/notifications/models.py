@@ -27,12 +27,18 @@ class Notification(BaseAuditModel):
     message = models.TextField()
     status = models.CharField(
         max_length=20,
-        choices=[("pending", "Pending"), ("sent", "Sent"), ("failed", "Failed")],
+        choices=[("pending", "Pending"), ("sending", "Sending"), ("sent", "Sent"), ("failed", "Failed")],
         default="pending",
     )
     sent_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     sent_at = models.DateTimeField(default=timezone.now)
     error_message = models.TextField(blank=True, null=True)
+    # Outbox bookkeeping (see notifications.tasks.dispatch_notifications)
+    attachment_url = models.URLField(max_length=500, blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    # Placeholder values for templated emails (notifications.email_templates); enables batched sends
+    template_params = models.JSONField(blank=True, null=True)
     task_log = models.ForeignKey(
         'scheduling.TaskLog',
         on_delete=models.SET_NULL,
@@ -42,6 +48,9 @@ class Notification(BaseAuditModel):
     )
     class Meta:
         ordering = ["-sent_at"]
+        indexes = [
+            models.Index(fields=["sent_at"], name="notification_sent_at_idx"),
+        ]
 
     def __str__(self):
         return f"{self.notification_type} → {self.recipient} ({self.channel})"
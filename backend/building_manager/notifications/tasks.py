@@ -0,0 +1,159 @@
+# notifications/tasks.py
+import logging
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from common.utils.dispatch import dispatch
+from notifications.email_templates import EMAIL_TEMPLATES
+from notifications.models import Notification
+from notifications.utils import NotificationService
+
+logger = logging.getLogger(__name__)
+
+KICK_KEY = "notifications:dispatch-kick"
+# A claimed row that is still "sending" after this long (worker died) is picked up again
+CLAIM_TIMEOUT = timedelta(minutes=5)
+MAX_BACKOFF_SECONDS = 3600
+
+
+def kick_dispatcher():
+    """
+    Queue a dispatcher run after a commit. Kicks are collapsed while a run is
+    already queued; the run clears the flag before draining, so rows committed
+    mid-run still trigger a follow-up run.
+    """
+    if cache.add(KICK_KEY, 1, timeout=int(CLAIM_TIMEOUT.total_seconds())):
+        dispatch(dispatch_notifications.si())
+
+
+def _claim_batch(batch_size):
+    """
+    Lock up to ``batch_size`` due rows (SKIP LOCKED, so parallel dispatchers
+    never share a row) and mark them "sending".
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(status__in=["pending", "sending"], next_attempt_at__lte=now)
+            .order_by("next_attempt_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if ids:
+            Notification.objects.filter(pk__in=ids).update(status="sending", next_attempt_at=now + CLAIM_TIMEOUT)
+    return list(Notification.objects.select_related("invoice").filter(pk__in=ids))
+
+
+def _attempt(send):
+    try:
+        status, error_message = send()
+        return status, error_message, False
+    except Exception as exc:
+        return "failed", str(exc), True
+
+
+def _batchable(notification):
+    """Templated emails without a per-recipient attachment can share one Brevo call."""
+    invoice = notification.invoice
+    return (
+        notification.template_params is not None
+        and notification.notification_type in EMAIL_TEMPLATES
+        and not (invoice and invoice.invoice_pdf)
+    )
+
+
+def _send_versions(notification_type, rows):
+    subject, body = EMAIL_TEMPLATES[notification_type]
+    NotificationService._send_email_batch(
+        subject, body, [{"email": n.recipient, "params": n.template_params} for n in rows]
+    )
+    return "sent", None
+
+
+def _email_jobs(emails):
+    """(rows, send) pairs: one messageVersions call per template chunk, one call per other email."""
+    jobs = []
+    groups = defaultdict(list)
+    for n in emails:
+        if _batchable(n):
+            groups[n.notification_type].append(n)
+        else:
+            jobs.append(([n], partial(NotificationService.deliver, n)))
+
+    size = settings.BREVO_BATCH_SIZE
+    for notification_type, rows in groups.items():
+        for i in range(0, len(rows), size):
+            chunk = rows[i:i + size]
+            jobs.append((chunk, partial(_send_versions, notification_type, chunk)))
+    return jobs
+
+
+def _deliver_batch(batch, totals):
+    """
+    Emails go out concurrently (bounded by NOTIFICATION_DISPATCH_CONCURRENCY),
+    templated ones grouped into messageVersions calls; WhatsApp drives a
+    desktop session, so it stays sequential. Worker threads only talk to the
+    provider; all DB writes happen here in one bulk_update.
+    """
+    emails = [n for n in batch if n.channel == "email"]
+    others = [n for n in batch if n.channel != "email"]
+
+    results = {}
+    jobs = _email_jobs(emails)
+    if jobs:
+        workers = max(1, min(settings.NOTIFICATION_DISPATCH_CONCURRENCY, len(jobs)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for (rows, _), result in zip(jobs, pool.map(_attempt, [send for _, send in jobs])):
+                results.update((n.pk, result) for n in rows)
+    for n in others:
+        results[n.pk] = _attempt(partial(NotificationService.deliver, n))
+
+    now = timezone.now()
+    for n in batch:
+        status, error_message, retryable = results[n.pk]
+        n.attempts += 1
+        n.error_message = error_message
+        if status == "sent":
+            n.status, n.sent_at, n.next_attempt_at = "sent", now, None
+        elif retryable and n.attempts < settings.NOTIFICATION_MAX_ATTEMPTS:
+            delay = min(settings.NOTIFICATION_RETRY_BACKOFF * 2 ** (n.attempts - 1), MAX_BACKOFF_SECONDS)
+            n.status, n.next_attempt_at = "pending", now + timedelta(seconds=delay)
+            status = "retry"
+        else:
+            n.status, n.next_attempt_at = "failed", None
+        totals[status] += 1
+
+    Notification.objects.bulk_update(
+        batch, ["status", "error_message", "attempts", "next_attempt_at", "sent_at"]
+    )
+
+
+@shared_task(name="dispatch_notifications")
+def dispatch_notifications(batch_size=None):
+    """
+    Drain the notification outbox: claim due rows in batches, deliver them and
+    record sent / failed, or reschedule with exponential backoff.
+    """
+    cache.delete(KICK_KEY)
+    batch_size = batch_size or settings.NOTIFICATION_DISPATCH_BATCH_SIZE
+    totals = Counter()
+
+    while True:
+        batch = _claim_batch(batch_size)
+        if not batch:
+            break
+        _deliver_batch(batch, totals)
+
+    if totals:
+        logger.info(
+            f"Notification outbox: sent {totals['sent']}, retry {totals['retry']}, failed {totals['failed']}."
+        )
+    return dict(totals)
@@ -1,18 +1,114 @@
 # notifications/utils.py
 import base64
 import os
+import threading
+from collections import OrderedDict
 
 from django.conf import settings
-from sib_api_v3_sdk import ApiClient, TransactionalEmailsApi, SendSmtpEmail
+from django.db import transaction
+from django.utils import timezone
+from sib_api_v3_sdk import (
+    ApiClient, Configuration, SendSmtpEmail, SendSmtpEmailMessageVersions, TransactionalEmailsApi,
+)
 from sib_api_v3_sdk.rest import ApiException
 
 from notifications.models import Notification
 
+_brevo_lock = threading.Lock()
+_brevo_api = None
+
+
+def brevo_api():
+    """
+    Process-wide Brevo client. Its urllib3 pool keeps up to BREVO_POOL_MAXSIZE
+    connections alive, so consecutive sends (and the dispatcher's threads)
+    reuse TLS connections instead of handshaking per email.
+    """
+    global _brevo_api
+    if _brevo_api is None:
+        with _brevo_lock:
+            if _brevo_api is None:
+                configuration = Configuration()
+                configuration.api_key["api-key"] = settings.BREVO_API_KEY
+                if settings.BREVO_API_URL:
+                    configuration.host = settings.BREVO_API_URL.rstrip("/")
+                configuration.connection_pool_maxsize = settings.BREVO_POOL_MAXSIZE
+                _brevo_api = TransactionalEmailsApi(ApiClient(configuration))
+    return _brevo_api
+
+
+def reset_brevo_api():
+    """Drop the shared client (e.g. after changing BREVO_API_URL)."""
+    global _brevo_api
+    with _brevo_lock:
+        _brevo_api = None
+
+
+class AttachmentCache:
+    """
+    LRU of base64-encoded attachment files, keyed on (path, mtime, size) so a
+    re-rendered PDF is never served stale. Reminder runs attach the same
+    invoice PDF over and over; this saves the disk read and the encoding.
+    Bounded by total encoded size (BREVO_ATTACHMENT_CACHE_BYTES).
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, path):
+        st = os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return encoded
+            self.misses += 1
+
+        with open(path, "rb") as f:
+            encoded = base64.b64encode(f.read()).decode("utf-8")
+        self._put(key, encoded)
+        return encoded
+
+    def _put(self, key, encoded):
+        if len(encoded) > self.max_bytes:
+            return
+        with self._lock:
+            # Older versions of the same file can never be hit again
+            for stale in [k for k in self._entries if k[0] == key[0]]:
+                self._size -= len(self._entries.pop(stale))
+            self._entries[key] = encoded
+            self._size += len(encoded)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+attachment_cache = AttachmentCache(settings.BREVO_ATTACHMENT_CACHE_BYTES)
+
 
 class NotificationService:
     """
     Centralized notification dispatcher.
     Supports Email (Brevo) and WhatsApp (pywhatkit – dev only).
+
+    With NOTIFICATION_OUTBOX on, send() only records a pending Notification;
+    notifications.tasks.dispatch_notifications delivers it after commit.
     """
 
     @staticmethod
@@ -40,68 +136,102 @@ class NotificationService:
             sent_by=sent_by,
             status="pending",
             task_log=task_log,
+            attachment_url=attachment_url,
+            next_attempt_at=timezone.now() if settings.NOTIFICATION_OUTBOX else None,
             **kwargs
         )
 
+        if settings.NOTIFICATION_OUTBOX:
+            # Outbox: the row commits with the caller's transaction, delivery happens in the dispatcher
+            from notifications.tasks import kick_dispatcher
+            transaction.on_commit(kick_dispatcher)
+            return notification
+
         try:
-            if channel == "email":
-                attachment_path = None
-                if invoice and getattr(invoice, "invoice_pdf", None):
-                    attachment_path = invoice.invoice_pdf.path
+            notification.status, notification.error_message = NotificationService.deliver(notification)
+        except Exception as e:
+            notification.status = "failed"
+            notification.error_message = str(e)
 
-                NotificationService._send_email(
-                    to_email=recipient,
-                    subject=subject,
-                    content=message,
-                    attachment_path=attachment_path,
-                )
+        notification.save()
+        return notification
 
-                notification.status = "sent"
+    @staticmethod
+    def queue_many(notifications):
+        """
+        Bulk-insert unsaved Notification rows as pending outbox entries and
+        kick the dispatcher once they are committed. Used by the batch jobs
+        (reminders, overdue notices) instead of one send() per message.
+        """
+        now = timezone.now()
+        for n in notifications:
+            n.status = "pending"
+            n.next_attempt_at = now
+        created = Notification.objects.bulk_create(notifications)
+        if created:
+            from notifications.tasks import kick_dispatcher
+            transaction.on_commit(kick_dispatcher)
+        return created
 
-            elif channel == "whatsapp":
-                full_msg = message.strip()
-                if attachment_url:
-                    full_msg += f"\n\nDownload: {attachment_url.strip()}"
+    @staticmethod
+    def deliver(notification):
+        """
+        Push one stored notification to its channel.
+        Returns (status, error_message); raises when a retry may help (network/API errors).
+        """
+        if notification.channel == "email":
+            attachment_path = attachment_url = None
+            invoice = notification.invoice
+            if invoice and getattr(invoice, "invoice_pdf", None):
+                if settings.BREVO_USE_ATTACHMENT_URL and (notification.attachment_url or "").startswith("http"):
+                    # Brevo downloads the file itself; nothing is read or encoded here
+                    attachment_url = notification.attachment_url
+                else:
+                    attachment_path = invoice.invoice_pdf.path
 
-                result = NotificationService._send_whatsapp(
-                    renter.phone_number, full_msg
-                )
-                notification.status = result["status"]
-                notification.error_message = result.get("error_message")
+            NotificationService._send_email(
+                to_email=notification.recipient,
+                subject=notification.subject,
+                content=notification.message,
+                attachment_path=attachment_path,
+                attachment_url=attachment_url,
+            )
+            return "sent", None
 
-            else:
-                notification.status = "failed"
-                notification.error_message = f"Unsupported channel: {channel}"
+        if notification.channel == "whatsapp":
+            full_msg = notification.message.strip()
+            if notification.attachment_url:
+                full_msg += f"\n\nDownload: {notification.attachment_url.strip()}"
 
-        except Exception as e:
-            notification.status = "failed"
-            notification.error_message = str(e)
+            result = NotificationService._send_whatsapp(notification.recipient, full_msg)
+            return result["status"], result.get("error_message")
 
-        notification.save()
-        return notification
+        return "failed", f"Unsupported channel: {notification.channel}"
 
     # -------------------------
     # EMAIL (Brevo / SendinBlue)
     # -------------------------
     @staticmethod
-    def _send_email(to_email, subject, content, attachment_path=None):
-        configuration = ApiClient()
-        configuration.configuration.api_key["api-key"] = os.getenv("BREVO_API_KEY")
-
-        api_instance = TransactionalEmailsApi(configuration)
+    def _load_attachments(attachment_path=None, attachment_url=None):
+        if attachment_url:
+            return [{"url": attachment_url, "name": os.path.basename(attachment_url.split("?")[0])}]
 
         attachments = []
         if attachment_path:
             try:
-                with open(attachment_path, "rb") as f:
-                    attachments.append(
-                        {
-                            "content": base64.b64encode(f.read()).decode("utf-8"),
-                            "name": os.path.basename(attachment_path),
-                        }
-                    )
+                attachments.append(
+                    {
+                        "content": attachment_cache.get(attachment_path),
+                        "name": os.path.basename(attachment_path),
+                    }
+                )
             except Exception as e:
                 print("Attachment load failed:", e)
+        return attachments
+
+    @staticmethod
+    def _send_email(to_email, subject, content, attachment_path=None, attachment_url=None):
+        attachments = NotificationService._load_attachments(attachment_path, attachment_url)
 
         email = SendSmtpEmail(
             sender={"name": settings.FROM_NAME, "email": settings.FROM_EMAIL},
@@ -112,10 +242,36 @@ class NotificationService:
         )
 
         try:
-            api_instance.send_transac_email(email)
+            brevo_api().send_transac_email(email)
         except ApiException as e:
             raise Exception(f"Email send failed: {e}")
 
+    @staticmethod
+    def _send_email_batch(subject, content, versions, attachment_path=None):
+        """
+        One Brevo call for many recipients (messageVersions). ``subject`` and
+        ``content`` may use {{ params.x }} placeholders; ``versions`` is a list of
+        {"email": ..., "params": {...}} filled in per recipient.
+        At most BREVO_BATCH_SIZE versions per call.
+        """
+        attachments = NotificationService._load_attachments(attachment_path)
+
+        email = SendSmtpEmail(
+            sender={"name": settings.FROM_NAME, "email": settings.FROM_EMAIL},
+            subject=subject,
+            html_content=content,
+            message_versions=[
+                SendSmtpEmailMessageVersions(to=[{"email": v["email"]}], params=v.get("params") or None)
+                for v in versions
+            ],
+            attachment=attachments if attachments else None,
+        )
+
+        try:
+            brevo_api().send_transac_email(email)
+        except ApiException as e:
+            raise Exception(f"Batch email send failed: {e}")
+
     # -------------------------
     # WHATSAPP (DEV / DESKTOP)
     # -------------------------
@@ -0,0 +1,110 @@
+# payments/management/commands/bench_payments.py
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, transaction
+
+from accounts.models import User
+from buildings.models import Floor, Unit
+from invoices.models import Invoice
+from leases.models import Lease
+from leases.services import adjust_outstanding_balances
+from payments.services import allocate_payment
+from renters.models import Renter
+
+
+class Command(BaseCommand):
+    help = (
+        "Allocate many payments concurrently against one hot lease (a throwaway fixture, "
+        "removed afterwards) and report payments/second. Run it on a development database; "
+        "row locking needs PostgreSQL (SQLite serializes writers). Correctness under "
+        "concurrency is covered by payments.tests.ConcurrentAllocationTests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--payments", type=int, default=500, help="Total payments to allocate.")
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--invoices", type=int, default=50, help="Open invoices on the hot lease.")
+        parser.add_argument("--invoice-amount", type=Decimal, default=Decimal("1000.00"))
+        parser.add_argument("--amount", type=Decimal, default=Decimal("75.00"), help="Amount per payment.")
+        parser.add_argument("--keep", action="store_true", help="Keep the fixture lease for inspection.")
+
+    def handle(self, *args, **options):
+        payments, threads = max(options["payments"], 1), max(options["threads"], 1)
+        amount = options["amount"]
+        capacity = options["invoices"] * options["invoice_amount"]
+        if payments * amount > capacity:
+            raise CommandError(f"{payments} x {amount} exceeds the {capacity} open on the fixture lease.")
+
+        lease, cleanup = self._fixture(options["invoices"], options["invoice_amount"])
+        try:
+            counts = {"ok": 0, "errors": 0}
+            lock = threading.Lock()
+            per_thread = [payments // threads + (1 if i < payments % threads else 0) for i in range(threads)]
+
+            def worker(n):
+                close_old_connections()
+                try:
+                    for _ in range(n):
+                        try:
+                            allocate_payment(lease.pk, amount)
+                        except Exception as e:
+                            with lock:
+                                counts["errors"] += 1
+                            self.stderr.write(f"Allocation failed: {e}")
+                            continue
+                        with lock:
+                            counts["ok"] += 1
+                finally:
+                    close_old_connections()
+
+            workers = [threading.Thread(target=worker, args=(n,)) for n in per_thread]
+            started = time.perf_counter()
+            for t in workers:
+                t.start()
+            for t in workers:
+                t.join()
+            elapsed = time.perf_counter() - started
+
+            self.stdout.write(
+                f"{counts['ok']} payments in {elapsed:.2f}s with {threads} thread(s): "
+                f"{counts['ok'] / elapsed:.1f} payments/s ({counts['errors']} failed)"
+            )
+        finally:
+            if not options["keep"]:
+                cleanup()
+
+    def _fixture(self, invoice_count, invoice_amount):
+        """Throwaway renter/unit/lease with open invoices, created without model signals."""
+        tag = uuid.uuid4().hex[:8]
+        with transaction.atomic():
+            floor = Floor.objects.create(name=f"bench-{tag}", number=0)
+            unit = Unit.objects.create(floor=floor, name=f"bench-{tag}", unit_type="residential", status="vacant")
+            user = User.objects.create(username=f"bench-{tag}", email="")
+            renter = Renter.objects.create(
+                user=user, full_name=f"Bench {tag}", phone_number=f"bench-{tag}",
+                present_address="-", permanent_address="-", notification_preference="none",
+            )
+            [lease] = Lease.objects.bulk_create([Lease(
+                renter=renter, unit=unit, start_date="2000-01-01", rent_amount=invoice_amount, status="active",
+            )])
+            Invoice.objects.bulk_create([
+                Invoice(lease=lease, invoice_type="other", amount=invoice_amount, due_date="2000-01-10",
+                        status="unpaid", description=f"bench invoice {i}")
+                for i in range(invoice_count)
+            ])
+            adjust_outstanding_balances({lease.pk: invoice_amount * invoice_count})
+
+        def cleanup():
+            with transaction.atomic():
+                Invoice.objects.filter(lease=lease).delete()
+                lease.delete()
+                renter.delete()
+                user.delete()
+                unit.delete()
+                floor.delete()
+
+        return lease, cleanup
@@ -25,6 +25,12 @@ class Payment(BaseAuditModel):
     transaction_reference = models.CharField(max_length=100, blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Collections by period (dashboard, financial reports, rollups)
+            models.Index(fields=["payment_date"], name="payment_date_idx"),
+        ]
+
     def create(self, validated_data):
         invoice = validated_data.get('invoice')
         lease = validated_data.get('lease')
@@ -1,11 +1,21 @@
 from decimal import Decimal
+from django.db.models import F, Sum
 from rest_framework import serializers
 from invoices.services import apply_bulk_payment
 from .models import Payment
+from .services import ALLOCATABLE_STATUSES, LEASE_PAYMENT_EXCLUDED_TYPES
 from invoices.models import Invoice
 from leases.models import Lease
 
 
+class PaymentListSerializer(serializers.ModelSerializer):
+    """Table columns for payment lists (?compact=1)."""
+    class Meta:
+        model = Payment
+        fields = ["id", "invoice", "lease", "payment_date", "amount", "method", "transaction_reference"]
+        read_only_fields = fields
+
+
 class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payment
@@ -83,18 +93,17 @@ class BulkPaymentSerializer(serializers.Serializer):
         except Lease.DoesNotExist:
             raise serializers.ValidationError("Lease not found.")
 
-        # Fetch eligible invoices (Unpaid and standard types)
-        invoices = lease.invoices.exclude(
-            status="paid"
+        # Eligible invoices: the ones allocate_payment settles
+        invoices = lease.invoices.filter(
+            status__in=ALLOCATABLE_STATUSES
         ).exclude(
-            invoice_type__in=["security_deposit", "adjustment"]
-        ).order_by("invoice_date", "id")
+            invoice_type__in=LEASE_PAYMENT_EXCLUDED_TYPES
+        )
 
         # Total debt check
-        total_outstanding = sum(
-            (inv.amount - inv.paid_amount for inv in invoices),
-            Decimal("0.00")
-        )
+        total_outstanding = invoices.aggregate(
+            total=Sum(F("amount") - F("paid_amount"))
+        )["total"] or Decimal("0.00")
 
         if amount > total_outstanding:
             raise serializers.ValidationError(
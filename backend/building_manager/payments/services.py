@@ -0,0 +1,392 @@
+# payments/services.py
+"""
+Payment allocation engine.
+
+Every payment that moves Invoice.paid_amount goes through this module: the
+target invoices are locked once (SELECT ... FOR UPDATE, in id order), the
+split is computed in memory and written back with a single bulk_update,
+followed by one F() update of the lease ledger. Concurrent payments on the
+same lease therefore queue on the row locks instead of overwriting each
+other's paid_amount.
+"""
+import csv
+import io
+import logging
+import re
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from dashboard.services import PARTS_BY_MODEL, mark_dashboard_dirty
+from invoices.models import Invoice
+from leases.models import Lease
+from leases.services import adjust_outstanding_balances, ledger_balance, record_lease_payment
+from payments.models import Payment
+from reports.services.rollup_service import mark_rollup_dirty
+
+logger = logging.getLogger(__name__)
+
+ALLOCATABLE_STATUSES = ("unpaid", "partially_paid")
+# Lease-wide payments settle rent/other invoices only
+LEASE_PAYMENT_EXCLUDED_TYPES = ("security_deposit", "adjustment")
+
+
+# -----------------------------
+# Allocation engine
+# -----------------------------
+def _lock_invoices(lease_ids=(), invoice_ids=()):
+    """
+    Lock the open invoices of ``lease_ids`` plus the explicit ``invoice_ids``
+    in one query. Rows are locked in id order (same for every caller, so no
+    lock-order deadlocks). Returns (open invoices by lease oldest first, invoices by id).
+    """
+    open_invoices = Q(lease_id__in=lease_ids, status__in=ALLOCATABLE_STATUSES) & ~Q(
+        invoice_type__in=LEASE_PAYMENT_EXCLUDED_TYPES
+    )
+    invoices = list(
+        Invoice.objects.select_for_update()
+        .filter(open_invoices | Q(pk__in=invoice_ids))
+        .order_by("id")
+    )
+
+    by_lease = defaultdict(list)
+    for invoice in sorted(invoices, key=lambda inv: (inv.invoice_date, inv.id)):
+        if invoice.lease_id in lease_ids and invoice.status in ALLOCATABLE_STATUSES \
+                and invoice.invoice_type not in LEASE_PAYMENT_EXCLUDED_TYPES:
+            by_lease[invoice.lease_id].append(invoice)
+    return by_lease, {invoice.pk: invoice for invoice in invoices}
+
+
+def _apply(invoices, amount, touched, ledger_deltas):
+    """
+    Split ``amount`` over ``invoices`` in order (in memory). Changed invoices
+    are collected in ``touched`` and their ledger change in ``ledger_deltas``.
+    Returns (allocations, unapplied).
+    """
+    remaining = Decimal(amount or 0)
+    allocations = []
+    for invoice in invoices:
+        if remaining <= 0:
+            break
+        balance = invoice.amount - invoice.paid_amount
+        if balance <= 0:
+            continue
+
+        applied = min(balance, remaining)
+        before = ledger_balance(*invoice.ledger_state[1:])
+        invoice.paid_amount += applied
+        invoice.status = "paid" if invoice.paid_amount >= invoice.amount else "partially_paid"
+        ledger_deltas[invoice.lease_id] += ledger_balance(*invoice.ledger_state[1:]) - before
+        touched[invoice.pk] = invoice
+        allocations.append((invoice, applied))
+        remaining -= applied
+    return allocations, remaining
+
+
+def _save_allocations(touched, ledger_deltas):
+    """Write every changed invoice in one bulk_update and settle what post_save would have."""
+    if not touched:
+        return
+    invoices = list(touched.values())
+    Invoice.objects.bulk_update(invoices, ["paid_amount", "status"], batch_size=settings.BILLING_BATCH_SIZE)
+
+    adjust_outstanding_balances(ledger_deltas)
+    for invoice in invoices:
+        invoice._loaded_ledger = invoice.ledger_state
+    mark_dashboard_dirty(*PARTS_BY_MODEL["invoice"])
+    mark_rollup_dirty(*{invoice.invoice_date for invoice in invoices})
+
+    deposit_paid = {inv.lease_id for inv in invoices if inv.invoice_type == "security_deposit" and inv.status == "paid"}
+    if deposit_paid:
+        Lease.objects.filter(pk__in=deposit_paid).exclude(deposit_status="paid").update(deposit_status="paid")
+
+
+def allocate_payment(lease_id, amount, invoice_id=None):
+    """
+    Apply ``amount`` to one invoice (``invoice_id``) or to the lease's open
+    invoices, oldest first. Runs in its own (nested) atomic block.
+
+    Returns (allocations, unapplied) where allocations is a list of
+    (invoice, applied_amount) for the invoices that changed.
+    """
+    touched, ledger_deltas = {}, defaultdict(Decimal)
+    with transaction.atomic():
+        if invoice_id:
+            _, by_id = _lock_invoices(invoice_ids=[invoice_id])
+            targets = [inv for inv in by_id.values() if inv.lease_id == lease_id]
+        else:
+            by_lease, _ = _lock_invoices(lease_ids=[lease_id])
+            targets = by_lease[lease_id]
+
+        allocations, remaining = _apply(targets, amount, touched, ledger_deltas)
+        _save_allocations(touched, ledger_deltas)
+    return allocations, remaining
+
+
+# -----------------------------
+# Statement import
+# -----------------------------
+# Accepted column names for each statement field (compared ignoring case, spaces, "_" and "-")
+IMPORT_COLUMNS = {
+    "amount": ("amount", "credit", "paid_amount"),
+    "transaction_reference": ("transaction_reference", "reference", "trx_id", "txn_id", "transaction_id"),
+    "phone": ("phone", "phone_number", "sender", "msisdn", "mobile"),
+    "lease_id": ("lease_id", "lease"),
+    "invoice_number": ("invoice_number", "invoice"),
+    "method": ("method",),
+    "date": ("date", "transaction_date", "payment_date"),
+    "notes": ("notes", "remarks", "description"),
+}
+PHONE_DIGITS = 10  # numbers match on their last 10 digits (017..., +88017..., 88017...)
+
+
+class StatementError(ValueError):
+    """The uploaded statement could not be read at all."""
+
+
+def _normalize_phone(value):
+    digits = re.sub(r"\D", "", str(value or ""))
+    return digits[-PHONE_DIGITS:] if len(digits) >= PHONE_DIGITS else None
+
+
+def _column_key(name):
+    return re.sub(r"[\s_\-]", "", str(name)).lower()
+
+
+def _normalize_row(raw):
+    keys = {_column_key(k): v for k, v in raw.items() if k is not None}
+    row = {}
+    for field, names in IMPORT_COLUMNS.items():
+        value = next((keys[_column_key(n)] for n in names if keys.get(_column_key(n)) not in (None, "")), None)
+        row[field] = value.strip() if isinstance(value, str) else value
+    return row
+
+
+def parse_statement(upload=None, data=None):
+    """
+    Statement rows from an uploaded CSV file or a JSON body (a list of rows
+    or {"rows": [...]}). Column names are matched through IMPORT_COLUMNS.
+    """
+    if upload is not None:
+        try:
+            text = upload.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise StatementError("The statement file must be UTF-8 encoded CSV.")
+        rows = list(csv.DictReader(io.StringIO(text)))
+    else:
+        rows = data.get("rows") if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise StatementError("Send a CSV file or a JSON list of rows.")
+
+    if not rows:
+        raise StatementError("The statement has no rows.")
+    if len(rows) > settings.PAYMENT_IMPORT_MAX_ROWS:
+        raise StatementError(f"A statement may have at most {settings.PAYMENT_IMPORT_MAX_ROWS} rows.")
+    return [_normalize_row(r) for r in rows]
+
+
+def _match_rows(rows):
+    """
+    Resolve every row to (lease_id, invoice_id) or a reason it cannot be used.
+    Lookups are done in bulk: one query each for already-imported references,
+    referenced invoices, renter phones and their active leases.
+    """
+    refs = {r["transaction_reference"] for r in rows if r["transaction_reference"]}
+    invoice_refs = refs | {r["invoice_number"] for r in rows if r["invoice_number"]}
+
+    imported = set(
+        Payment.objects.filter(transaction_reference__in=refs).values_list("transaction_reference", flat=True)
+    ) if refs else set()
+
+    invoices = {}
+    if invoice_refs:
+        for pk, lease_id, number, reference in Invoice.objects.filter(
+                Q(invoice_number__in=invoice_refs) | Q(reference_number__in=invoice_refs)
+        ).values_list("pk", "lease_id", "invoice_number", "reference_number"):
+            for key in (number, reference):
+                if key:
+                    invoices[key] = (lease_id, pk)
+
+    renters_by_phone = defaultdict(set)
+    if any(r["phone"] for r in rows):
+        wanted = {_normalize_phone(r["phone"]) for r in rows} - {None}
+        from renters.models import Renter
+        for renter_id, phone in Renter.objects.values_list("pk", "phone_number"):
+            normalized = _normalize_phone(phone)
+            if normalized in wanted:
+                renters_by_phone[normalized].add(renter_id)
+
+    active_leases = defaultdict(list)
+    renter_ids = set().union(*renters_by_phone.values()) if renters_by_phone else set()
+    for renter_id, lease_id in Lease.objects.filter(renter_id__in=renter_ids, status="active").values_list(
+            "renter_id", "pk"):
+        active_leases[renter_id].append(lease_id)
+
+    lease_ids = {int(r["lease_id"]) for r in rows if str(r["lease_id"] or "").isdigit()}
+    existing_leases = set(Lease.objects.filter(pk__in=lease_ids).values_list("pk", flat=True))
+
+    seen_refs = set()
+    for row in rows:
+        ref = row["transaction_reference"]
+        if ref and (ref in imported or ref in seen_refs):
+            row["status"], row["reason"] = "duplicate", "transaction_reference already imported"
+            continue
+
+        try:
+            row["amount"] = Decimal(str(row["amount"]).replace(",", ""))
+        except (InvalidOperation, TypeError, ValueError):
+            row["status"], row["reason"] = "invalid", "amount is missing or not a number"
+            continue
+        if row["amount"] <= 0:
+            row["status"], row["reason"] = "invalid", "amount must be positive"
+            continue
+
+        raw_lease = str(row["lease_id"] or "")
+        row["lease_id"] = row["invoice_id"] = None
+        reason = "no invoice, lease or renter phone matched"
+        for key in (row["invoice_number"], ref):
+            if key in invoices:
+                row["lease_id"], row["invoice_id"] = invoices[key]
+                break
+        else:
+            phone = _normalize_phone(row["phone"])
+            if raw_lease.isdigit() and int(raw_lease) in existing_leases:
+                row["lease_id"] = int(raw_lease)
+            elif phone in renters_by_phone:
+                candidates = [lease for renter in renters_by_phone[phone] for lease in active_leases[renter]]
+                if len(candidates) == 1:
+                    row["lease_id"] = candidates[0]
+                else:
+                    reason = (
+                        "renter has no active lease" if not candidates
+                        else "renter has several active leases; add lease_id or invoice_number"
+                    )
+
+        if row["lease_id"] is None:
+            row["status"], row["reason"] = "unmatched", reason
+        else:
+            row["status"], row["reason"] = "matched", None
+            if ref:
+                seen_refs.add(ref)
+    return rows
+
+
+def import_payments(rows, executed_by=None, method="mobile", dry_run=False):
+    """
+    Match statement rows to leases and allocate them in one transaction.
+
+    Open invoices of every matched lease are locked once and the rows are
+    applied in statement order (same rules as allocate_payment). Invoices and
+    the lease ledger are written in bulk and one Payment per row is
+    bulk-inserted, so the per-payment signal (TaskLog, PDF, email) does not
+    run; the touched invoices are handed to the render + "payment update"
+    pipeline after commit instead, under a single TaskLog for the import.
+    With ``dry_run`` the transaction is rolled back and only the report is returned.
+
+    Returns the reconciliation report {"task_log_id", "dry_run", "summary", "rows"}.
+    """
+    from invoices.tasks import dispatch_invoice_pipelines, notify_invoice_payment
+    from scheduling.models import TaskLog
+
+    rows = _match_rows(rows)
+    matched = [r for r in rows if r["status"] == "matched"]
+
+    task_log = None
+    if not dry_run:
+        task_log = TaskLog.objects.create(
+            task_name="PAYMENT_IMPORT", status="STARTED", executed_by=executed_by,
+            message=f"Importing {len(rows)} statement rows",
+        )
+
+    touched, ledger_deltas = {}, defaultdict(Decimal)
+    try:
+        with transaction.atomic():
+            by_lease, by_id = _lock_invoices(
+                lease_ids={r["lease_id"] for r in matched if not r["invoice_id"]},
+                invoice_ids={r["invoice_id"] for r in matched if r["invoice_id"]},
+            )
+
+            payments = []
+            for row in matched:
+                targets = [by_id[row["invoice_id"]]] if row["invoice_id"] else by_lease[row["lease_id"]]
+                allocations, unapplied = _apply(targets, row["amount"], touched, ledger_deltas)
+                row["applied"] = row["amount"] - unapplied
+                row["unapplied"] = unapplied
+                row["invoices"] = [
+                    {"invoice_id": inv.pk, "invoice_number": inv.invoice_number,
+                     "amount_applied": f"{applied:.2f}", "status": inv.status}
+                    for inv, applied in allocations
+                ]
+                row["status"] = "applied" if not unapplied else ("partially_applied" if allocations else "unapplied")
+                notes = [row["notes"], f"Statement date: {row['date']}" if row["date"] else None, "Imported statement"]
+                payments.append(Payment(
+                    lease_id=row["lease_id"],
+                    invoice_id=row["invoice_id"] or (allocations[0][0].pk if len(allocations) == 1 else None),
+                    amount=row["amount"],
+                    method=row["method"] if row["method"] in dict(Payment.METHOD_CHOICES) else method,
+                    transaction_reference=row["transaction_reference"],
+                    notes=" | ".join(n for n in notes if n),
+                    created_by=executed_by,
+                ))
+
+            _save_allocations(touched, ledger_deltas)
+            Payment.objects.bulk_create(payments, batch_size=settings.BILLING_BATCH_SIZE)
+
+            last_paid = {}
+            for payment in payments:
+                last_paid[payment.lease_id] = max(payment.created_at, last_paid.get(payment.lease_id, payment.created_at))
+            for lease_id, paid_at in last_paid.items():
+                record_lease_payment(lease_id, paid_at)
+            if payments:
+                mark_dashboard_dirty(*PARTS_BY_MODEL["payment"])
+
+            if dry_run:
+                transaction.set_rollback(True)
+            else:
+                invoice_ids, task_log_id = list(touched), task_log.pk
+                transaction.on_commit(lambda: dispatch_invoice_pipelines(
+                    invoice_ids, notify_invoice_payment, task_log_id=task_log_id
+                ))
+    except Exception as exc:
+        if task_log:
+            task_log.status = "FAILURE"
+            task_log.message = f"Error: {str(exc)}"
+            task_log.save(update_fields=["status", "message"])
+        logger.exception(f"Payment import failed: {exc}")
+        raise
+
+    summary = {
+        "rows": len(rows),
+        "applied_total": f'{sum((r.get("applied", 0) for r in rows), Decimal("0.00")):.2f}',
+        "unapplied_total": f'{sum((r.get("unapplied", 0) for r in rows), Decimal("0.00")):.2f}',
+        "invoices_updated": len(touched),
+    }
+    for status in ("applied", "partially_applied", "unapplied", "duplicate", "unmatched", "invalid"):
+        summary[status] = sum(1 for r in rows if r["status"] == status)
+
+    if task_log:
+        task_log.status = "SUCCESS"
+        task_log.message = (
+            f"Imported {len(payments)} of {len(rows)} statement rows: {summary['applied_total']} applied, "
+            f"{summary['unapplied_total']} unapplied, {summary['unmatched']} unmatched, "
+            f"{summary['duplicate']} duplicate, {summary['invalid']} invalid."
+        )
+        task_log.save(update_fields=["status", "message"])
+        logger.info(task_log.message)
+
+    report_fields = (
+        "status", "reason", "transaction_reference", "phone", "lease_id", "invoice_id",
+        "amount", "applied", "unapplied", "invoices",
+    )
+    return {
+        "task_log_id": task_log.pk if task_log else None,
+        "dry_run": dry_run,
+        "summary": summary,
+        "rows": [
+            {"row": i, **{k: (f"{row[k]:.2f}" if isinstance(row.get(k), Decimal) else row.get(k)) for k in report_fields}}
+            for i, row in enumerate(rows, start=1)
+        ],
+    }
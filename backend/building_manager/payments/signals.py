@@ -1,15 +1,17 @@
 import logging
 from decimal import Decimal
 from django.conf import settings
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from rest_framework import request
 
-from invoices.services import generate_invoice_pdf
+from invoices.tasks import dispatch, invoice_pipeline, notify_invoice_payment
 from notifications.utils import NotificationService
 from payments.models import Payment
+from payments.services import allocate_payment
 from leases.models import Lease
-from scheduling.api.views import get_email_message, get_whatsapp_message
+from leases.services import record_lease_payment
 from scheduling.models import TaskLog
 
 logger = logging.getLogger(__name__)
@@ -41,18 +43,15 @@ def update_invoice_and_lease(sender, instance: Payment, created, **kwargs):
             task_log.save()
             return
 
+        # Allocation (row-locked, see payments.services); apply_bulk_payment allocates before saving
+        if getattr(instance, "_allocation_applied", False):
+            allocations = [(instance.invoice, payment_amount)]
+        else:
+            allocations, _ = allocate_payment(lease.pk, payment_amount, invoice_id=instance.invoice_id)
+
         # SINGLE-INVOICE Logic
         if instance.invoice_id:
-            invoice = instance.invoice
-            balance = invoice.amount - invoice.paid_amount
-            applied = min(balance, payment_amount)
-            invoice.paid_amount += applied
-            invoice.status = "paid" if invoice.paid_amount >= invoice.amount else "partially_paid"
-            invoice.save(update_fields=["paid_amount", "status"])
-
-            if invoice.invoice_type == "security_deposit" and invoice.status == "paid":
-                lease.deposit_status = "paid"
-                lease.save(update_fields=["deposit_status"])
+            invoice = allocations[0][0] if allocations else instance.invoice
 
             # Pass task_log to the helper
             notify_single_invoice(invoice, task_log=task_log)
@@ -63,23 +62,7 @@ def update_invoice_and_lease(sender, instance: Payment, created, **kwargs):
             return
 
         # BULK PAYMENT Logic
-        invoices = lease.invoices.filter(status__in=["unpaid", "partially_paid"]).exclude(
-            invoice_type__in=["security_deposit", "adjustment"]
-        ).order_by("invoice_date", "id")
-
-        updated_invoices = []
-        for inv in invoices:
-            if payment_amount <= 0: break
-            balance = inv.amount - inv.paid_amount
-            if balance <= 0: continue
-
-            applied = min(balance, payment_amount)
-            inv.paid_amount += applied
-            payment_amount -= applied
-            inv.status = "paid" if inv.paid_amount >= inv.amount else "partially_paid"
-            inv.save(update_fields=["paid_amount", "status"])
-            updated_invoices.append(inv)
-
+        updated_invoices = [inv for inv, _ in allocations]
         if updated_invoices:
             # Pass task_log to the helper
             send_bulk_payment_summary(updated_invoices, task_log=task_log)
@@ -95,43 +78,30 @@ def update_invoice_and_lease(sender, instance: Payment, created, **kwargs):
         logger.exception(f"Payment signal error: {e}")
 
 
+@receiver(post_save, sender=Payment)
+def update_lease_last_payment(sender, instance: Payment, created, **kwargs):
+    if not created:
+        return
+    lease_id = instance.lease_id or (instance.invoice.lease_id if instance.invoice_id else None)
+    if lease_id:
+        record_lease_payment(lease_id, instance.created_at)
+
+
 # -------------------------
 # Helpers
 # -------------------------
 def notify_single_invoice(invoice, task_log=None): # Added task_log param
-    renter = invoice.lease.renter
-    user = getattr(renter, "user", None)
-
+    """
+    Re-render the invoice PDF on the render queue and send the payment update
+    once the render has finished, without blocking the payment request.
+    """
+    invoice_id, task_log_id = invoice.pk, task_log.pk if task_log else None
     try:
-        generate_invoice_pdf(invoice)
-        attachment_url = _get_attachment_url(invoice.invoice_pdf.url if invoice.invoice_pdf else None)
-
-        if getattr(renter, "prefers_email", False) and renter.user.email:
-            subject, body = get_email_message(invoice, renter, "invoice_payment_update")
-            NotificationService.send(
-                notification_type="invoice_payment_update",
-                renter=renter,
-                channel="email",
-                subject=subject,
-                message=body,
-                invoice=invoice,
-                sent_by=user,
-                attachment_url=attachment_url,
-                task_log=task_log,  # <--- LINKED!
-            )
-
-        if getattr(renter, "prefers_whatsapp", False) and renter.phone_number:
-            message = get_whatsapp_message(invoice, renter, "invoice_payment_update")
-            NotificationService.send(
-                notification_type="invoice_payment_update",
-                renter=renter,
-                channel="whatsapp",
-                message=message,
-                invoice=invoice,
-                sent_by=user,
-                attachment_url=attachment_url,
-                task_log=task_log # <--- LINKED!
-            )
+        transaction.on_commit(lambda: dispatch(invoice_pipeline(
+            invoice_id,
+            notify_invoice_payment,
+            task_log_id=task_log_id,  # <--- LINKED!
+        )))
     except Exception as e:
         logger.exception(f"Failed to notify: {e}")
 
@@ -207,11 +177,3 @@ def send_bulk_payment_summary(invoices, task_log=None ):
     except Exception as e:
         logger.exception(f"Failed to send bulk summary: {e}")
 
-
-def _get_attachment_url(pdf_url):
-    if not pdf_url:
-        return None
-    if pdf_url.startswith("http"):
-        return pdf_url
-    site_url = getattr(settings, "SITE_URL", "").rstrip("/")
-    return f"{site_url}{pdf_url}" if site_url else None
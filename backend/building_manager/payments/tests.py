@@ -1,3 +1,84 @@
-from django.test import TestCase
+import threading
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.db import connection
+from django.db.models import Count, F, Q, Sum
+from django.test import TransactionTestCase
+
+from accounts.models import User
+from buildings.models import Floor, Unit
+from invoices.models import Invoice
+from leases.models import Lease
+from leases.services import adjust_outstanding_balances, find_ledger_drift
+from payments.services import allocate_payment
+from renters.models import Renter
+
+
+@skipUnless(connection.vendor == "postgresql", "row locking needs PostgreSQL (SQLite serializes writers)")
+class ConcurrentAllocationTests(TransactionTestCase):
+    """Several threads allocate payments against one lease at the same time."""
+
+    THREADS = 8
+    PAYMENTS_PER_THREAD = 10
+    INVOICES = 20
+    INVOICE_AMOUNT = Decimal("1000.00")
+    AMOUNT = Decimal("75.00")
+
+    def setUp(self):
+        # Built without model signals, like the bench_payments fixture
+        floor = Floor.objects.create(name="alloc-test", number=0)
+        unit = Unit.objects.create(floor=floor, name="alloc-test", unit_type="residential", status="vacant")
+        user = User.objects.create(username="alloc-test", email="")
+        renter = Renter.objects.create(
+            user=user, full_name="Allocation Test", phone_number="alloc-test",
+            present_address="-", permanent_address="-", notification_preference="none",
+        )
+        [self.lease] = Lease.objects.bulk_create([Lease(
+            renter=renter, unit=unit, start_date="2000-01-01", rent_amount=self.INVOICE_AMOUNT, status="active",
+        )])
+        Invoice.objects.bulk_create([
+            Invoice(lease=self.lease, invoice_type="other", amount=self.INVOICE_AMOUNT, due_date="2000-01-10",
+                    status="unpaid", description=f"allocation test {i}")
+            for i in range(self.INVOICES)
+        ])
+        adjust_outstanding_balances({self.lease.pk: self.INVOICE_AMOUNT * self.INVOICES})
+
+    def test_concurrent_allocations_apply_every_payment_once(self):
+        applied, errors = [], []
+        lock = threading.Lock()
+        start = threading.Barrier(self.THREADS)
+
+        def worker():
+            try:
+                start.wait()
+                for _ in range(self.PAYMENTS_PER_THREAD):
+                    allocations, unapplied = allocate_payment(self.lease.pk, self.AMOUNT)
+                    with lock:
+                        applied.append((sum(amount for _, amount in allocations), unapplied))
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+
+        payments = self.THREADS * self.PAYMENTS_PER_THREAD
+        self.assertEqual(errors, [])
+        self.assertEqual(len(applied), payments)
+        # Nothing lost: each payment was applied in full (the lease has room for all of them)
+        self.assertEqual(applied, [(self.AMOUNT, Decimal("0.00"))] * payments)
+
+        totals = Invoice.objects.filter(lease=self.lease).aggregate(
+            paid=Sum("paid_amount"),
+            overpaid=Count("id", filter=Q(paid_amount__gt=F("amount"))),
+        )
+        # Nothing doubled: the invoices record exactly what was applied
+        self.assertEqual(totals["paid"], self.AMOUNT * payments)
+        self.assertEqual(totals["overpaid"], 0)
+        self.assertEqual(find_ledger_drift(lease_ids=[self.lease.pk]), [])
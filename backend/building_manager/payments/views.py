@@ -1,25 +1,29 @@
 # payments/views.py
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
 
-from common.pagination import CustomPagination
+from common.mixins import FieldSelectionMixin
+from common.pagination import KeysetPagination
 from permissions.drf import RoleBasedPermission
 from permissions.mixins import RenterAccessMixin
 from .models import Payment
 from permissions.custom_permissions import IsStaffOrReadOnlyForPayment
-from .serializers import PaymentSerializer, BulkPaymentSerializer
+from .serializers import PaymentListSerializer, PaymentSerializer, BulkPaymentSerializer
+from .services import StatementError, import_payments, parse_statement
 
 
 @extend_schema(tags=["Payments"])
-class PaymentViewSet(RenterAccessMixin,viewsets.ModelViewSet):
+class PaymentViewSet(FieldSelectionMixin, RenterAccessMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all().order_by("-payment_date", "-id")
     serializer_class = PaymentSerializer
+    list_serializer_class = PaymentListSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ["method", "invoice", "lease"]
     search_fields = ["transaction_reference", "notes"]
@@ -43,3 +47,27 @@ class PaymentViewSet(RenterAccessMixin,viewsets.ModelViewSet):
             "payments_created": [p.id for p in payments],
             "allocation": allocation
         }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="import",
+            parser_classes=[JSONParser, MultiPartParser, FormParser])
+    def import_statement(self, request):
+        """
+        Import a bank / mobile-money statement: a CSV upload ("file") or JSON rows.
+        Rows are matched by invoice number / transaction reference, lease_id or
+        renter phone and allocated in one transaction. Returns a reconciliation
+        report; ?dry_run=1 builds the report without saving anything.
+        """
+        try:
+            rows = parse_statement(upload=request.FILES.get("file"), data=request.data)
+        except StatementError as e:
+            return Response({"status": "error", "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get("dry_run") in ("1", "true", "True")
+        method = request.query_params.get("method", "mobile")
+        if method not in dict(Payment.METHOD_CHOICES):
+            return Response({"status": "error", "message": f"Unknown method '{method}'."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        report = import_payments(rows, executed_by=request.user, method=method, dry_run=dry_run)
+        return Response({"status": "success", **report},
+                        status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
@@ -1,6 +1,55 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
+from django.conf import settings
+from django.core.cache import cache
+
 from .models import AppPermission
 
+# Permission matrix cache: {(app_label, model_name): (create, read, update, delete)} per user,
+# invalidated by permissions.signals whenever a user's AppPermission rows change.
+MATRIX_CACHE_KEY = "permissions:matrix:{}"
+METHOD_ACTIONS = {"POST": 0, "PUT": 2, "PATCH": 2, "DELETE": 3}
+_view_models = {}
+
+
+def permission_matrix_key(user_id):
+    return MATRIX_CACHE_KEY.format(user_id)
+
+
+def load_permission_matrix(user):
+    """All of a staff user's AppPermission rows as a dict, from the cache when warm (one query when cold)."""
+    key = permission_matrix_key(user.pk)
+    matrix = cache.get(key)
+    if matrix is None:
+        matrix = {}
+        # First row per (app, model) wins, as the old .filter(...).first() lookup did
+        for app_label, model_name, *flags in AppPermission.objects.filter(
+                role="staff", assigned_to=user
+        ).order_by("pk").values_list("app_label", "model_name", "can_create", "can_read", "can_update", "can_delete"):
+            matrix.setdefault((app_label.lower(), model_name.lower()), tuple(flags))
+        cache.set(key, matrix, settings.PERMISSION_CACHE_TTL)
+    return matrix
+
+
+def _request_matrix(request):
+    """Matrix memoized on the request, so object-level checks in the same request are free."""
+    matrix = getattr(request, "_permission_matrix", None)
+    if matrix is None:
+        matrix = load_permission_matrix(request.user)
+        request._permission_matrix = matrix
+    return matrix
+
+
+def _view_model(view):
+    model_cls = getattr(getattr(view, "queryset", None), "model", None)
+    if model_cls:
+        return model_cls
+    # Only views without a static queryset need get_queryset(); remember the model per view class
+    view_cls = type(view)
+    if view_cls not in _view_models and hasattr(view, "get_queryset"):
+        _view_models[view_cls] = getattr(view.get_queryset(), "model", None)
+    return _view_models.get(view_cls)
+
+
 class RoleBasedPermission(BasePermission):
 
     def has_permission(self, request, view):
@@ -12,10 +61,7 @@ class RoleBasedPermission(BasePermission):
             return True
 
         # Determine model from view
-        model_cls = getattr(getattr(view, "queryset", None), "model", None)
-        if not model_cls and hasattr(view, "get_queryset"):
-            qs = view.get_queryset()
-            model_cls = getattr(qs, "model", None)
+        model_cls = _view_model(view)
         if not model_cls:
             return False
 
@@ -23,23 +69,14 @@ class RoleBasedPermission(BasePermission):
         model_name = model_cls.__name__
 
         if user.is_staff:
-            perms = AppPermission.objects.filter(
-                role="staff",
-                app_label__iexact=app_label,
-                model_name__iexact=model_name,
-                assigned_to__in=[user]
-            ).first()
+            perms = _request_matrix(request).get((app_label.lower(), model_name.lower()))
             if not perms:
                 return False
 
             if request.method in SAFE_METHODS:
-                return perms.can_read
-            if request.method == "POST":
-                return perms.can_create
-            if request.method in ["PUT", "PATCH"]:
-                return perms.can_update
-            if request.method == "DELETE":
-                return perms.can_delete
+                return perms[1]
+            if request.method in METHOD_ACTIONS:
+                return perms[METHOD_ACTIONS[request.method]]
 
         # renter read-only handled separately
         if getattr(user, "is_renter", False):
@@ -1,12 +1,74 @@
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework.exceptions import PermissionDenied
 
+# Renter access scope cache; invalidated by permissions.signals when a renter's leases change
+RENTER_SCOPE_CACHE_KEY = "permissions:renter-scope:{}"
+
+
+def renter_scope_key(user_id):
+    return RENTER_SCOPE_CACHE_KEY.format(user_id)
+
+
+def load_renter_scope(user):
+    """
+    Everything a renter may see, as primary-key sets:
+    {"renter_ids", "lease_ids", "active_lease_ids", "unit_ids", "floor_ids"}.
+    One query when cold, cached per user.
+    """
+    key = renter_scope_key(user.pk)
+    scope = cache.get(key)
+    if scope is None:
+        from leases.models import Lease
+        scope = {name: set() for name in ("renter_ids", "lease_ids", "active_lease_ids", "unit_ids", "floor_ids")}
+        for lease_id, status, renter_id, unit_id, floor_id in Lease.objects.filter(renter__user=user).values_list(
+                "pk", "status", "renter_id", "unit_id", "unit__floor_id"):
+            scope["renter_ids"].add(renter_id)
+            scope["lease_ids"].add(lease_id)
+            scope["unit_ids"].add(unit_id)
+            scope["floor_ids"].add(floor_id)
+            if status == "active":
+                scope["active_lease_ids"].add(lease_id)
+        cache.set(key, scope, settings.RENTER_SCOPE_CACHE_TTL)
+    return scope
+
+
+def _scope_rule(model):
+    """(field, scope key) restricting ``model`` to a renter; same precedence as the old join filters."""
+    from buildings.models import Unit
+    from renters.models import Renter
+
+    if model is Renter:
+        return "pk", "renter_ids"
+    if model is Unit:
+        return "pk", "unit_ids"
+    for attr, field, key in (
+            ("renter", "renter_id", "renter_ids"),
+            ("lease", "lease_id", "lease_ids"),
+            ("unit", "unit_id", "unit_ids"),
+            ("floor", "floor_id", "floor_ids"),
+    ):
+        if hasattr(model, attr):
+            return field, key
+    return None
+
+
 class RenterAccessMixin:
     """
     Restrict renter access:
     - Staff/admin: see all
     - Renter: only their own data, and only if they have an active lease
+    The renter's scope is resolved once per request (cached per user) and
+    applied as primary-key filters.
     """
 
+    def get_renter_scope(self):
+        scope = getattr(self.request, "_renter_scope", None)
+        if scope is None:
+            scope = load_renter_scope(self.request.user)
+            self.request._renter_scope = scope
+        return scope
+
     def get_queryset(self):
         qs = super().get_queryset()
         user = self.request.user
@@ -17,37 +79,18 @@ class RenterAccessMixin:
 
         # Renter restrictions
         if getattr(user, "is_renter", False):
-            # Check if renter has any active lease
-            from leases.models import Lease
-            has_active_lease = Lease.objects.filter(
-                renter__user=user,
-                status="active"
-            ).exists()
-
-            if not has_active_lease:
+            scope = self.get_renter_scope()
+            if not scope["active_lease_ids"]:
                 # If no active lease, renter sees nothing
                 return qs.none()
 
-            # Restrict by related renter/lease
-            model = qs.model
-
-            if hasattr(model, "renter"):
-                return qs.filter(renter__user=user)
-
-            if hasattr(model, "lease"):
-                return qs.filter(lease__renter__user=user)
-
-            if hasattr(model, "leases"):
-                return qs.filter(leases__renter__user=user)
-
-            if hasattr(model, "unit"):
-                return qs.filter(unit__leases__renter__user=user)
-
-            if hasattr(model, "floor"):
-                return qs.filter(floor__units__leases__renter__user=user)
-
-            # Fallback → no data
-            return qs.none()
+            # Restrict by related renter/lease/unit/floor ids
+            rule = _scope_rule(qs.model)
+            if rule is None:
+                # Fallback → no data
+                return qs.none()
+            field, key = rule
+            return qs.filter(**{f"{field}__in": scope[key]})
 
         return qs.none()
 
@@ -59,8 +102,10 @@ class RenterAccessMixin:
             return obj
 
         if getattr(user, "is_renter", False):
-            qs = self.filter_queryset(self.get_queryset())
-            if not qs.filter(pk=obj.pk).exists():
+            # Checked against the scope in memory instead of re-querying
+            scope = self.get_renter_scope()
+            rule = _scope_rule(type(obj))
+            if not scope["active_lease_ids"] or rule is None or getattr(obj, rule[0]) not in scope[rule[1]]:
                 raise PermissionDenied("You do not have access to this object.")
 
         return obj
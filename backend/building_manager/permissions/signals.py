@@ -0,0 +1,68 @@
+# permissions/signals.py
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from leases.models import Lease
+from renters.models import Renter
+
+from .drf import permission_matrix_key
+from .mixins import renter_scope_key
+from .models import AppPermission
+
+
+def invalidate_permission_matrix(user_ids):
+    """Drop the cached matrices now and again after commit (a concurrent request may re-cache old rows)."""
+    keys = [permission_matrix_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+@receiver(post_save, sender=AppPermission)
+@receiver(pre_delete, sender=AppPermission)
+def app_permission_changed(sender, instance, **kwargs):
+    invalidate_permission_matrix(instance.assigned_to.values_list("pk", flat=True))
+
+
+@receiver(m2m_changed, sender=AppPermission.assigned_to.through)
+def app_permission_assignment_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # user.custom_permissions.add/remove/clear(...): only that user's matrix changes
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_permission_matrix([instance.pk])
+    elif action in ("post_add", "post_remove"):
+        invalidate_permission_matrix(pk_set or [])
+    elif action == "pre_clear":
+        invalidate_permission_matrix(instance.assigned_to.values_list("pk", flat=True))
+
+
+# -----------------------------
+# Renter access scope (RenterAccessMixin)
+# -----------------------------
+def invalidate_renter_scope(renter_ids):
+    """Drop the cached scopes of the users behind ``renter_ids``, now and after commit."""
+    renter_ids = {pk for pk in renter_ids if pk}
+    if not renter_ids:
+        return
+    keys = [renter_scope_key(user_id) for user_id in Renter.objects.filter(pk__in=renter_ids).values_list("user_id", flat=True)]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+@receiver(pre_save, sender=Lease)
+def remember_lease_renter(sender, instance, **kwargs):
+    # A lease moved to another renter must also leave the previous renter's scope
+    instance._scope_previous_renter_id = None
+    if instance.pk and not instance._state.adding:
+        instance._scope_previous_renter_id = (
+            Lease.objects.filter(pk=instance.pk).values_list("renter_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Lease)
+@receiver(post_delete, sender=Lease)
+def lease_scope_changed(sender, instance, **kwargs):
+    invalidate_renter_scope([instance.renter_id, getattr(instance, "_scope_previous_renter_id", None)])
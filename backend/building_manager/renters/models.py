@@ -86,6 +86,9 @@ class Renter(BaseAuditModel):
     profile_pic = models.ImageField(upload_to=renter_profile_upload_path, blank=True, null=True)
     nid_scan = models.FileField(upload_to=renter_nid_upload_path, blank=True, null=True)
 
+    # Set by the overdue engine (scheduling.overdue); renters notified recently are skipped on re-runs
+    last_overdue_notice_at = models.DateTimeField(blank=True, null=True)
+
     # ----------------------------
     # Helper properties
     # ----------------------------
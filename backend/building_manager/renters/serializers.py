@@ -7,6 +7,16 @@ from renters.models import Renter
 User = get_user_model()
 
 
+class RenterListSerializer(serializers.ModelSerializer):
+    """Table columns for renter lists (?compact=1); no nested documents."""
+    email = serializers.EmailField(source="user.email", read_only=True)
+
+    class Meta:
+        model = Renter
+        fields = ["id", "full_name", "phone_number", "email", "status", "notification_preference", "profile_pic"]
+        read_only_fields = fields
+
+
 class RenterSerializer(serializers.ModelSerializer):
     documents = RenterDocumentSerializer(many=True, read_only=True)
     status = serializers.CharField(read_only=True)
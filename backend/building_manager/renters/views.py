@@ -6,17 +6,25 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from common.mixins import FieldSelectionMixin
 from common.pagination import CustomPagination
 from permissions.drf import RoleBasedPermission
 from permissions.mixins import RenterAccessMixin
 from .models import Renter
-from .serializers import RenterSerializer, RenterProfileSerializer
+from .serializers import RenterListSerializer, RenterSerializer, RenterProfileSerializer
 
 
 @extend_schema(tags=["Renters"])
-class RenterViewSet(RenterAccessMixin, viewsets.ModelViewSet):
+class RenterViewSet(FieldSelectionMixin, RenterAccessMixin, viewsets.ModelViewSet):
     queryset = Renter.objects.all()
     serializer_class = RenterSerializer
+    list_serializer_class = RenterListSerializer
+    field_plan = {
+        "email": {"related": ["user"], "only": ["user__email"]},
+        "documents": {"prefetch": ["documents"]},
+        "is_active": {"only": ["status"]},
+        "is_former": {"only": ["status"]},
+    }
     permission_classes = [IsAuthenticated, RoleBasedPermission]
     pagination_class = CustomPagination
     parser_classes = [MultiPartParser, FormParser]
@@ -0,0 +1,53 @@
+# reports/management/commands/rebuild_financial_rollups.py
+import time
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+
+from invoices.models import Invoice
+from payments.models import Payment
+from reports.services.rollup_service import month_start, months_between, rebuild_rollup_months
+
+
+def _month(value):
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise CommandError(f"Invalid month '{value}', expected YYYY-MM.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild MonthlyFinancialRollup from invoices and payments. Defaults to every "
+        "closed month since the first invoice/payment; the current month is always read live."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="first", help="First month (YYYY-MM).")
+        parser.add_argument("--to", dest="last", help="Last month (YYYY-MM), at most the previous month.")
+
+    def handle(self, *args, **options):
+        first = _month(options["first"]) if options["first"] else None
+        if first is None:
+            earliest = [
+                d for d in (
+                    Invoice.objects.aggregate(first=Min("invoice_date"))["first"],
+                    Payment.objects.aggregate(first=Min("payment_date"))["first"],
+                ) if d
+            ]
+            if not earliest:
+                self.stdout.write("No invoices or payments; nothing to roll up.")
+                return
+            first = min(earliest)
+        last = _month(options["last"]) if options["last"] else month_start(date.today())
+
+        started = time.perf_counter()
+        rebuilt = rebuild_rollup_months(months_between(first, last))
+        elapsed = time.perf_counter() - started
+        if not rebuilt:
+            self.stdout.write("No closed months in range.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(rebuilt)} month(s) {rebuilt[0]:%Y-%m}..{rebuilt[-1]:%Y-%m} in {elapsed:.2f}s."
+        ))
@@ -1,3 +1,52 @@
 from django.db import models
 
-# Create your models here.
+from buildings.models import Floor
+
+
+class MonthlyFinancialRollup(models.Model):
+    """
+    Pre-aggregated invoice / payment totals for one closed month, maintained by
+    reports.services.rollup_service. Invoice figures are keyed by invoice_date
+    month, floor, invoice type and status. Payment figures are keyed by
+    payment_date month, floor and the paid invoice's type (blank for
+    lease-level payments) and carry a blank status.
+    """
+    month = models.DateField(help_text="First day of the month")
+    # Null only for payments linked to neither a lease nor an invoice
+    floor = models.ForeignKey(Floor, on_delete=models.CASCADE, related_name="+", blank=True, null=True)
+    invoice_type = models.CharField(max_length=50, blank=True, default="")
+    status = models.CharField(max_length=20, blank=True, default="")
+
+    invoiced_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    invoice_count = models.PositiveIntegerField(default=0)
+    collected_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["month", "floor_id", "invoice_type", "status"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["month", "floor", "invoice_type", "status"],
+                name="unique_financial_rollup_key",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} floor {self.floor_id} {self.invoice_type or '-'}/{self.status or '-'}"
+
+
+class FinancialRollupMonth(models.Model):
+    """
+    Build state of one rollup month. Months without a row, or flagged dirty
+    by a write, are answered from the live invoice / payment tables.
+    """
+    month = models.DateField(unique=True)
+    is_dirty = models.BooleanField(default=False)
+    rebuilt_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["month"]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m}{' (dirty)' if self.is_dirty else ''}"
@@ -14,6 +14,22 @@ class FinancialSummarySerializer(serializers.Serializer):
     payment_count = serializers.IntegerField()
     invoice_status_counts = serializers.ListField()
 
+class NOIMonthSerializer(serializers.Serializer):
+    month = serializers.DateField()
+    invoiced = serializers.DecimalField(max_digits=14, decimal_places=2)
+    collected = serializers.DecimalField(max_digits=14, decimal_places=2)
+    expenses = serializers.DecimalField(max_digits=14, decimal_places=2)
+    net_operating_income = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+class NOIReportSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    total_invoiced = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total_collected = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total_expenses = serializers.DecimalField(max_digits=14, decimal_places=2)
+    net_operating_income = serializers.DecimalField(max_digits=14, decimal_places=2)
+    months = NOIMonthSerializer(many=True)
+
 class InvoiceListSerializer(serializers.ModelSerializer):
     renter = serializers.CharField(source="lease.renter.full_name", read_only=True)
     unit = serializers.CharField(source="lease.unit.name", read_only=True)
@@ -30,6 +46,31 @@ class OccupancySummarySerializer(serializers.Serializer):
     active_leases = serializers.IntegerField()
     leases_ending_in_period = serializers.IntegerField()
 
+class OccupancyPointSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    units = serializers.IntegerField()
+    occupied = serializers.IntegerField()
+    vacant = serializers.IntegerField()
+    occupancy_rate = serializers.FloatField()
+
+class UnitVacancySerializer(serializers.Serializer):
+    unit_id = serializers.IntegerField()
+    unit_name = serializers.CharField()
+    floor_name = serializers.CharField()
+    occupied_days = serializers.IntegerField()
+    vacancy_days = serializers.IntegerField()
+    monthly_rent = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    revenue_lost = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+class OccupancyTimeseriesSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    average_occupancy_rate = serializers.FloatField()
+    total_vacancy_days = serializers.IntegerField()
+    revenue_lost_to_vacancy = serializers.DecimalField(max_digits=14, decimal_places=2)
+    series = OccupancyPointSerializer(many=True)
+    units = UnitVacancySerializer(many=True)
+
 class UnitListSerializer(serializers.ModelSerializer):
     floor_name = serializers.CharField(source="floor.name", read_only=True)
     class Meta:
@@ -39,8 +80,29 @@ class UnitListSerializer(serializers.ModelSerializer):
 class RenterCollectionRowSerializer(serializers.Serializer):
     renter_id = serializers.IntegerField()
     full_name = serializers.CharField()
-    email = serializers.EmailField(source="user.email", allow_null=True)
+    email = serializers.EmailField(allow_null=True)
     phone_number = serializers.CharField()
     total_invoiced = serializers.DecimalField(max_digits=14, decimal_places=2)
     total_paid = serializers.DecimalField(max_digits=14, decimal_places=2)
     total_due = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+class AgingBucketsSerializer(serializers.Serializer):
+    days_0_30 = serializers.DecimalField(max_digits=14, decimal_places=2)
+    days_31_60 = serializers.DecimalField(max_digits=14, decimal_places=2)
+    days_61_90 = serializers.DecimalField(max_digits=14, decimal_places=2)
+    days_90_plus = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+class AgingRenterRowSerializer(AgingBucketsSerializer):
+    renter_id = serializers.IntegerField()
+    full_name = serializers.CharField()
+
+class AgingFloorRowSerializer(AgingBucketsSerializer):
+    floor_id = serializers.IntegerField(allow_null=True)
+    floor_name = serializers.CharField(allow_null=True)
+
+class AgingReportSerializer(serializers.Serializer):
+    as_of = serializers.DateField()
+    totals = AgingBucketsSerializer()
+    by_renter = AgingRenterRowSerializer(many=True)
+    by_floor = AgingFloorRowSerializer(many=True)
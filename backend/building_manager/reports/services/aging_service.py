@@ -0,0 +1,86 @@
+# reports/services/aging_service.py
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, Sum, Value as V, When
+from django.db.models.functions import Coalesce
+
+from invoices.models import Invoice
+from .base_report import BaseReportService
+
+AGING_STATUSES = ["unpaid", "partially_paid"]
+# (key, oldest age in days, youngest age in days); None = open ended
+AGING_BUCKETS = [
+    ("days_0_30", 30, None),
+    ("days_31_60", 60, 31),
+    ("days_61_90", 90, 61),
+    ("days_90_plus", None, 91),
+]
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def aging_aggregates(as_of):
+    """
+    Conditional SUM(amount - paid_amount) per aging bucket, keyed like AGING_BUCKETS plus "total".
+
+    Age is days past the due date. Instead of subtracting dates in SQL (a
+    DurationField on PostgreSQL, a float on SQLite) each bucket compares
+    due_date against cutoff dates computed here, which behaves the same on
+    every backend. Invoices not yet due fall in days_0_30.
+    """
+    balance = F("amount") - F("paid_amount")
+    aggregates = {}
+    for key, oldest, youngest in AGING_BUCKETS:
+        condition = {}
+        if oldest is not None:
+            condition["due_date__gte"] = as_of - timedelta(days=oldest)
+        if youngest is not None:
+            condition["due_date__lte"] = as_of - timedelta(days=youngest)
+        aggregates[key] = Coalesce(
+            Sum(Case(When(then=balance, **condition), default=V(Decimal("0.00")), output_field=MONEY)),
+            V(Decimal("0.00")), output_field=MONEY,
+        )
+    aggregates["total"] = Coalesce(Sum(balance, output_field=MONEY), V(Decimal("0.00")), output_field=MONEY)
+    return aggregates
+
+
+def open_invoices(as_of):
+    return Invoice.objects.filter(
+        status__in=AGING_STATUSES, amount__gt=F("paid_amount"), invoice_date__lte=as_of
+    )
+
+
+def aging_buckets(as_of):
+    """Aging totals over all open invoices in one query."""
+    return open_invoices(as_of).aggregate(**aging_aggregates(as_of))
+
+
+class AgingReportService(BaseReportService):
+    """Receivables aging as of ``end_date`` (default today)."""
+
+    @property
+    def as_of(self):
+        return self.end_date
+
+    def summarize(self):
+        return {"as_of": self.as_of, **aging_buckets(self.as_of)}
+
+    def by_renter(self):
+        return list(
+            open_invoices(self.as_of)
+            .values(renter_id=F("lease__renter_id"), full_name=F("lease__renter__full_name"))
+            .annotate(**aging_aggregates(self.as_of))
+            .order_by("-total", "renter_id")
+        )
+
+    def by_floor(self):
+        return list(
+            open_invoices(self.as_of)
+            .values(floor_id=F("lease__unit__floor_id"), floor_name=F("lease__unit__floor__name"))
+            .annotate(**aging_aggregates(self.as_of))
+            .order_by("floor_id")
+        )
+
+    def details(self):
+        return {"by_renter": self.by_renter(), "by_floor": self.by_floor()}
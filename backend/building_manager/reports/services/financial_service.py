@@ -1,37 +1,127 @@
 # reports/services/financial_service.py
+from collections import defaultdict
 from decimal import Decimal
-from django.db.models import Sum, Count, F, Value as V
-from django.db.models.functions import Coalesce
+from django.db.models import Sum, Count, F, Q, Value as V
+from django.db.models.functions import Coalesce, TruncMonth
 from invoices.models import Invoice
 from payments.models import Payment
+from reports.models import MonthlyFinancialRollup
 from .base_report import BaseReportService
+from .rollup_service import split_range
 
 
 class FinancialReportService(BaseReportService):
     def summarize(self):
-        invoices = Invoice.objects.filter(invoice_date__range=(self.start_date, self.end_date))
-        payments = Payment.objects.filter(payment_date__range=(self.start_date, self.end_date))
+        """
+        Totals for [start_date, end_date]. Whole closed months come from
+        MonthlyFinancialRollup; partial months, the current month and months
+        whose rollup is stale are aggregated live (see rollup_service).
+        """
+        rollup_months, live_ranges = split_range(self.start_date, self.end_date)
+        totals = {
+            "total_invoiced": Decimal("0.00"),
+            "total_collected": Decimal("0.00"),
+            "total_outstanding": Decimal("0.00"),
+            "invoice_count": 0,
+            "payment_count": 0,
+        }
+        status_counts = defaultdict(int)
 
-        total_invoiced = invoices.aggregate(total=Coalesce(Sum("amount"), Decimal("0.00")))["total"]
-        total_collected = payments.aggregate(total=Coalesce(Sum("amount"), Decimal("0.00")))["total"]
+        def add_invoice_rows(rows):
+            for row in rows:
+                totals["total_invoiced"] += row["invoiced"] or 0
+                totals["total_outstanding"] += row["outstanding"] or 0
+                totals["invoice_count"] += row["invoices"]
+                status_counts[row["status"]] += row["invoices"]
 
-        # outstanding = sum of (amount - paid_amount) for invoices in date range (include adjustments etc)
-        outstanding_qs = invoices.annotate(due=F("amount") - F("paid_amount"))
-        total_outstanding = outstanding_qs.aggregate(total=Coalesce(Sum("due"), Decimal("0.00")))["total"]
+        if rollup_months:
+            rows = list(
+                MonthlyFinancialRollup.objects.filter(month__in=rollup_months)
+                .values("status")
+                .annotate(
+                    invoiced=Sum("invoiced_amount"),
+                    outstanding=Sum("outstanding_amount"),
+                    invoices=Sum("invoice_count"),
+                    collected=Sum("collected_amount"),
+                    payments=Sum("payment_count"),
+                )
+                .order_by()
+            )
+            add_invoice_rows(row for row in rows if row["invoices"])
+            for row in rows:
+                totals["total_collected"] += row["collected"] or 0
+                totals["payment_count"] += row["payments"] or 0
 
-        status_counts = invoices.values("status").annotate(count=Count("id"))
+        if live_ranges:
+            invoice_range, payment_range = Q(), Q()
+            for first, last in live_ranges:
+                invoice_range |= Q(invoice_date__range=(first, last))
+                payment_range |= Q(payment_date__range=(first, last))
+            add_invoice_rows(
+                Invoice.objects.filter(invoice_range)
+                .values("status")
+                .annotate(
+                    invoiced=Sum("amount"),
+                    outstanding=Sum(F("amount") - F("paid_amount")),
+                    invoices=Count("id"),
+                )
+                .order_by()
+            )
+            payments = Payment.objects.filter(payment_range).aggregate(
+                collected=Coalesce(Sum("amount"), Decimal("0.00")), payments=Count("id"),
+            )
+            totals["total_collected"] += payments["collected"]
+            totals["payment_count"] += payments["payments"]
 
         return {
             "start_date": self.start_date,
             "end_date": self.end_date,
-            "total_invoiced": total_invoiced,
-            "total_collected": total_collected,
-            "total_outstanding": total_outstanding,
-            "invoice_count": invoices.count(),
-            "payment_count": payments.count(),
-            "invoice_status_counts": list(status_counts),
+            **totals,
+            "invoice_status_counts": [
+                {"status": status, "count": count} for status, count in sorted(status_counts.items()) if count
+            ],
         }
 
+    def monthly_totals(self):
+        """
+        {month start: {"invoiced", "collected"}} for [start_date, end_date],
+        from the rollup where it is clean and grouped by month live elsewhere.
+        """
+        rollup_months, live_ranges = split_range(self.start_date, self.end_date)
+        months = defaultdict(lambda: {"invoiced": Decimal("0.00"), "collected": Decimal("0.00")})
+
+        if rollup_months:
+            for row in (
+                MonthlyFinancialRollup.objects.filter(month__in=rollup_months)
+                .values("month")
+                .annotate(invoiced=Sum("invoiced_amount"), collected=Sum("collected_amount"))
+                .order_by()
+            ):
+                months[row["month"]]["invoiced"] += row["invoiced"] or 0
+                months[row["month"]]["collected"] += row["collected"] or 0
+
+        if live_ranges:
+            invoice_range, payment_range = Q(), Q()
+            for first, last in live_ranges:
+                invoice_range |= Q(invoice_date__range=(first, last))
+                payment_range |= Q(payment_date__range=(first, last))
+            for row in (
+                Invoice.objects.filter(invoice_range)
+                .values(month=TruncMonth("invoice_date"))
+                .annotate(total=Sum("amount"))
+                .order_by()
+            ):
+                months[row["month"]]["invoiced"] += row["total"] or 0
+            for row in (
+                Payment.objects.filter(payment_range)
+                .values(month=TruncMonth("payment_date"))
+                .annotate(total=Sum("amount"))
+                .order_by()
+            ):
+                months[row["month"]]["collected"] += row["total"] or 0
+
+        return dict(months)
+
     def details(self, lease_id=None, limit=100):
         """
         Return invoice-level detail rows (QuerySet) for drilldowns.
@@ -0,0 +1,48 @@
+# reports/services/noi_service.py
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from expenses.services import monthly_expense_totals
+from .base_report import BaseReportService
+from .financial_service import FinancialReportService
+from .rollup_service import months_between
+
+
+class NetOperatingIncomeReportService(BaseReportService):
+    """
+    Monthly net operating income: rent and charges collected (payments, cash
+    basis) minus expenses, with the invoiced amount alongside. Defaults to the
+    year to date.
+    """
+
+    def __init__(self, start_date: Optional[date] = None, end_date: Optional[date] = None):
+        super().__init__(start_date=start_date, end_date=end_date)
+        if start_date is None:
+            self.start_date = self.end_date.replace(month=1, day=1)
+
+    def summarize(self):
+        income = FinancialReportService(start_date=self.start_date, end_date=self.end_date).monthly_totals()
+        expenses = monthly_expense_totals(self.start_date, self.end_date)
+
+        rows = []
+        for month in months_between(self.start_date, self.end_date):
+            collected = income.get(month, {}).get("collected", Decimal("0.00"))
+            spent = expenses.get(month, Decimal("0.00"))
+            rows.append({
+                "month": month,
+                "invoiced": income.get(month, {}).get("invoiced", Decimal("0.00")),
+                "collected": collected,
+                "expenses": spent,
+                "net_operating_income": collected - spent,
+            })
+
+        return {
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "total_invoiced": sum((row["invoiced"] for row in rows), Decimal("0.00")),
+            "total_collected": sum((row["collected"] for row in rows), Decimal("0.00")),
+            "total_expenses": sum((row["expenses"] for row in rows), Decimal("0.00")),
+            "net_operating_income": sum((row["net_operating_income"] for row in rows), Decimal("0.00")),
+            "months": rows,
+        }
@@ -1,33 +1,216 @@
 # reports/services/occupancy_service.py
-from django.db.models import Count
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
 from buildings.models import Unit
 from leases.models import Lease
 from .base_report import BaseReportService
+from .rollup_service import month_start, months_between, next_month
 
+# Leases that put a renter in the unit for [start_date, end of lease]
+OCCUPYING_LEASE_STATUSES = ("active", "terminated", "completed")
+# Longest range /occupancy/timeseries/ accepts (daily points)
+OCCUPANCY_MAX_DAYS = 1100
 
-class OccupancyReportService(BaseReportService):
-    def summarize(self):
-        total_units = Unit.objects.count()
-        occupied_units = Unit.objects.filter(status="occupied").count()
-        vacant_units = Unit.objects.filter(status="vacant").count()
-        maintenance_units = Unit.objects.filter(status="maintenance").count()
+# Per-month occupied intervals; the version is bumped by reports.signals on lease/unit writes
+OCCUPANCY_VERSION_KEY = "reports:occupancy:version"
+OCCUPANCY_MONTH_KEY = "reports:occupancy:v{version}:{month:%Y-%m}{suffix}"
 
-        # Optional: leases starting/ending in the date range
-        active_leases = Lease.objects.filter(status="active").count()
-        upcoming_ends = Lease.objects.filter(end_date__range=(self.start_date, self.end_date)).count()
 
-        occupancy_rate = round((occupied_units / total_units) * 100.0, 2) if total_units else 0
+def bump_occupancy_version():
+    if not cache.add(OCCUPANCY_VERSION_KEY, 1, timeout=None):
+        try:
+            cache.incr(OCCUPANCY_VERSION_KEY)
+        except ValueError:
+            cache.set(OCCUPANCY_VERSION_KEY, 1, timeout=None)
+
+
+def lease_interval(status, start, end, termination, updated_day, today):
+    """
+    Days a lease occupies its unit, as (first, last) with last=None for open ended.
+    An active lease past its end date is holding over and stays open ended.
+    """
+    if termination:
+        return start, termination
+    if status == "active":
+        return start, end if end and end >= today else None
+    return start, end or updated_day
+
+
+def _merge(intervals):
+    merged = []
+    for first, last in sorted(intervals):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return merged
+
+
+def _load_months(months, today):
+    """
+    {month: {unit_id: [[first_day, last_day], ...]}} with merged, month-clipped
+    occupied day numbers. Cached per month; the months that are not cached
+    are computed together from one lease query.
+    """
+    version = cache.get(OCCUPANCY_VERSION_KEY, 0)
+    current = month_start(today)
+    # Open-ended leases make the current and later months depend on today's date
+    keys = {
+        month: OCCUPANCY_MONTH_KEY.format(
+            version=version, month=month, suffix=f":{today:%d}" if month >= current else "",
+        )
+        for month in months
+    }
+    cached = cache.get_many(keys.values())
+    result = {month: cached[key] for month, key in keys.items() if key in cached}
+    missing = [month for month in months if month not in result]
+    if not missing:
+        return result
+
+    first, last = missing[0], next_month(missing[-1]) - timedelta(days=1)
+    per_month = {month: defaultdict(list) for month in missing}
+    leases = (
+        Lease.objects.filter(status__in=OCCUPYING_LEASE_STATUSES, start_date__lte=last)
+        .exclude(termination_date__lt=first)
+        .values_list("unit_id", "status", "start_date", "end_date", "termination_date", "updated_at")
+    )
+    for unit_id, status, start, end, termination, updated_at in leases.iterator():
+        lease_first, lease_last = lease_interval(status, start, end, termination, updated_at.date(), today)
+        lease_last = lease_last or last
+        for month in missing:
+            month_last = next_month(month) - timedelta(days=1)
+            if lease_first > month_last or lease_last < month:
+                continue
+            per_month[month][unit_id].append(
+                (max(lease_first, month).day, min(lease_last, month_last).day)
+            )
+
+    fresh = {month: {unit_id: _merge(days) for unit_id, days in units.items()} for month, units in per_month.items()}
+    cache.set_many({keys[month]: data for month, data in fresh.items()}, settings.OCCUPANCY_CACHE_TTL)
+    result.update(fresh)
+    return result
 
-        return {
-            "total_units": total_units,
-            "occupied_units": occupied_units,
-            "vacant_units": vacant_units,
-            "maintenance_units": maintenance_units,
-            "occupancy_rate": occupancy_rate,
-            "active_leases": active_leases,
-            "leases_ending_in_period": upcoming_ends,
-        }
+
+class OccupancyReportService(BaseReportService):
+    def summarize(self):
+        # One query: units LEFT JOIN leases, counted with conditional DISTINCT aggregates
+        counts = Unit.objects.aggregate(
+            total_units=Count("id", distinct=True),
+            occupied_units=Count("id", filter=Q(status="occupied"), distinct=True),
+            vacant_units=Count("id", filter=Q(status="vacant"), distinct=True),
+            maintenance_units=Count("id", filter=Q(status="maintenance"), distinct=True),
+            active_leases=Count("leases", filter=Q(leases__status="active"), distinct=True),
+            leases_ending_in_period=Count(
+                "leases", filter=Q(leases__end_date__range=(self.start_date, self.end_date)), distinct=True,
+            ),
+        )
+        total_units = counts["total_units"]
+        counts["occupancy_rate"] = round((counts["occupied_units"] / total_units) * 100.0, 2) if total_units else 0
+        return counts
 
     def details_vacant(self, limit=100):
         """Return vacuum unit queryset for drilldown."""
         return Unit.objects.filter(status="vacant").select_related("floor")[:limit]
+
+    def timeseries(self):
+        """
+        Daily occupied / vacant unit counts for [start_date, end_date] from
+        lease history (interval sweep over lease periods, no per-day queries),
+        plus vacancy days per unit and the rent lost to them (vacant days x
+        Unit.monthly_rent / days in that month). A unit counts from the day it
+        was created, or from its first lease if that is earlier.
+        """
+        start, end = self.start_date, self.end_date
+        today = date.today()
+        months = list(months_between(start, end))
+        occupied = _load_months(months, today)
+
+        # Occupied (first, last) date intervals per unit, clipped to the range
+        intervals = defaultdict(list)
+        for month in months:
+            for unit_id, days in occupied[month].items():
+                for first_day, last_day in days:
+                    first = max(month.replace(day=first_day), start)
+                    last = min(month.replace(day=last_day), end)
+                    if first <= last:
+                        intervals[unit_id].append((first, last))
+
+        units = list(
+            Unit.objects.select_related("floor")
+            .order_by("floor__number", "name", "id")
+            .only("id", "name", "monthly_rent", "created_at", "floor__name", "floor__number")
+        )
+        available_events, occupied_events = defaultdict(int), defaultdict(int)
+        unit_rows = []
+        total_lost = Decimal("0.00")
+        for unit in units:
+            unit_intervals = intervals.get(unit.pk, [])
+            available_from = unit.created_at.date()
+            if unit_intervals:
+                available_from = min(available_from, min(first for first, _ in unit_intervals))
+            available_from = max(available_from, start)
+            if available_from > end:
+                continue
+            available_events[available_from] += 1
+
+            occupied_days, occupied_by_month = 0, defaultdict(int)
+            for first, last in unit_intervals:
+                occupied_events[first] += 1
+                occupied_events[last + timedelta(days=1)] -= 1
+                occupied_days += (last - first).days + 1
+                for month in months_between(first, last):
+                    month_last = next_month(month) - timedelta(days=1)
+                    occupied_by_month[month] += (min(last, month_last) - max(first, month)).days + 1
+
+            vacancy_days, lost = 0, Decimal("0.00")
+            for month in months_between(available_from, end):
+                month_last = next_month(month) - timedelta(days=1)
+                days = (min(end, month_last) - max(available_from, month)).days + 1
+                vacant = days - occupied_by_month[month]
+                vacancy_days += vacant
+                if unit.monthly_rent and vacant:
+                    lost += unit.monthly_rent * vacant / calendar.monthrange(month.year, month.month)[1]
+            lost = lost.quantize(Decimal("0.01"))
+            total_lost += lost
+            unit_rows.append({
+                "unit_id": unit.pk,
+                "unit_name": unit.name,
+                "floor_name": unit.floor.name,
+                "occupied_days": occupied_days,
+                "vacancy_days": vacancy_days,
+                "monthly_rent": unit.monthly_rent,
+                "revenue_lost": lost,
+            })
+
+        series, available, occupied_now = [], 0, 0
+        day = start
+        while day <= end:
+            available += available_events.get(day, 0)
+            occupied_now += occupied_events.get(day, 0)
+            series.append({
+                "date": day,
+                "units": available,
+                "occupied": occupied_now,
+                "vacant": available - occupied_now,
+                "occupancy_rate": round(occupied_now / available * 100.0, 2) if available else 0,
+            })
+            day += timedelta(days=1)
+
+        unit_days = sum(point["units"] for point in series)
+        return {
+            "start_date": start,
+            "end_date": end,
+            "average_occupancy_rate": (
+                round(sum(point["occupied"] for point in series) / unit_days * 100.0, 2) if unit_days else 0
+            ),
+            "total_vacancy_days": sum(row["vacancy_days"] for row in unit_rows),
+            "revenue_lost_to_vacancy": total_lost,
+            "series": series,
+            "units": unit_rows,
+        }
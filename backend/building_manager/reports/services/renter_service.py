@@ -1,46 +1,48 @@
-from django.db.models import Sum, F, DecimalField, ExpressionWrapper
+from django.db.models import Q, Sum, F, DecimalField, ExpressionWrapper
 from django.db.models.functions import Coalesce
 from renters.models import Renter
 from .base_report import BaseReportService
 
+COLLECTION_COLUMNS = ("renter_id", "full_name", "email", "phone_number", "total_invoiced", "total_paid", "total_due")
+
 
 class RenterCollectionReportService(BaseReportService):
-    def summarize(self):
-        qs = (
+    """
+    Invoiced / paid / due per renter. Without explicit dates the report covers
+    all invoices; start_date/end_date each bound it by invoice_date on their own
+    (the base class month defaults are not applied).
+    """
+
+    def __init__(self, start_date=None, end_date=None):
+        super().__init__(start_date=start_date, end_date=end_date)
+        self.start_bound, self.end_bound = start_date, end_date
+
+    def collection_queryset(self):
+        """One grouped query; renters without invoices (in range) report zeros."""
+        in_range = Q()
+        if self.start_bound:
+            in_range &= Q(leases__invoices__invoice_date__gte=self.start_bound)
+        if self.end_bound:
+            in_range &= Q(leases__invoices__invoice_date__lte=self.end_bound)
+        money = DecimalField(max_digits=12, decimal_places=2)
+        return (
             Renter.objects
-            .select_related('user') # 🚀 Optimization: Fetch user in the same query
+            .order_by("full_name", "id")
+            .values("full_name", "phone_number", renter_id=F("id"), email=F("user__email"))
             .annotate(
-                total_invoiced=Coalesce(
-                    Sum("leases__invoices__amount"),
-                    0,
-                    output_field=DecimalField(max_digits=12, decimal_places=2),
-                ),
-                total_paid=Coalesce(
-                    Sum("leases__invoices__paid_amount"),
-                    0,
-                    output_field=DecimalField(max_digits=12, decimal_places=2),
-                ),
-            )
-            .annotate(
-                total_due=ExpressionWrapper(
-                    F("total_invoiced") - F("total_paid"),
-                    output_field=DecimalField(max_digits=12, decimal_places=2),
-                )
+                total_invoiced=Coalesce(Sum("leases__invoices__amount", filter=in_range), 0, output_field=money),
+                total_paid=Coalesce(Sum("leases__invoices__paid_amount", filter=in_range), 0, output_field=money),
             )
+            .annotate(total_due=ExpressionWrapper(F("total_invoiced") - F("total_paid"), output_field=money))
         )
 
-        rows = []
-        for r in qs:
-            rows.append({
-                "renter_id": r.id,
-                "full_name": r.full_name,
-                "email": r.user.email,  # ✅ Fixed: Pulling from the User model
-                "phone_number": r.phone_number,
-                "total_invoiced": r.total_invoiced or 0,
-                "total_paid": r.total_paid or 0,
-                "total_due": r.total_due or 0,
-            })
-        return rows
+    def iter_rows(self, chunk_size=2000):
+        """Rows as dicts (COLLECTION_COLUMNS) read through a server-side cursor."""
+        for row in self.collection_queryset().iterator(chunk_size=chunk_size):
+            yield {column: row[column] for column in COLLECTION_COLUMNS}
+
+    def summarize(self):
+        return list(self.iter_rows())
 
     def top_dues(self, limit=20):
         qs = (
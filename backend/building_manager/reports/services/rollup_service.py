@@ -0,0 +1,177 @@
+# reports/services/rollup_service.py
+"""
+MonthlyFinancialRollup maintenance.
+
+Only closed months (before the current one) are rolled up; the current month
+is always read live. A write that touches a closed month flags it dirty in the
+same transaction (mark_rollup_dirty, called from reports.signals and from the
+bulk payment allocation path) and schedules one debounced refresh, which
+recomputes the flagged months from invoices/payments with two grouped
+queries per month. Dirty or never-built months are read live until then,
+so report figures never depend on the rollup being current.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from invoices.models import Invoice
+from payments.models import Payment
+from reports.models import FinancialRollupMonth, MonthlyFinancialRollup
+
+REFRESH_SCHEDULED_KEY = "reports:rollup:refresh-scheduled"
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(month):
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def months_between(first, last):
+    """Month starts from ``first``'s month to ``last``'s month, inclusive."""
+    month, last = month_start(first), month_start(last)
+    while month <= last:
+        yield month
+        month = next_month(month)
+
+
+# -----------------------------
+# Dirty tracking
+# -----------------------------
+def mark_rollup_dirty(*days):
+    """
+    Flag the closed months containing ``days`` as stale (inside the caller's
+    transaction) and schedule a refresh once it commits. Current-month dates
+    are ignored: that month is never rolled up.
+    """
+    current = month_start(date.today())
+    months = {month_start(day) for day in days if day and month_start(day) < current}
+    if not months:
+        return
+    if not FinancialRollupMonth.objects.filter(month__in=months, is_dirty=False).update(is_dirty=True):
+        return
+
+    def _schedule():
+        if cache.add(REFRESH_SCHEDULED_KEY, 1, settings.FINANCIAL_ROLLUP_REFRESH_DELAY + 30):
+            from common.utils.dispatch import dispatch
+            from reports.tasks import refresh_financial_rollups_task
+            dispatch(refresh_financial_rollups_task.si().set(countdown=settings.FINANCIAL_ROLLUP_REFRESH_DELAY))
+
+    transaction.on_commit(_schedule)
+
+
+# -----------------------------
+# Rebuild
+# -----------------------------
+def _month_rows(month):
+    """Rollup rows for ``month`` recomputed from invoices and payments."""
+    end = next_month(month)
+    rows = defaultdict(lambda: {
+        "invoiced_amount": Decimal("0.00"), "outstanding_amount": Decimal("0.00"), "invoice_count": 0,
+        "collected_amount": Decimal("0.00"), "payment_count": 0,
+    })
+
+    invoices = (
+        Invoice.objects.filter(invoice_date__gte=month, invoice_date__lt=end)
+        .values("invoice_type", "status", floor_id=F("lease__unit__floor_id"))
+        .annotate(
+            invoiced=Sum("amount"),
+            outstanding=Sum(F("amount") - F("paid_amount"), output_field=MONEY),
+            count=Count("id"),
+        )
+        .order_by()
+    )
+    for row in invoices:
+        totals = rows[(row["floor_id"], row["invoice_type"], row["status"])]
+        totals["invoiced_amount"] += row["invoiced"] or 0
+        totals["outstanding_amount"] += row["outstanding"] or 0
+        totals["invoice_count"] += row["count"]
+
+    payments = (
+        Payment.objects.filter(payment_date__gte=month, payment_date__lt=end)
+        .annotate(
+            rollup_floor=Coalesce("lease__unit__floor_id", "invoice__lease__unit__floor_id"),
+            rollup_type=Coalesce("invoice__invoice_type", Value("")),
+        )
+        .values("rollup_floor", "rollup_type")
+        .annotate(collected=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+    for row in payments:
+        totals = rows[(row["rollup_floor"], row["rollup_type"], "")]
+        totals["collected_amount"] += row["collected"] or 0
+        totals["payment_count"] += row["count"]
+
+    return [
+        MonthlyFinancialRollup(month=month, floor_id=floor_id, invoice_type=invoice_type, status=status, **totals)
+        for (floor_id, invoice_type, status), totals in rows.items()
+    ]
+
+
+def rebuild_rollup_months(months):
+    """Recompute the given closed months (one transaction each). Returns the months rebuilt."""
+    current = month_start(date.today())
+    rebuilt = []
+    for month in sorted({month_start(m) for m in months}):
+        if month >= current:
+            continue
+        with transaction.atomic():
+            # Clear the flag before reading: a write committing after this point flags the month again
+            FinancialRollupMonth.objects.update_or_create(
+                month=month, defaults={"is_dirty": False, "rebuilt_at": timezone.now()},
+            )
+            MonthlyFinancialRollup.objects.filter(month=month).delete()
+            MonthlyFinancialRollup.objects.bulk_create(_month_rows(month))
+        rebuilt.append(month)
+    return rebuilt
+
+
+def refresh_financial_rollups():
+    """Rebuild the months flagged dirty, plus the last closed month if it was never built."""
+    cache.delete(REFRESH_SCHEDULED_KEY)
+    last_closed = month_start(month_start(date.today()) - timedelta(days=1))
+    months = set(FinancialRollupMonth.objects.filter(is_dirty=True).values_list("month", flat=True))
+    if not FinancialRollupMonth.objects.filter(month=last_closed).exists():
+        months.add(last_closed)
+    return rebuild_rollup_months(months)
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+def split_range(start, end):
+    """
+    Split [start, end] into (rollup months, live date ranges): whole closed
+    months with a clean rollup, and contiguous (first, last) day ranges that
+    have to be aggregated from the live tables.
+    """
+    current = month_start(date.today())
+    candidates = [
+        m for m in months_between(start, end)
+        if m >= start and next_month(m) - timedelta(days=1) <= end and m < current
+    ]
+    clean = set()
+    if candidates:
+        clean = set(
+            FinancialRollupMonth.objects.filter(month__in=candidates, is_dirty=False).values_list("month", flat=True)
+        )
+
+    live, day = [], start
+    for month in sorted(clean):
+        if day < month:
+            live.append((day, month - timedelta(days=1)))
+        day = next_month(month)
+    if day <= end:
+        live.append((day, end))
+    return sorted(clean), live
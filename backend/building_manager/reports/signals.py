@@ -0,0 +1,35 @@
+# reports/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from buildings.models import Unit
+from invoices.models import Invoice
+from leases.models import Lease
+from payments.models import Payment
+from reports.services.occupancy_service import bump_occupancy_version
+from reports.services.rollup_service import mark_rollup_dirty
+
+# Saves that only touch these fields never change a rollup figure
+IGNORED_UPDATE_FIELDS = {"invoice_number", "invoice_pdf", "pdf_fingerprint", "updated_at"}
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def invoice_rollup_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= IGNORED_UPDATE_FIELDS:
+        return
+    mark_rollup_dirty(instance.invoice_date)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def payment_rollup_changed(sender, instance, **kwargs):
+    mark_rollup_dirty(instance.payment_date)
+
+
+@receiver(post_save, sender=Lease)
+@receiver(post_delete, sender=Lease)
+@receiver(post_save, sender=Unit)
+@receiver(post_delete, sender=Unit)
+def occupancy_history_changed(sender, instance, **kwargs):
+    bump_occupancy_version()
@@ -0,0 +1,17 @@
+# reports/tasks.py
+import logging
+
+from celery import shared_task
+
+from reports.services.rollup_service import refresh_financial_rollups
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="refresh_financial_rollups")
+def refresh_financial_rollups_task():
+    """Rebuild the MonthlyFinancialRollup months that writes have flagged dirty."""
+    rebuilt = refresh_financial_rollups()
+    if rebuilt:
+        logger.info(f"Financial rollups rebuilt: {', '.join(f'{m:%Y-%m}' for m in rebuilt)}")
+    return [m.isoformat() for m in rebuilt]
@@ -0,0 +1,152 @@
+# reports/utils.py
+"""
+Incremental writers for report exports. Each takes an iterable of row dicts
+plus the column order and yields bytes, so a StreamingHttpResponse can send
+rows while the database cursor is still being read.
+"""
+import csv
+import io
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from common.utils.streaming import stream_zip
+
+# Rows buffered per yielded chunk
+EXPORT_BATCH_ROWS = 500
+
+
+class ReportJSONEncoder(DjangoJSONEncoder):
+    """Decimals as 2-place strings, the way DRF's DecimalField renders them."""
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return f"{o:.2f}"
+        return super().default(o)
+
+
+def _batched(rows, render):
+    buffer = []
+    for row in rows:
+        buffer.append(render(row))
+        if len(buffer) >= EXPORT_BATCH_ROWS:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def stream_json_array(rows):
+    """A JSON array, one element at a time (same document as a regular Response)."""
+    encoder = ReportJSONEncoder(separators=(",", ":"))
+    first = [True]
+
+    def render(row):
+        prefix = "[" if first[0] else ","
+        first[0] = False
+        return prefix + encoder.encode(row)
+
+    yield from _batched(rows, render)
+    yield b"[]" if first[0] else b"]"
+
+
+def stream_jsonl(rows):
+    """JSON lines: one object per line."""
+    encoder = ReportJSONEncoder(separators=(",", ":"))
+    yield from _batched(rows, lambda row: encoder.encode(row) + "\n")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, Decimal):
+        return f"{value:.2f}"
+    return value
+
+
+def stream_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def render(row):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([_csv_value(row.get(col)) for col in columns])
+        return buffer.getvalue()
+
+    yield render(dict(zip(columns, columns))).encode("utf-8")
+    yield from _batched(rows, render)
+
+
+# -----------------------------
+# XLSX (SpreadsheetML parts zipped with stream_zip)
+# -----------------------------
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_workbook(sheet_name):
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet_name[:31], {chr(34): "&quot;"})}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f"<c><v>{value}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+def _xlsx_sheet(rows, columns):
+    yield (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+        "<row>" + "".join(_xlsx_cell(col) for col in columns) + "</row>"
+    ).encode("utf-8")
+    yield from _batched(rows, lambda row: "<row>" + "".join(_xlsx_cell(row.get(col)) for col in columns) + "</row>")
+    yield b"</sheetData></worksheet>"
+
+
+def stream_xlsx(rows, columns, sheet_name="Report"):
+    """A single-sheet workbook (header row + one row per dict) built while ``rows`` is consumed."""
+    return stream_zip([
+        ("[Content_Types].xml", [_XLSX_CONTENT_TYPES.encode("utf-8")]),
+        ("_rels/.rels", [_XLSX_ROOT_RELS.encode("utf-8")]),
+        ("xl/workbook.xml", [_xlsx_workbook(sheet_name).encode("utf-8")]),
+        ("xl/_rels/workbook.xml.rels", [_XLSX_WORKBOOK_RELS.encode("utf-8")]),
+        ("xl/worksheets/sheet1.xml", _xlsx_sheet(rows, columns)),
+    ])
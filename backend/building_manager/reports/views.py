@@ -2,6 +2,7 @@
 from datetime import datetime
 from django.utils import timezone
 from django.db.models import Q
+from django.http import StreamingHttpResponse
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -13,13 +14,16 @@ from permissions.drf import RoleBasedPermission
 from common.pagination import CustomPagination
 
 from .services.financial_service import FinancialReportService
-from .services.occupancy_service import OccupancyReportService
-from .services.renter_service import RenterCollectionReportService
+from .services.noi_service import NetOperatingIncomeReportService
+from .services.occupancy_service import OCCUPANCY_MAX_DAYS, OccupancyReportService
+from .services.renter_service import COLLECTION_COLUMNS, RenterCollectionReportService
+from .services.aging_service import AgingReportService
 from .serializers import (
-    FinancialSummarySerializer, InvoiceListSerializer,
-    OccupancySummarySerializer, UnitListSerializer,
-    RenterCollectionRowSerializer
+    FinancialSummarySerializer, InvoiceListSerializer, NOIReportSerializer,
+    OccupancySummarySerializer, OccupancyTimeseriesSerializer, UnitListSerializer,
+    RenterCollectionRowSerializer, AgingReportSerializer
 )
+from .utils import stream_csv, stream_json_array, stream_jsonl, stream_xlsx
 
 
 @extend_schema(tags=["Reports"])
@@ -38,6 +42,29 @@ class FinancialSummaryView(APIView):
         return Response(serializer.data)
 
 
+@extend_schema(tags=["Reports"])
+class NetOperatingIncomeView(APIView):
+    permission_classes = [RoleBasedPermission]
+
+    @extend_schema(responses=NOIReportSerializer)
+    def get(self, request):
+        """
+        Monthly net operating income (collections minus expenses).
+        Optional ?start=YYYY-MM-DD&end=YYYY-MM-DD (defaults to the year to date).
+        """
+        try:
+            start, end = (request.query_params.get(p) for p in ("start", "end"))
+            start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+            end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else None
+        except ValueError:
+            return Response({"detail": "start and end must be YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+
+        svc = NetOperatingIncomeReportService(start_date=start_date, end_date=end_date)
+        if svc.start_date > svc.end_date:
+            return Response({"detail": "start must be on or before end."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(NOIReportSerializer(svc.summarize()).data)
+
+
 @extend_schema(tags=["Reports"])
 class FinancialInvoicesView(generics.ListAPIView):
     permission_classes = [RoleBasedPermission]
@@ -78,6 +105,35 @@ class OccupancySummaryView(APIView):
         return Response(serializer.data)
 
 
+@extend_schema(tags=["Reports"])
+class OccupancyTimeseriesView(APIView):
+    permission_classes = [RoleBasedPermission]
+
+    @extend_schema(responses=OccupancyTimeseriesSerializer)
+    def get(self, request):
+        """
+        Daily occupancy from lease history plus vacancy days and rent lost per unit.
+        Optional ?start=YYYY-MM-DD&end=YYYY-MM-DD (defaults to the current month to date).
+        """
+        try:
+            start, end = (request.query_params.get(p) for p in ("start", "end"))
+            start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+            end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else None
+        except ValueError:
+            return Response({"detail": "start and end must be YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+
+        svc = OccupancyReportService(start_date=start_date, end_date=end_date)
+        if svc.start_date > svc.end_date:
+            return Response({"detail": "start must be on or before end."}, status=status.HTTP_400_BAD_REQUEST)
+        if (svc.end_date - svc.start_date).days >= OCCUPANCY_MAX_DAYS:
+            return Response(
+                {"detail": f"The range can span at most {OCCUPANCY_MAX_DAYS} days."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = OccupancyTimeseriesSerializer(svc.timeseries())
+        return Response(serializer.data)
+
+
 @extend_schema(tags=["Reports"])
 class VacantUnitsView(generics.ListAPIView):
     permission_classes = [RoleBasedPermission]
@@ -92,12 +148,52 @@ class VacantUnitsView(generics.ListAPIView):
 @extend_schema(tags=["Reports"])
 class RenterCollectionSummaryView(APIView):
     permission_classes = [RoleBasedPermission]
-
+    # ?output= -> (content type, file extension); json is the default JSON array
+    OUTPUTS = {
+        "json": ("application/json", None),
+        "jsonl": ("application/x-ndjson", "jsonl"),
+        "csv": ("text/csv", "csv"),
+        "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    }
+
+    @extend_schema(responses=RenterCollectionRowSerializer(many=True))
     def get(self, request):
-        svc = RenterCollectionReportService()
-        rows = svc.summarize()
-        serializer = RenterCollectionRowSerializer(rows, many=True)
-        return Response(serializer.data)
+        """
+        Invoiced / paid / due per renter, streamed from a server-side cursor.
+        Optional ?start=YYYY-MM-DD&end=YYYY-MM-DD (by invoice date; all invoices
+        otherwise) and ?output=json|jsonl|csv|xlsx.
+        """
+        output = request.query_params.get("output", "json")
+        if output not in self.OUTPUTS:
+            return Response(
+                {"detail": f"output must be one of: {', '.join(self.OUTPUTS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            start, end = (request.query_params.get(p) for p in ("start", "end"))
+            start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+            end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else None
+        except ValueError:
+            return Response({"detail": "start and end must be YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date and end_date and start_date > end_date:
+            return Response({"detail": "start must be on or before end."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = RenterCollectionReportService(start_date=start_date, end_date=end_date).iter_rows()
+        if output == "json":
+            body = stream_json_array(rows)
+        elif output == "jsonl":
+            body = stream_jsonl(rows)
+        elif output == "csv":
+            body = stream_csv(rows, COLLECTION_COLUMNS)
+        else:
+            body = stream_xlsx(rows, COLLECTION_COLUMNS, sheet_name="Renter collection")
+
+        content_type, extension = self.OUTPUTS[output]
+        response = StreamingHttpResponse(body, content_type=content_type)
+        if extension:
+            filename = f"renter-collection-{timezone.now():%Y%m%d}.{extension}"
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
 
 
 @extend_schema(tags=["Reports"])
@@ -120,3 +216,28 @@ class RenterTopDuesView(APIView):
             for r in qs
         ]
         return Response(data)
+
+
+@extend_schema(tags=["Reports"])
+class AgingReportView(APIView):
+    permission_classes = [RoleBasedPermission]
+
+    def get(self, request):
+        """
+        Outstanding balances in 0-30 / 31-60 / 61-90 / 90+ days-past-due buckets,
+        with per-renter and per-floor breakdowns. Optional ?as_of=YYYY-MM-DD.
+        """
+        as_of = request.query_params.get("as_of")
+        try:
+            as_of_date = datetime.strptime(as_of, "%Y-%m-%d").date() if as_of else None
+        except ValueError:
+            return Response({"detail": "as_of must be YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+
+        svc = AgingReportService(end_date=as_of_date)
+        summary = svc.summarize()
+        serializer = AgingReportSerializer({
+            "as_of": summary.pop("as_of"),
+            "totals": summary,
+            **svc.details(),
+        })
+        return Response(serializer.data)
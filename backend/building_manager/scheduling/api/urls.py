@@ -1,10 +1,11 @@
 # scheduling/api/urls.py
 from django.urls import path
-from scheduling.api.views import TaskLogListView, ManualInvoiceGenerationView, ManualRentReminderView, \
-    ManualOverdueDetectionView
+from scheduling.api.views import TaskLogListView, TaskLogDetailView, ManualInvoiceGenerationView, \
+    ManualRentReminderView, ManualOverdueDetectionView
 
 urlpatterns = [
     path("task-logs/", TaskLogListView.as_view(), name="tasklog-list"),
+    path("task-logs/<int:pk>/", TaskLogDetailView.as_view(), name="tasklog-detail"),
     path("manual-invoice/", ManualInvoiceGenerationView.as_view(), name="manual-invoice"),
     path("manual-reminder/", ManualRentReminderView.as_view(), name="manual-reminder"),
     path("manual-overdue/", ManualOverdueDetectionView.as_view(), name="manual-overdue"),
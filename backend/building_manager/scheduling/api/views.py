@@ -1,6 +1,6 @@
 # scheduling/api/views.py
 from datetime import timedelta
-from invoices.services import generate_invoice_pdf
+from django.conf import settings
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
@@ -8,14 +8,15 @@ from rest_framework import generics, filters, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.conf import settings
-from common.pagination import CustomPagination
-from invoices.models import Invoice
-from leases.models import Lease
-from notifications.utils import NotificationService
+from common.pagination import KeysetPagination
+from common.utils.dispatch import dispatch
+from invoices.billing import run_monthly_billing
+from notifications.email_templates import EMAIL_TEMPLATES, invoice_template_params, render_email
 from permissions.drf import RoleBasedPermission
 from scheduling.api.serializers import TaskLogSerializer
 from scheduling.models import TaskLog
+from scheduling.reminders import REMINDER_DAYS_AHEAD
+from scheduling.tasks import detect_overdue_invoices_task, send_rent_reminders_task
 
 
 # -------------------------------
@@ -26,7 +27,7 @@ class TaskLogListView(generics.ListAPIView):
     queryset = TaskLog.objects.all()
     serializer_class = TaskLogSerializer
     permission_classes = [IsAuthenticated, RoleBasedPermission]
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
 
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ["task_name", "status", "executed_by"]
@@ -35,6 +36,14 @@ class TaskLogListView(generics.ListAPIView):
     ordering = ["-executed_at"]
 
 
+@extend_schema(tags=["Scheduling"])
+class TaskLogDetailView(generics.RetrieveAPIView):
+    """Poll a background job (the job_id returned by the manual scheduling endpoints)."""
+    queryset = TaskLog.objects.all()
+    serializer_class = TaskLogSerializer
+    permission_classes = [IsAuthenticated, RoleBasedPermission]
+
+
 # -------------------------------
 # Helper function for formatted messages
 # -------------------------------
@@ -110,62 +119,9 @@ def get_email_message(invoice, renter, message_type="invoice_created"):
             </body>
         </html>
         """
-    elif message_type == "rent_reminder":
-        subject = f"Reminder: Rent Due for Invoice #{invoice.invoice_number}"
-        body = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif; color: #333;">
-                <h2 style="color: #2e6c80;">Dear {renter.full_name},</h2>
-                <p style="font-size: 16px;">We hope you are doing well.</p>
-                <p style="font-size: 16px;">This is a friendly reminder that your rent payment for the following invoice is due soon:</p>
-                <table style="font-size: 16px; width: 100%; border-collapse: collapse; margin-top: 20px;">
-                    <tr style="background-color: #f2f2f2;">
-                        <th style="padding: 8px; text-align: left;">Invoice Number</th>
-                        <td style="padding: 8px; text-align: left;">#{invoice.invoice_number}</td>
-                    </tr>
-                    <tr>
-                        <th style="padding: 8px; text-align: left;">Amount Due</th>
-                        <td style="padding: 8px; text-align: left;">{invoice.amount} BDT</td>
-                    </tr>
-                    <tr>
-                        <th style="padding: 8px; text-align: left;">Due Date</th>
-                        <td style="padding: 8px; text-align: left;">{invoice.due_date.strftime('%B %d, %Y')}</td>
-                    </tr>
-                </table>
-                <p style="font-size: 16px; margin-top: 20px;">To avoid any late fees, kindly ensure the payment is made on or before the due date.</p>
-                <p style="font-size: 16px;">If you need assistance or have any questions, please feel free to reach out to us.</p>
-                <p style="font-size: 16px;">Best regards,<br> Building Manager - Saptaneer<br>Contact us at: [8801521259370]</p>
-            </body>
-        </html>
-        """
-    elif message_type == "overdue_notice":
-        subject = f"Urgent: Overdue Invoice #{invoice.invoice_number}"
-        body = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif; color: #333;">
-                <h2 style="color: #b84e32;">Dear {renter.full_name},</h2>
-                <p style="font-size: 16px;">We hope you are doing well.</p>
-                <p style="font-size: 16px;">This is a gentle reminder that your invoice <strong>#{invoice.invoice_number}</strong> is now overdue. Below are the details:</p>
-                <table style="font-size: 16px; width: 100%; border-collapse: collapse; margin-top: 20px;">
-                    <tr style="background-color: #f2f2f2;">
-                        <th style="padding: 8px; text-align: left;">Amount Due</th>
-                        <td style="padding: 8px; text-align: left;">{invoice.amount} BDT</td>
-                    </tr>
-                    <tr>
-                        <th style="padding: 8px; text-align: left;">Due Date</th>
-                        <td style="padding: 8px; text-align: left;">{invoice.due_date.strftime('%B %d, %Y')}</td>
-                    </tr>
-                    <tr>
-                        <th style="padding: 8px; text-align: left;">Days Overdue</th>
-                        <td style="padding: 8px; text-align: left;">{(timezone.now().date() - invoice.due_date).days} days</td>
-                    </tr>
-                </table>
-                <p style="font-size: 16px; margin-top: 20px;">To avoid further complications or penalties, we kindly request that you settle the payment at your earliest convenience.</p>
-                <p style="font-size: 16px;">If you require any assistance or need additional information, please don't hesitate to contact us.</p>
-                <p style="font-size: 16px;">Best regards,<br> Building Manager - Saptaneer<br>Contact us at: [8801521259370]</p>
-            </body>
-        </html>
-        """
+    elif message_type in EMAIL_TEMPLATES:
+        # rent_reminder / overdue_notice: shared Brevo templates (batchable, see notifications.email_templates)
+        return render_email(message_type, invoice_template_params(invoice, renter))
     else:
         return ""
 
@@ -253,7 +209,6 @@ class ManualInvoiceGenerationView(APIView):
     def post(self, request, *args, **kwargs):
         today = timezone.now().date()
         target_month_name = today.strftime('%B %Y')
-        target_description = f"Monthly rent for {target_month_name}"
         current_month_start = today.replace(day=1)
         user = request.user
 
@@ -265,80 +220,15 @@ class ManualInvoiceGenerationView(APIView):
             message=f"Manual bulk generation started for {target_month_name}"
         )
 
-        created_count = 0
-        skipped_count = 0
-        messages = []
-
-        active_leases = Lease.objects.filter(status="active").select_related('renter__user')
-
-        for lease in active_leases:
-            renter = lease.renter
-
-            if Invoice.objects.filter(
-                    lease=lease,
-                    invoice_type="rent",
-                    invoice_month=current_month_start
-            ).exists():
-                skipped_count += 1
-                messages.append(f"SKIPPED LS-{lease.id}: Already exists.")
-                continue
-
-            try:
-                due_date = current_month_start + timedelta(days=7)
-                invoice = Invoice(
-                    lease=lease,
-                    invoice_type="rent",
-                    amount=lease.rent_amount,
-                    due_date=due_date,
-                    invoice_month=current_month_start,
-                    status="unpaid",
-                    description=target_description
-                )
-                invoice._skip_signal_notify = True
-                invoice.save()
-
-                generate_invoice_pdf(invoice)
-                invoice.refresh_from_db()
-
-                attachment_url = None
-                if invoice.invoice_pdf:
-                    site_url = getattr(settings, "SITE_URL", "http://localhost:8000").rstrip("/")
-                    attachment_url = f"{site_url}{invoice.invoice_pdf.url}"
-
-                # 5. Email Notification
-                if renter.prefers_email and renter.user.email:
-                    subject, body = get_email_message(invoice, renter, message_type="invoice_created")
-                    NotificationService.send(
-                        notification_type="invoice_created",
-                        renter=renter,
-                        channel="email",
-                        subject=subject,
-                        message=body,
-                        invoice=invoice,
-                        sent_by=user,
-                        attachment_url=attachment_url,
-                        task_log=task_log,  # Linked correctly
-                    )
-
-                # 6. WhatsApp Notification
-                if renter.prefers_whatsapp and renter.phone_number:
-                    wa_message = get_whatsapp_message(invoice, renter, message_type="invoice_created")
-                    NotificationService.send(
-                        notification_type="invoice_created",
-                        renter=renter,
-                        channel="whatsapp",
-                        message=wa_message,
-                        invoice=invoice,
-                        sent_by=user,
-                        attachment_url=attachment_url,
-                        task_log=task_log,  # 🔥 FIXED: Now linked to the TaskLog
-                    )
-
-                created_count += 1
-                messages.append(f"SUCCESS: LS-{lease.id} (Inv: {invoice.invoice_number})")
-
-            except Exception as e:
-                messages.append(f"ERROR LS-{lease.id}: {str(e)}")
+        # 2. SET-BASED BILLING (anti-join + bulk insert), then PDF/notification stage
+        result = run_monthly_billing(
+            month_start=current_month_start,
+            executed_by=user,
+            task_log=task_log,
+        )
+        created_count = result["created"]
+        skipped_count = result["skipped"]
+        messages = result["messages"]
 
         # 7. REFINED STATUS LOGIC
         if created_count > 0:
@@ -365,81 +255,33 @@ class ManualInvoiceGenerationView(APIView):
 @extend_schema(tags=["Scheduling"])
 class ManualRentReminderView(APIView):
     """
-    Manually send reminders for invoices due in the next 3 days.
+    Queue reminders for invoices due in the next 3 days (one per renter).
+    Returns a job id (TaskLog id) to follow via task-logs/<id>/.
     """
     permission_classes = [IsAuthenticated, RoleBasedPermission]
 
     def post(self, request):
         user = request.user
         today = timezone.now().date()
-        due_soon = today + timedelta(days=3)
+        due_soon = today + timedelta(days=REMINDER_DAYS_AHEAD)
 
-        # 1. START THE PARENT LOG (Audit Trail Initialization)
+        # 1. START THE PARENT LOG (Audit Trail Initialization) - its id is the job id
         task_log = TaskLog.objects.create(
             task_name="RENT_REMINDER",
-            status="IN_PROGRESS",
+            status="PENDING",
             executed_by=user,
-            message=f"Manual rent reminder started for invoices due by {due_soon}"
+            message=f"Manual rent reminder queued for invoices due by {due_soon}"
         )
 
-        invoices_due = Invoice.objects.filter(
-            due_date__lte=due_soon,
-            status__in=["draft", "unpaid", "partially_paid"]
-        ).select_related('lease__renter__user')
-
-        messages = []
-
-        try:
-            for invoice in invoices_due:
-                renter = invoice.lease.renter
-
-                # Email Notification
-                if renter.prefers_email and renter.user.email:
-                    subject, body = get_email_message(invoice, renter, message_type="rent_reminder")
-                    NotificationService.send(
-                        notification_type="rent_reminder",
-                        renter=renter,
-                        channel="email",
-                        subject=subject,
-                        message=body,
-                        invoice=invoice,
-                        task_log=task_log,  # <--- LINKED
-                        sent_by=user
-                    )
-
-                # WhatsApp Notification
-                if renter.prefers_whatsapp and renter.phone_number:
-                    message = get_whatsapp_message(invoice, renter, message_type="rent_reminder")
-                    NotificationService.send(
-                        notification_type="rent_reminder",
-                        renter=renter,
-                        channel="whatsapp",
-                        message=message,
-                        invoice=invoice,
-                        task_log=task_log,  # <--- FIXED: Linked this to TaskLog
-                        sent_by=user
-                    )
-
-                messages.append(f"Reminder sent for invoice {invoice.invoice_number}")
-
-            # 2. FINALIZE TASK LOG
-            task_log.status = "SUCCESS" if invoices_due.exists() else "SKIPPED"
-            task_log.message = f"Processed {len(invoices_due)} reminders.\n" + "\n".join(messages)[:800]
-            task_log.save()
-
-        except Exception as e:
-            # 3. LOG FAILURE FOR AUDIT
-            task_log.status = "FAILURE"
-            task_log.message = f"Critical Error: {str(e)}"
-            task_log.save()
-            return Response({"detail": "Error during reminder processing."},
-                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # 2. Streaming, per-renter reminder run happens in the worker
+        result = dispatch(send_rent_reminders_task.si(task_log.id, due_soon.isoformat()))
 
         return Response({
             "status": "success",
-            "message": f"{len(invoices_due)} reminders processed",
-            "details": messages
-        }, status=status.HTTP_200_OK)
+            "message": "Rent reminders queued.",
+            "job_id": task_log.id,
+            "task_id": result.id,
+        }, status=status.HTTP_202_ACCEPTED)
 
 
 # -------------------------------
@@ -448,7 +290,8 @@ class ManualRentReminderView(APIView):
 @extend_schema(tags=["Scheduling"])
 class ManualOverdueDetectionView(APIView):
     """
-    Detect overdue invoices (older than 30 days) and notify renters.
+    Detect overdue invoices (older than 30 days) and send one consolidated
+    notice per renter. Returns a job id (TaskLog id).
     """
     permission_classes = [IsAuthenticated, RoleBasedPermission]
 
@@ -456,85 +299,22 @@ class ManualOverdueDetectionView(APIView):
         user = request.user
         today = timezone.now().date()
         # Invoices due 30+ days ago are considered "Long Overdue"
-        overdue_threshold = today - timedelta(days=30)
+        overdue_threshold = today - timedelta(days=settings.OVERDUE_THRESHOLD_DAYS)
 
-        # 1. START THE PARENT LOG (Audit Trail)
+        # 1. START THE PARENT LOG (Audit Trail) - its id is the job id
         task_log = TaskLog.objects.create(
             task_name="OVERDUE_DETECTION",  # Fixed: Changed from RENT_REMINDER
-            status="IN_PROGRESS",
+            status="PENDING",
             executed_by=user,
             message=f"Detecting invoices overdue since {overdue_threshold}"
         )
 
-        try:
-            # 2. FETCH OVERDUE INVOICES
-            overdue_invoices = Invoice.objects.filter(
-                due_date__lte=overdue_threshold,
-                status__in=["unpaid", "partially_paid"]  # Drafts usually aren't sent as overdue
-            ).select_related('lease__renter__user')
-
-            if not overdue_invoices.exists():
-                task_log.status = "SKIPPED"
-                task_log.message = "No overdue invoices found for this threshold."
-                task_log.save()
-                return Response({"message": "No overdue invoices found."}, status=status.HTTP_200_OK)
-
-            messages = []
-
-            # 3. PROCESSING LOOP
-            for invoice in overdue_invoices:
-                try:
-                    renter = invoice.lease.renter
-
-                    # Email Notification
-                    if renter.prefers_email and renter.user.email:
-                        subject, body = get_email_message(invoice, renter, message_type="overdue_notice")
-                        NotificationService.send(
-                            notification_type="overdue_notice",
-                            renter=renter,
-                            channel="email",
-                            subject=subject,
-                            message=body,
-                            invoice=invoice,
-                            sent_by=user,
-                            task_log=task_log,  # <--- LINKED
-                        )
-
-                    # WhatsApp Notification
-                    if renter.prefers_whatsapp and renter.phone_number:
-                        message = get_whatsapp_message(invoice, renter, message_type="overdue_notice")
-                        NotificationService.send(
-                            notification_type="overdue_notice",
-                            renter=renter,
-                            channel="whatsapp",
-                            message=message,
-                            invoice=invoice,
-                            sent_by=user,
-                            task_log=task_log  # <--- FIXED: Added missing link
-                        )
-
-                    messages.append(f"SUCCESS: Notice sent for {invoice.invoice_number}")
-
-                except Exception as inner_e:
-                    messages.append(f"FAILED: {invoice.invoice_number} error: {str(inner_e)}")
-
-            # 4. FINALIZE TASK LOG
-            # Status logic: If any individual item failed, we mark as SUCCESS_WITH_ERRORS or FAILURE
-            has_failures = any("FAILED" in m for m in messages)
-            task_log.status = "FAILURE" if has_failures else "SUCCESS"
-            task_log.message = f"Processed {len(overdue_invoices)} overdue notices.\n" + "\n".join(messages)[:800]
-            task_log.save()
-
-            return Response({
-                "status": "success",
-                "message": f"{len(overdue_invoices)} overdue notices processed",
-                "details": messages
-            }, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            # 5. CRITICAL ERROR CATCH
-            task_log.status = "FAILURE"
-            task_log.message = f"Critical Error in View: {str(e)}"
-            task_log.save()
-            return Response({"detail": "Internal server error during detection."},
-                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # 2. GROUP BY per renter + consolidated notices run in the worker
+        result = dispatch(detect_overdue_invoices_task.si(task_log.id))
+
+        return Response({
+            "status": "success",
+            "message": "Overdue detection queued.",
+            "job_id": task_log.id,
+            "task_id": result.id,
+        }, status=status.HTTP_202_ACCEPTED)
@@ -26,6 +26,10 @@ class TaskLog(BaseAuditModel):
 
     class Meta:
         ordering = ["-executed_at"]
+        indexes = [
+            # Task log listing (newest first) and recent runs by status
+            models.Index(fields=["executed_at", "status"], name="tasklog_executed_status_idx"),
+        ]
 
     def __str__(self):
         return f"{self.task_name} - {self.status}"
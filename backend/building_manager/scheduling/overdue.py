@@ -0,0 +1,145 @@
+# scheduling/overdue.py
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Min, Q, Sum
+from django.utils import timezone
+
+from invoices.models import Invoice
+from notifications.email_templates import render_email, renter_summary_template_params
+from notifications.models import Notification
+from notifications.utils import NotificationService
+from renters.models import Renter
+
+logger = logging.getLogger(__name__)
+
+OVERDUE_STATUSES = ["unpaid", "partially_paid"]  # Drafts usually aren't sent as overdue
+
+
+def overdue_whatsapp(params):
+    """WhatsApp text for one renter; same wording as get_whatsapp_message for a single invoice."""
+    return (
+        f"Dear *{params['renter_name']}*,\n\n"
+        f"Your {params['invoice_noun']} *{params['invoice_numbers']}* {params['invoice_verb']} now overdue.\n"
+        f"*Amount Due*: {params['amount']} BDT\n"
+        f"*Due Date*: {params['due_date']}\n"
+        f"*Days Overdue*: {params['days_overdue']} days\n\n"
+        "Please settle the payment at your earliest convenience to avoid penalties.\n"
+        "If you’ve already paid, please contact us immediately.\n\n"
+        "Best regards,\n"
+        "Building Manager - Saptaneer\n"
+        "Contact: [8801521259370]"
+    )
+
+
+def _renter_notices(renter, params, sent_by, task_log, invoice_id=None):
+    """Email/WhatsApp rows for one renter; ``invoice_id`` links (and attaches) a single overdue invoice."""
+    common = dict(
+        notification_type="overdue_notice", renter=renter, invoice_id=invoice_id, sent_by=sent_by, task_log=task_log
+    )
+    rows = []
+    if renter.prefers_email and renter.user.email:
+        subject, body = render_email("overdue_notice", params)
+        rows.append(Notification(
+            channel="email", recipient=renter.user.email, subject=subject, message=body,
+            template_params=params, **common
+        ))
+    if renter.prefers_whatsapp and renter.phone_number:
+        rows.append(Notification(
+            channel="whatsapp", recipient=renter.phone_number, message=overdue_whatsapp(params), **common
+        ))
+    return rows
+
+
+def run_overdue_detection(threshold_days=None, sent_by=None, task_log=None, chunk_size=None):
+    """
+    Send one consolidated overdue notice per renter.
+
+    Balances are aggregated per renter in a single GROUP BY over invoices due
+    ``threshold_days`` ago or earlier. Renters notified within the last
+    OVERDUE_NOTICE_INTERVAL_DAYS are filtered out in that same query. Each
+    chunk's renters are then claimed (row-locked, skipping rows another run
+    holds, and re-checked against the interval) in the transaction that
+    stamps Renter.last_overdue_notice_at and queues the notices, so
+    overlapping or repeated runs never notify a renter twice.
+
+    Returns {"renters", "invoices", "outstanding", "notifications", "messages"}.
+    """
+    threshold_days = settings.OVERDUE_THRESHOLD_DAYS if threshold_days is None else threshold_days
+    chunk_size = chunk_size or settings.BILLING_BATCH_SIZE
+    now = timezone.now()
+    threshold = now.date() - timedelta(days=threshold_days)
+    notified_since = now - timedelta(days=settings.OVERDUE_NOTICE_INTERVAL_DAYS)
+
+    not_notified = Q(last_overdue_notice_at__isnull=True) | Q(last_overdue_notice_at__lt=notified_since)
+    overdue = Invoice.objects.filter(due_date__lte=threshold, status__in=OVERDUE_STATUSES).filter(
+        Q(lease__renter__last_overdue_notice_at__isnull=True)
+        | Q(lease__renter__last_overdue_notice_at__lt=notified_since)
+    )
+    per_renter = list(
+        overdue.values("lease__renter_id")
+        .annotate(
+            invoice_count=Count("id"),
+            outstanding=Sum(ExpressionWrapper(
+                F("amount") - F("paid_amount"), output_field=DecimalField(max_digits=12, decimal_places=2)
+            )),
+            oldest_due=Min("due_date"),
+        )
+        .order_by("lease__renter_id")
+    )
+
+    totals = {"renters": 0, "invoices": 0, "outstanding": Decimal("0.00"), "notifications": 0, "messages": []}
+    for i in range(0, len(per_renter), chunk_size):
+        chunk = per_renter[i:i + chunk_size]
+        with transaction.atomic():
+            # Claim the chunk: renters a concurrent run holds or has just stamped drop out here
+            claimed = set(
+                Renter.objects.select_for_update(skip_locked=True)
+                .filter(not_notified, pk__in=[row["lease__renter_id"] for row in chunk])
+                .values_list("pk", flat=True)
+            )
+            chunk = [row for row in chunk if row["lease__renter_id"] in claimed]
+            if not chunk:
+                continue
+            renters = Renter.objects.select_related("user").in_bulk(claimed)
+
+            invoices = defaultdict(list)
+            for renter_id, invoice_id, number in (
+                    overdue.filter(lease__renter_id__in=claimed)
+                    .order_by("due_date", "id")
+                    .values_list("lease__renter_id", "id", "invoice_number")
+            ):
+                invoices[renter_id].append((invoice_id, number))
+
+            rows = []
+            for row in chunk:
+                renter = renters[row["lease__renter_id"]]
+                renter_invoices = invoices[renter.pk]
+                params = renter_summary_template_params(
+                    renter, [number for _, number in renter_invoices], row["outstanding"], row["oldest_due"]
+                )
+                single = renter_invoices[0][0] if len(renter_invoices) == 1 else None
+                notices = _renter_notices(renter, params, sent_by, task_log, invoice_id=single)
+                rows.extend(notices)
+
+                totals["renters"] += 1
+                totals["invoices"] += row["invoice_count"]
+                totals["outstanding"] += Decimal(params["amount"])
+                totals["messages"].append(
+                    f"{'QUEUED' if notices else 'SKIPPED'}: {renter.full_name} - "
+                    f"{row['invoice_count']} invoice(s), {params['amount']} BDT"
+                )
+
+            NotificationService.queue_many(rows)
+            Renter.objects.filter(pk__in=claimed).update(last_overdue_notice_at=now)
+        totals["notifications"] += len(rows)
+
+    logger.info(
+        f"Overdue detection (due by {threshold}): {totals['renters']} renters, "
+        f"{totals['invoices']} invoices, {totals['notifications']} notifications queued."
+    )
+    return totals
@@ -0,0 +1,117 @@
+# scheduling/reminders.py
+import logging
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from invoices.models import Invoice
+from notifications.email_templates import render_email, renter_invoices_template_params
+from notifications.models import Notification
+from notifications.utils import NotificationService
+
+logger = logging.getLogger(__name__)
+
+REMINDER_STATUSES = ["draft", "unpaid", "partially_paid"]
+REMINDER_DAYS_AHEAD = 3
+
+
+def rent_reminder_whatsapp(params):
+    """WhatsApp text for one renter; same wording as get_whatsapp_message for a single invoice."""
+    noun = "invoice" if params["invoice_count"] == 1 else "invoices"
+    return (
+        f"Dear *{params['renter_name']}*,\n\n"
+        f"Reminder: Your rent payment for {noun} *{params['invoice_numbers']}* is due soon.\n"
+        f"*Amount Due*: {params['amount']} BDT\n"
+        f"*Due Date*: {params['due_date']}\n\n"
+        "Kindly make payment before the due date to avoid late fees.\n"
+        "If you need any assistance, please contact us.\n\n"
+        "Best regards,\n"
+        "Building Manager - Saptaneer\n"
+        "Contact: [8801521259370]"
+    )
+
+
+def _renter_reminders(renter, invoices, sent_by, task_log):
+    """Unsaved Notification rows for one renter (one per preferred channel)."""
+    params = renter_invoices_template_params(renter, invoices)
+    # Keep the invoice link (and its PDF attachment) when the reminder is about a single invoice
+    invoice = invoices[0] if len(invoices) == 1 else None
+    common = dict(
+        notification_type="rent_reminder", renter=renter, invoice=invoice,
+        sent_by=sent_by, task_log=task_log,
+    )
+
+    rows = []
+    if renter.prefers_email and renter.user.email:
+        subject, body = render_email("rent_reminder", params)
+        rows.append(Notification(
+            channel="email", recipient=renter.user.email, subject=subject, message=body,
+            template_params=params, **common
+        ))
+    if renter.prefers_whatsapp and renter.phone_number:
+        rows.append(Notification(
+            channel="whatsapp", recipient=renter.phone_number, message=rent_reminder_whatsapp(params), **common
+        ))
+    return rows
+
+
+def queue_rent_reminders(due_by=None, sent_by=None, task_log=None, chunk_size=None):
+    """
+    Queue one rent reminder per renter (per channel) covering all their
+    invoices due by ``due_by`` (default: today + 3 days).
+
+    Due invoices are streamed with iterator(), ordered by renter so they can
+    be grouped on the fly; each renter's message is rendered once and the
+    Notification rows are bulk-inserted per chunk. Delivery is left to the
+    outbox dispatcher.
+
+    Returns {"invoices", "renters", "notifications", "messages"}.
+    """
+    due_by = due_by or timezone.now().date() + timedelta(days=REMINDER_DAYS_AHEAD)
+    chunk_size = chunk_size or settings.BILLING_BATCH_SIZE
+
+    invoices_due = (
+        Invoice.objects.filter(due_date__lte=due_by, status__in=REMINDER_STATUSES)
+        .select_related("lease__renter__user")
+        .order_by("lease__renter_id", "due_date", "id")
+        .only(
+            "id", "invoice_number", "amount", "paid_amount", "due_date", "lease__id",
+            "lease__renter__id", "lease__renter__full_name", "lease__renter__phone_number",
+            "lease__renter__notification_preference", "lease__renter__user__id", "lease__renter__user__email",
+        )
+    )
+
+    totals = {"invoices": 0, "renters": 0, "notifications": 0, "messages": []}
+    pending = []
+
+    def flush():
+        if pending:
+            with transaction.atomic():
+                NotificationService.queue_many(pending)
+            totals["notifications"] += len(pending)
+            pending.clear()
+
+    for _, group in groupby(invoices_due.iterator(chunk_size=chunk_size), key=lambda inv: inv.lease.renter_id):
+        invoices = list(group)
+        renter = invoices[0].lease.renter
+        totals["invoices"] += len(invoices)
+        totals["renters"] += 1
+
+        rows = _renter_reminders(renter, invoices, sent_by, task_log)
+        pending.extend(rows)
+        numbers = ", ".join(inv.invoice_number or str(inv.id) for inv in invoices)
+        totals["messages"].append(
+            f"QUEUED: {renter.full_name} ({numbers})" if rows else f"SKIPPED: {renter.full_name} (no channel)"
+        )
+        if len(pending) >= chunk_size:
+            flush()
+    flush()
+
+    logger.info(
+        f"Rent reminders by {due_by}: {totals['invoices']} invoices, {totals['renters']} renters, "
+        f"{totals['notifications']} notifications queued."
+    )
+    return totals
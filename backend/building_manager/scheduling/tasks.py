@@ -1,15 +1,12 @@
 # scheduling/tasks.py
+from datetime import date
+
 from celery import shared_task
-from datetime import timedelta
-from django.utils import timezone
-from django.conf import settings
 from django.contrib.auth import get_user_model
-from leases.models import Lease
-from invoices.models import Invoice
-from invoices.services import generate_invoice_pdf
-from notifications.utils import NotificationService
+from invoices.billing import run_monthly_billing
 from scheduling.models import TaskLog
-from scheduling.api.views import get_email_message, get_whatsapp_message
+from scheduling.overdue import run_overdue_detection
+from scheduling.reminders import queue_rent_reminders
 
 User = get_user_model()
 
@@ -18,12 +15,8 @@ User = get_user_model()
 def generate_monthly_invoices_task(executed_by_id=None):
     """
     Automated version of the manual-invoice logic.
+    Both share the set-based billing engine in invoices.billing.
     """
-    today = timezone.now().date()
-    target_month_name = today.strftime('%B %Y')
-    target_description = f"Monthly rent for {target_month_name}"
-    current_month_start = today.replace(day=1)
-
     # If triggered by schedule, we might not have a user ID.
     # We find a staff/admin user for the log.
     executed_by = None
@@ -32,11 +25,6 @@ def generate_monthly_invoices_task(executed_by_id=None):
     else:
         executed_by = User.objects.filter(is_superuser=True).first()
 
-    created_count = 0
-    skipped_count = 0
-    messages = []
-
-    active_leases = Lease.objects.filter(status="active").select_related('renter__user')
     task_log = TaskLog.objects.create(
         task_name="AUTO_GENERATE_INVOICES",
         status="IN_PROGRESS",
@@ -44,75 +32,80 @@ def generate_monthly_invoices_task(executed_by_id=None):
         message="Task started..."
     )
 
-    for lease in active_leases:
-        renter = lease.renter
-
-        if Invoice.objects.filter(
-                lease=lease,
-                invoice_type="rent",
-                invoice_month=current_month_start
-        ).exists():
-            skipped_count += 1
-            continue
-
-        try:
-            due_date = current_month_start + timedelta(days=7)
-            invoice = Invoice(
-                lease=lease,
-                invoice_type="rent",
-                amount=lease.rent_amount,
-                due_date=due_date,
-                invoice_month=current_month_start,
-                status="unpaid",
-                description=target_description
-            )
-            invoice._skip_signal_notify = True
-            invoice.save()
-
-            generate_invoice_pdf(invoice)
-            invoice.refresh_from_db()
-
-            attachment_url = None
-            if invoice.invoice_pdf:
-                site_url = getattr(settings, "SITE_URL", "http://localhost:8000").rstrip("/")
-                attachment_url = f"{site_url}{invoice.invoice_pdf.url}"
-
-            # Email
-            if renter.prefers_email and renter.user.email:
-                subject, body = get_email_message(invoice, renter, message_type="invoice_created")
-                NotificationService.send(
-                    notification_type="invoice_created",
-                    renter=renter,
-                    channel="email",
-                    subject=subject,
-                    message=body,
-                    invoice=invoice,
-                    sent_by=executed_by,
-                    attachment_url=attachment_url,
-                    task_log=task_log
-                )
-
-            # WhatsApp
-            if renter.prefers_whatsapp:
-                wa_message = get_whatsapp_message(invoice, renter, message_type="invoice_created")
-                NotificationService.send(
-                    notification_type="invoice_created",
-                    renter=renter,
-                    channel="whatsapp",
-                    message=wa_message,
-                    invoice=invoice,
-                    sent_by=executed_by,
-                    attachment_url=attachment_url
-                )
-
-            created_count += 1
-            messages.append(f"Success: LS-{lease.id}")
-
-        except Exception as e:
-            messages.append(f"Error LS-{lease.id}: {str(e)}")
+    result = run_monthly_billing(executed_by=executed_by, task_log=task_log)
+    created_count = result["created"]
 
     task_log.status = "SUCCESS" if created_count > 0 else "SKIPPED"
-    task_log.message = f"Created: {created_count}. Details:\n" + "\n".join(messages)[:900]
+    task_log.message = (
+        f"Created: {created_count}, Skipped: {result['skipped']}. Details:\n"
+        + "\n".join(result["messages"])[:900]
+    )
     task_log.save()
 
-    return f"Processed {created_count} invoices."
\ No newline at end of file
+    return f"Processed {created_count} invoices."
+
+
+@shared_task(name="send_rent_reminders_task")
+def send_rent_reminders_task(task_log_id, due_by=None):
+    """
+    Background half of ManualRentReminderView: queue one reminder per renter
+    and record the outcome on the TaskLog the view returned as job id.
+    """
+    task_log = TaskLog.objects.get(pk=task_log_id)
+    task_log.status = "IN_PROGRESS"
+    task_log.save(update_fields=["status"])
+
+    try:
+        result = queue_rent_reminders(
+            due_by=date.fromisoformat(due_by) if due_by else None,
+            sent_by=task_log.executed_by,
+            task_log=task_log,
+        )
+    except Exception as e:
+        task_log.status = "FAILURE"
+        task_log.message = f"Critical Error: {str(e)}"
+        task_log.save()
+        raise
+
+    task_log.status = "SUCCESS" if result["invoices"] else "SKIPPED"
+    task_log.message = (
+        f"Processed {result['invoices']} invoices for {result['renters']} renters, "
+        f"{result['notifications']} notifications queued.\n" + "\n".join(result["messages"])[:800]
+    )
+    task_log.save()
+    return f"Queued {result['notifications']} reminders."
+
+
+@shared_task(name="detect_overdue_invoices_task")
+def detect_overdue_invoices_task(task_log_id=None, executed_by_id=None):
+    """
+    Consolidated overdue notices (one per renter). Runs daily from beat and
+    behind ManualOverdueDetectionView; renters notified recently are skipped.
+    """
+    if task_log_id:
+        task_log = TaskLog.objects.get(pk=task_log_id)
+    else:
+        executed_by = (
+            User.objects.filter(id=executed_by_id).first() if executed_by_id
+            else User.objects.filter(is_superuser=True).first()
+        )
+        task_log = TaskLog.objects.create(task_name="OVERDUE_DETECTION", executed_by=executed_by)
+    task_log.status = "IN_PROGRESS"
+    task_log.save(update_fields=["status"])
+
+    try:
+        result = run_overdue_detection(sent_by=task_log.executed_by, task_log=task_log)
+    except Exception as e:
+        task_log.status = "FAILURE"
+        task_log.message = f"Critical Error: {str(e)}"
+        task_log.save()
+        raise
+
+    task_log.status = "SUCCESS" if result["renters"] else "SKIPPED"
+    task_log.message = (
+        f"Processed {result['renters']} renters ({result['invoices']} overdue invoices, "
+        f"{result['outstanding']} BDT), {result['notifications']} notices queued.\n"
+        + "\n".join(result["messages"])[:800]
+    )
+    task_log.save()
+    return f"Queued {result['notifications']} overdue notices."